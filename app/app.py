@@ -1,19 +1,28 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from http import HTTPStatus
 
-import prometheus_client
-
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST
 
+from app.core.database import async_engine, settings, sql_tracer
+from app.core.metrics import MetricsMiddleware, gerar_metricas
+from app.core.sql_trace import SqlTraceMiddleware
 from app.juridico import (
     router_negociacao,
 )
+from app.juridico.resumo import manter_resumos
 from app.pessoa import (
     router_municipio,
+    router_pessoa,
 )
+from app.pessoa.apis import close_http_client
+from app.pessoa.cep import carregar_indice, cep_index
+from app.pessoa.referencia import referencia
 from app.routers import (
     auth,
+    diagnostico,
     permission_role_permission,
     permissions_module,
     permissions_permission,
@@ -30,8 +39,22 @@ resource = {}
 async def app_lifespan(app: FastAPI):
     print('init lifespan')
     resource['msg'] = "Hello, it's beautiful day!!"
+    try:
+        await referencia.carregar()
+        await carregar_indice()
+    except Exception as e:  # noqa: BLE001
+        # sem banco no startup: a primeira requisicao carrega
+        print(f'referencia/CEP: carga adiada ({e})')
+    job_resumos = asyncio.create_task(manter_resumos())
     yield
+    job_resumos.cancel()
+    with suppress(asyncio.CancelledError):
+        await job_resumos
     resource.clear()
+    referencia.limpar()
+    cep_index.limpar()
+    await close_http_client()
+    await async_engine.dispose()
     print('clean up lifespan')
 
 
@@ -56,6 +79,9 @@ app.add_middleware(
     allow_methods=['*'],
     allow_headers=['*'],
 )
+if settings.SQL_TRACE_ENABLED:
+    app.add_middleware(SqlTraceMiddleware, tracer=sql_tracer)
+app.add_middleware(MetricsMiddleware)
 
 
 app.include_router(users.router)
@@ -67,6 +93,8 @@ app.include_router(auth.router)
 app.include_router(todos.router)
 app.include_router(router_negociacao.router)
 app.include_router(router_municipio.router)
+app.include_router(router_pessoa.router)
+app.include_router(diagnostico.router)
 
 
 @app.get('/', status_code=HTTPStatus.OK, response_model=Message)
@@ -76,6 +104,6 @@ def read_root():
 @app.get('/metrics')
 def get_metrics():
     return Response(
-        media_type='text/plain',
-        content=prometheus_client.generate_latest(),
+        media_type=CONTENT_TYPE_LATEST,
+        content=gerar_metricas(),
     )
\ No newline at end of file
@@ -1,11 +1,98 @@
+from time import perf_counter
+
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
+from app.core.metrics import (
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_TIMEOUTS,
+    instrument_pool,
+    instrument_queries,
+)
 from app.core.settings import Settings
+from app.core.sql_trace import SqlTracer
+
+settings = Settings()
+
+
+class _TimedPoolMixin:
+    """Mede quanto tempo cada checkout espera por uma conexao livre."""
+
+    metrics_label = 'sync'
+
+    def connect(self):
+        inicio = perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.labels(self.metrics_label).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.metrics_label).observe(
+                perf_counter() - inicio
+            )
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    metrics_label = 'sync'
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = 'async'
+
 
-engine = create_engine(Settings().DATABASE_URL)
+pool_options = {
+    'pool_size': settings.DB_POOL_SIZE,
+    'max_overflow': settings.DB_MAX_OVERFLOW,
+    'pool_timeout': settings.DB_POOL_TIMEOUT,
+    'pool_recycle': settings.DB_POOL_RECYCLE,
+    'pool_pre_ping': settings.DB_POOL_PRE_PING,
+}
+
+engine = create_engine(
+    settings.DATABASE_URL, poolclass=TimedQueuePool, **pool_options
+)
+
+# mesmo DATABASE_URL (postgresql+psycopg): o SQLAlchemy usa o driver
+# assincrono do psycopg 3 quando o engine e criado via create_async_engine
+async_engine = create_async_engine(
+    settings.DATABASE_URL, poolclass=TimedAsyncQueuePool, **pool_options
+)
+
+instrument_pool('sync', engine)
+instrument_pool('async', async_engine.sync_engine)
+instrument_queries()
+
+sql_tracer = SqlTracer(
+    settings.SQL_SLOW_QUERY_MS,
+    settings.SQL_TRACE_BUFFER,
+    settings.SQL_TRACE_MAX_CONSULTAS,
+)
+if settings.SQL_TRACE_ENABLED:
+    sql_tracer.instrumentar()
 
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+def get_async_session_factory():
+    """Fabrica de sessoes para quem precisa abrir a sua depois da rota.
+
+    Ex.: o corpo de uma StreamingResponse, que so e gerado depois que as
+    sessoes do Depends ja foram fechadas.
+    """
+    return async_sessionmaker(async_engine, expire_on_commit=False)
@@ -0,0 +1,79 @@
+"""Exportacao em streaming (NDJSON, CSV e XLSX) de resultados de consulta.
+
+Os geradores recebem as colunas e um iterador assincrono de lotes de
+linhas (ex.: `AsyncResult.partitions()`), e vao produzindo os bytes a
+medida que os lotes chegam: a memoria fica limitada a um lote.
+"""
+import asyncio
+import csv
+import io
+import json
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from openpyxl import Workbook
+
+FORMATOS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': (
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'xlsx',
+    ),
+}
+CHUNK_XLSX = 64 * 1024
+
+
+def _json_default(valor):
+    # mesmo formato da resposta JSON do FastAPI
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(type(valor).__name__)
+
+
+async def ndjson_stream(colunas, lotes):
+    async for lote in lotes:
+        yield ''.join(
+            json.dumps(dict(zip(colunas, row)), default=_json_default) + '\n'
+            for row in lote
+        ).encode()
+
+
+async def csv_stream(colunas, lotes):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM: o Excel so reconhece UTF-8 com ele
+    buffer.write('\ufeff')
+    writer.writerow(colunas)
+    yield buffer.getvalue().encode()
+    async for lote in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(lote)
+        yield buffer.getvalue().encode()
+
+
+async def xlsx_stream(colunas, lotes):
+    """Planilha em modo write_only: as linhas vao para disco, nao memoria.
+
+    O XLSX e um zip montado no `save`, entao os bytes so saem depois da
+    ultima linha; ate la o consumo de memoria continua constante.
+    """
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet()
+    planilha.append(list(colunas))
+    async for lote in lotes:
+        for row in lote:
+            planilha.append(list(row))
+
+    with tempfile.TemporaryFile() as arquivo:
+        await asyncio.to_thread(workbook.save, arquivo)
+        arquivo.seek(0)
+        while chunk := arquivo.read(CHUNK_XLSX):
+            yield chunk
+
+
+STREAMS = {'ndjson': ndjson_stream, 'csv': csv_stream, 'xlsx': xlsx_stream}
@@ -0,0 +1,223 @@
+import os
+from contextvars import ContextVar
+from dataclasses import dataclass
+from http import HTTPStatus
+from time import perf_counter
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import sql_events
+
+DB_POOL_SIZE = Gauge(
+    'db_pool_size',
+    'Tamanho configurado do pool de conexoes',
+    ['engine'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out',
+    'Conexoes em uso (checkout)',
+    ['engine'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_CHECKED_IN = Gauge(
+    'db_pool_checked_in',
+    'Conexoes ociosas no pool (checkin)',
+    ['engine'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_OVERFLOW = Gauge(
+    'db_pool_overflow',
+    'Conexoes abertas alem de pool_size',
+    ['engine'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Tempo de espera para obter uma conexao do pool',
+    ['engine'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    'db_pool_timeouts_total',
+    'Checkouts que estouraram DB_POOL_TIMEOUT',
+    ['engine'],
+)
+
+PASSWORD_HASH_SECONDS = Histogram(
+    'password_hash_seconds',
+    'Duracao do hash/verificacao Argon2 no executor dedicado',
+    ['operation'],
+    buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PASSWORD_HASH_QUEUE = Gauge(
+    'password_hash_queue_depth',
+    'Operacoes de hash aguardando um worker livre',
+    multiprocess_mode='livesum',
+)
+
+
+def gerar_metricas() -> bytes:
+    """Metricas no formato texto do Prometheus.
+
+    Sob o gunicorn (PROMETHEUS_MULTIPROC_DIR definido) agrega os arquivos
+    de todos os workers; as gauges somam apenas os workers vivos.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def instrument_pool(name: str, engine: Engine):
+    """Atualiza as gauges do pool a cada checkout/checkin do engine."""
+
+    def _update():
+        DB_POOL_CHECKED_IN.labels(name).set(engine.pool.checkedin())
+        DB_POOL_OVERFLOW.labels(name).set(max(engine.pool.overflow(), 0))
+
+    @event.listens_for(engine, 'checkout')
+    def _on_checkout(dbapi_connection, connection_record, proxy):
+        DB_POOL_CHECKED_OUT.labels(name).inc()
+        _update()
+
+    @event.listens_for(engine, 'checkin')
+    def _on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.labels(name).dec()
+        _update()
+
+    DB_POOL_SIZE.labels(name).set(engine.pool.size())
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Duracao das requisicoes HTTP (ate o fim do corpo da resposta)',
+    ['method', 'route'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'Requisicoes HTTP em andamento',
+    ['method'],
+    multiprocess_mode='livesum',
+)
+HTTP_REQUESTS = Counter(
+    'http_requests_total',
+    'Requisicoes HTTP por status',
+    ['method', 'route', 'status'],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    'http_request_db_queries',
+    'Consultas ao banco executadas por requisicao',
+    ['method', 'route'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    'http_request_db_seconds',
+    'Tempo gasto em consultas ao banco por requisicao',
+    ['method', 'route'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10),
+)
+
+# rota sem correspondencia: um rotulo so, para nao explodir a cardinalidade
+ROTA_DESCONHECIDA = '<desconhecida>'
+NAO_INSTRUMENTADAS = frozenset({'/metrics'})
+
+
+@dataclass
+class ConsultasRequisicao:
+    quantidade: int = 0
+    segundos: float = 0.0
+
+
+# contextvar com objeto mutavel: as threads do run_in_threadpool e os
+# greenlets do AsyncSession recebem uma copia do contexto, mas apontam
+# para o mesmo acumulador da requisicao
+consultas_da_requisicao: ContextVar[ConsultasRequisicao | None] = ContextVar(
+    'consultas_da_requisicao', default=None
+)
+
+
+def _registrar_consulta(statement, parameters, segundos):
+    acumulador = consultas_da_requisicao.get()
+    if acumulador is not None:
+        acumulador.quantidade += 1
+        acumulador.segundos += segundos
+
+
+def instrument_queries():
+    """Conta consultas e tempo de banco de todos os engines por requisicao."""
+    sql_events.assinar(_registrar_consulta)
+
+
+def _rota(scope) -> str:
+    # lido depois da chamada: o Router grava a rota encontrada no scope
+    # (inclusive a parcial, do 405); as rotas do Starlette puro (/docs,
+    # /openapi.json) so gravam o endpoint, e sem parametros o caminho e
+    # o proprio template
+    route = scope.get('route')
+    if route is not None:
+        return route.path
+    if 'endpoint' in scope and not scope.get('path_params'):
+        return scope['path']
+    return ROTA_DESCONHECIDA
+
+
+class MetricsMiddleware:
+    """Latencia, requisicoes em andamento, status e consultas por rota.
+
+    O rotulo `route` e o template da rota (`/pessoa/cep/{cep}`), nao o
+    caminho da requisicao. So e conhecido depois do roteamento, entao as
+    requisicoes em andamento sao contadas apenas por metodo. A duracao
+    inclui o envio do corpo, entao rotas com StreamingResponse medem o
+    streaming inteiro.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] in NAO_INSTRUMENTADAS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status = HTTPStatus.INTERNAL_SERVER_ERROR
+
+        async def send_com_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        acumulador = ConsultasRequisicao()
+        token = consultas_da_requisicao.set(acumulador)
+        em_andamento = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        em_andamento.inc()
+        inicio = perf_counter()
+        try:
+            await self.app(scope, receive, send_com_status)
+        finally:
+            route = _rota(scope)
+            HTTP_REQUEST_DURATION.labels(method, route).observe(
+                perf_counter() - inicio
+            )
+            em_andamento.dec()
+            HTTP_REQUESTS.labels(method, route, int(status)).inc()
+            DB_QUERIES_PER_REQUEST.labels(method, route).observe(
+                acumulador.quantidade
+            )
+            DB_TIME_PER_REQUEST.labels(method, route).observe(
+                acumulador.segundos
+            )
+            consultas_da_requisicao.reset(token)
@@ -0,0 +1,27 @@
+import base64
+import json
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*values) -> str:
+    """Gera o token opaco `after` a partir da chave da ultima linha."""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str, size: int) -> tuple:
+    """Le um token gerado por `encode_cursor` com `size` valores."""
+    try:
+        padding = '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(token + padding))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError(token)
+        if not all(isinstance(value, int) for value in values):
+            raise ValueError(token)
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='Cursor invalido'
+        )
+    return tuple(values)
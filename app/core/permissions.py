@@ -0,0 +1,96 @@
+from threading import Lock
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.settings import Settings
+from app.models.models import Permission, Role, RolePermissions, UserRoles
+
+
+class PermissionResolver:
+    """Resolve os nomes de roles/permissoes de um usuario em uma consulta.
+
+    O resultado fica em cache por user_id junto com a versao vigente.
+    Qualquer commit que altere UserRoles, RolePermissions, Permission ou
+    Role incrementa a versao, invalidando todas as entradas de uma vez.
+
+    A versao so enxerga commits deste processo pelo ORM: alteracoes feitas
+    em outro worker, por SQL direto ou por UPDATE/DELETE em massa nao a
+    incrementam. Por isso as entradas tambem expiram em `ttl` segundos,
+    o mesmo limite do cache de principal.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self._version = 0
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self):
+        with self._lock:
+            self._version += 1
+            self._cache.clear()
+
+    async def resolve(
+        self, session: AsyncSession, user_id: int, fresh: bool = False
+    ):
+        """(versao, roles, permissoes); `fresh` ignora o cache."""
+        cached = None if fresh else self._cache.get(user_id)
+        if cached is not None and cached[0] == self._version:
+            return cached
+
+        version = self._version
+        rows = await session.execute(
+            select(Role.name, Permission.name)
+            .select_from(UserRoles)
+            .join(Role, Role.id == UserRoles.role_id)
+            .outerjoin(RolePermissions, RolePermissions.role_id == Role.id)
+            .outerjoin(
+                Permission, Permission.id == RolePermissions.permission_id
+            )
+            .where(UserRoles.user_id == user_id)
+        )
+        roles, permissions = set(), set()
+        for role_name, permission_name in rows:
+            roles.add(role_name)
+            if permission_name is not None:
+                permissions.add(permission_name)
+
+        entry = (version, frozenset(roles), frozenset(permissions))
+        with self._lock:
+            # so guarda se nada mudou enquanto a consulta rodava
+            if version == self._version:
+                self._cache.set(user_id, entry)
+        return entry
+
+
+settings = Settings()
+permission_resolver = PermissionResolver(
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+
+
+def _mark_permissions_changed(mapper, connection, target):
+    Session.object_session(target).info['permissions_changed'] = True
+
+
+for _model in (UserRoles, RolePermissions, Permission, Role):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _mark_permissions_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_after_commit(session):
+    if session.info.pop('permissions_changed', False):
+        permission_resolver.bump()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('permissions_changed', None)
@@ -0,0 +1,81 @@
+"""Serializacao direta para JSON (orjson) em rotas de leitura.
+
+Para listas grandes, validar cada linha no `response_model` e depois
+serializar domina o tempo da requisicao. Nas rotas em que os dados vem
+direto do banco (confiaveis), `fast_json` projeta as linhas (ORM, Row ou
+dict) nos campos do schema e gera os bytes com orjson, sem revalidar.
+O schema continua no `response_model` da rota para o OpenAPI.
+
+A saida segue a do Pydantic: Decimal vira string, date ISO 8601 e campos
+declarados como float sao convertidos para numero.
+"""
+import types
+import typing
+from decimal import Decimal
+from functools import cache, partial
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+
+def _default(valor):
+    if isinstance(valor, Decimal):
+        return str(valor)
+    raise TypeError(type(valor).__name__)
+
+
+def _sem_optional(anotacao):
+    if typing.get_origin(anotacao) in {typing.Union, types.UnionType}:
+        argumentos = [
+            a for a in typing.get_args(anotacao) if a is not type(None)
+        ]
+        if len(argumentos) == 1:
+            return argumentos[0]
+    return anotacao
+
+
+def _conversor(anotacao):
+    anotacao = _sem_optional(anotacao)
+    origem = typing.get_origin(anotacao)
+
+    if origem in {list, typing.List}:
+        (item,) = typing.get_args(anotacao) or (typing.Any,)
+        converter_item = _conversor(item)
+        if converter_item is None:
+            return None
+        return lambda valores: [converter_item(v) for v in valores]
+    if isinstance(anotacao, type) and issubclass(anotacao, BaseModel):
+        return projetor(anotacao)
+    if anotacao is float:
+        return float
+    return None
+
+
+@cache
+def projetor(schema: type[BaseModel]):
+    """Funcao que projeta um objeto/Row/dict nos campos de `schema`."""
+    campos = [
+        (nome, _conversor(campo.annotation))
+        for nome, campo in schema.model_fields.items()
+    ]
+
+    def projetar(obj):
+        ler = obj.get if isinstance(obj, dict) else partial(getattr, obj)
+        saida = {}
+        for nome, conversor in campos:
+            valor = ler(nome)
+            if conversor is not None and valor is not None:
+                valor = conversor(valor)
+            saida[nome] = valor
+        return saida
+
+    return projetar
+
+
+def fast_json(schema: type[BaseModel], conteudo, status_code: int = 200):
+    return Response(
+        content=orjson.dumps(projetor(schema)(conteudo), default=_default),
+        status_code=status_code,
+        media_type='application/json',
+    )
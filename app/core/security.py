@@ -1,15 +1,23 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
 from http import HTTPStatus
+from time import perf_counter
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
 from pwdlib import PasswordHash
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from zoneinfo import ZoneInfo
 
-from app.core.database import get_session
+from app.core.cache import TTLCache
+from app.core.database import get_async_session
+from app.core.metrics import PASSWORD_HASH_QUEUE, PASSWORD_HASH_SECONDS
+from app.core.permissions import permission_resolver
 from app.core.settings import Settings
 from app.models.models import User
 from app.schemas.schemas import TokenData
@@ -19,6 +27,34 @@ oauth2_schema = OAuth2PasswordBearer(tokenUrl='auth/token')
 settings = Settings()
 
 
+@dataclass(frozen=True)
+class Principal:
+    """Usuario autenticado, como fica guardado no cache de principal."""
+
+    id: int
+    username: str
+    email: str
+    full_name: str
+    is_active: bool
+    is_staff: bool
+    is_superuser: bool
+    roles: frozenset[str] = frozenset()
+    permissions: frozenset[str] = frozenset()
+    permissions_version: int = -1
+
+
+# cache por processo: (username, token) -> Principal
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+
+
+def invalidate_principal(user_id: int):
+    """Descarta os principals em cache de um usuario alterado."""
+    principal_cache.discard_where(lambda principal: principal.id == user_id)
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
@@ -39,12 +75,55 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# executor proprio para o Argon2: uma rajada de logins fica limitada a
+# PASSWORD_HASH_WORKERS threads e nao ocupa o threadpool das rotas sync
+hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix='password-hash',
+)
+
+
+async def _run_in_hash_executor(operation: str, func, *args):
+    iniciado = False
+
+    def _job():
+        nonlocal iniciado
+        iniciado = True
+        PASSWORD_HASH_QUEUE.dec()
+        inicio = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            PASSWORD_HASH_SECONDS.labels(operation).observe(
+                perf_counter() - inicio
+            )
+
+    PASSWORD_HASH_QUEUE.inc()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(hash_executor, _job)
+    finally:
+        # cancelado antes de chegar a um worker
+        if not iniciado:
+            PASSWORD_HASH_QUEUE.dec()
+
+
+async def get_password_hash_async(password: str):
+    return await _run_in_hash_executor('hash', get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await _run_in_hash_executor(
+        'verify', verify_password, plain_password, hashed_password
+    )
+
+
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
 
 async def get_current_user(
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     token: str = Depends(oauth2_schema),
 ):
     credentials_exception = HTTPException(
@@ -66,21 +145,61 @@ async def get_current_user(
     except ExpiredSignatureError:
         raise credentials_exception
 
-    user = session.scalar(
-        select(User).where(User.username == token_data.username)
-    )
+    cache_key = (token_data.username, token)
+    principal = principal_cache.get(cache_key)
 
-    if user is None:
-        raise credentials_exception
-    
-    if not user.is_active:
+    if principal is None:
+        principal = await _load_principal(session, token_data.username)
+        if principal is None:
+            raise credentials_exception
+        principal_cache.set(cache_key, principal)
+    elif principal.permissions_version != permission_resolver.version:
+        # roles/permissoes mudaram desde o cache: so reconsulta os nomes
+        version, roles, permissions = await permission_resolver.resolve(
+            session, principal.id
+        )
+        principal = replace(
+            principal,
+            roles=roles,
+            permissions=permissions,
+            permissions_version=version,
+        )
+        principal_cache.set(cache_key, principal)
+
+    if not principal.is_active:
         raise HTTPException(status_code=400, detail='Inactive user')
 
-    return user
+    return principal
+
+
+async def _load_principal(session: AsyncSession, username: str):
+    user = await session.scalar(select(User).where(User.username == username))
+
+    if user is None:
+        return None
+
+    # principal novo consulta as permissoes no banco: somado ao cache do
+    # resolver, o atraso de uma revogacao passaria de um TTL
+    version, roles, permissions = await permission_resolver.resolve(
+        session, user.id, fresh=True
+    )
+
+    return Principal(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        full_name=user.full_name,
+        is_active=user.is_active,
+        is_staff=user.is_staff,
+        is_superuser=user.is_superuser,
+        roles=roles,
+        permissions=permissions,
+        permissions_version=version,
+    )
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail='Inactive user')
@@ -103,37 +222,41 @@ def verify_token(token: str):
 
 
 def verify_user_with_roles_and_permissions(
-    current_user: User, roles: list[str] = [], permissions: list[str] = []
+    current_user: Principal,
+    roles: list[str] = [],
+    permissions: list[str] = [],
 ):
     # Se o usuário for um superusuário, ele tem todas as permissões
     if current_user.is_superuser:
         return current_user
     
+    # 'is_superuser' marca rotas so de administrador: quem chegou aqui nao e
     if 'is_superuser' in permissions:
-        return current_user
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions",
+        )
     
     # Verifica se o usuário tem pelo menos um dos papéis (roles) exigidos
-    if roles and not any(role.role.name in roles for role in current_user.roles):
+    if roles and current_user.roles.isdisjoint(roles):
         raise HTTPException(
             status_code=403,
             detail="Not enough role permissions",
         )
     
     # Verifica se o usuário tem todas as permissões exigidas
-    if permissions:
-        user_permissions = {
-            perm.name
-            for role in current_user.roles
-            for perm in role.role.permissions
-        }
-        if not all(perm in user_permissions for perm in permissions):
-            raise HTTPException(
-                status_code=403,
-                detail="Not enough permissions",
-            )
-    
-    raise HTTPException(
-        status_code=403,
-        detail="Not enough permissions",
-    )
+    if permissions and not current_user.permissions.issuperset(permissions):
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions",
+        )
+
+    # sem nenhuma exigencia, so o superusuario passa
+    if not roles and not permissions:
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions",
+        )
+
+    return current_user
 
@@ -10,3 +10,60 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+
+    # pool de conexoes (vale para o engine sync e para o async)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # cache do usuario autenticado em get_current_user (por processo)
+    PRINCIPAL_CACHE_TTL: int = 60
+    PRINCIPAL_CACHE_MAXSIZE: int = 1024
+
+    # threads dedicadas ao Argon2 (argon2-cffi libera o GIL)
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # sincronizacao de UFs/municipios (/pessoa/atualizar)
+    IBGE_API_URL: str = 'https://servicodados.ibge.gov.br/api/v1/localidades'
+    IBGE_HTTP_TIMEOUT: float = 30
+    IBGE_MAX_CONCURRENCY: int = 10
+    # job em execucao ha mais tempo que isso e dado como interrompido
+    IBGE_SYNC_TIMEOUT: int = 600
+    # resumos de negociacao vencidos com a virada do dia (juridico/resumo)
+    RESUMO_RECALCULO_SEGUNDOS: float = 600
+
+    # cada worker confere se houve sincronizacao nova (app.pessoa.referencia)
+    REFERENCIA_VERIFICAR_SEGUNDOS: float = 30
+
+    # consultas de CEP (ViaCEP) e CNPJ (ReceitaWS); TTLs em segundos
+    CEP_API_URL: str = 'https://viacep.com.br/ws'
+    CNPJ_API_URL: str = 'https://receitaws.com.br/v1'
+    ENRIQUECIMENTO_HTTP_TIMEOUT: float = 10
+    ENRIQUECIMENTO_CACHE_MAXSIZE: int = 4096
+    CEP_CACHE_TTL: int = 30 * 24 * 3600
+    CNPJ_CACHE_TTL: int = 7 * 24 * 3600
+    CEP_RATE_PER_MINUTE: int = 300
+    CNPJ_RATE_PER_MINUTE: int = 3
+    RATE_LIMIT_MAX_WAIT: float = 5
+
+    # servidor de producao (gunicorn.conf.py); WEB_WORKERS=0 usa um
+    # worker por CPU
+    WEB_HOST: str = '0.0.0.0'
+    WEB_PORT: int = 8002
+    WEB_WORKERS: int = 0
+    WEB_TIMEOUT: int = 120
+    WEB_GRACEFUL_TIMEOUT: int = 30
+    WEB_KEEPALIVE: int = 5
+    WEB_MAX_REQUESTS: int = 0
+    WEB_MAX_REQUESTS_JITTER: int = 0
+
+    # diretorio compartilhado pelas metricas dos workers
+    PROMETHEUS_MULTIPROC_DIR: str = '/tmp/prometheus_multiproc'
+
+    # rastreamento de SQL por requisicao (app/core/sql_trace.py)
+    SQL_TRACE_ENABLED: bool = False
+    SQL_SLOW_QUERY_MS: float = 200
+    SQL_TRACE_BUFFER: int = 50
+    SQL_TRACE_MAX_CONSULTAS: int = 200
@@ -0,0 +1,66 @@
+"""Um unico par de listeners de cursor cronometra todas as consultas.
+
+As metricas por requisicao (app.core.metrics) e o rastreamento de SQL
+(app.core.sql_trace) assinam este hook em vez de registrar listeners
+proprios: cada consulta e cronometrada uma vez, com uma pilha so em
+`conn.info`.
+
+Os eventos sao registrados na classe Engine, entao valem para o engine
+sync, para o `sync_engine` do async e para os criados nos testes.
+"""
+from collections.abc import Callable
+from time import perf_counter
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# callback(statement, parameters, segundos), chamado no fim de cada
+# consulta, inclusive das que falharam
+Assinante = Callable[[str, Any, float], None]
+
+assinantes: list[Assinante] = []
+
+
+def _notificar(statement, parameters, segundos):
+    for assinante in assinantes:
+        assinante(statement, parameters, segundos)
+
+
+def _antes_da_consulta(conn, *_):
+    conn.info.setdefault('inicio_consulta', []).append(perf_counter())
+
+
+def _depois_da_consulta(conn, cursor, statement, parameters, *_):
+    inicios = conn.info.get('inicio_consulta')
+    if inicios:
+        _notificar(statement, parameters, perf_counter() - inicios.pop())
+
+
+def _consulta_com_erro(context):
+    # consulta que falhou nao passa pelo after_cursor_execute
+    if context.connection is None:
+        return
+    inicios = context.connection.info.get('inicio_consulta')
+    if inicios:
+        _notificar(
+            context.statement,
+            context.parameters,
+            perf_counter() - inicios.pop(),
+        )
+
+
+def assinar(assinante: Assinante):
+    """Registra o assinante e, na primeira chamada, os listeners."""
+    if assinante not in assinantes:
+        assinantes.append(assinante)
+    if event.contains(Engine, 'before_cursor_execute', _antes_da_consulta):
+        return
+    event.listen(Engine, 'before_cursor_execute', _antes_da_consulta)
+    event.listen(Engine, 'after_cursor_execute', _depois_da_consulta)
+    event.listen(Engine, 'handle_error', _consulta_com_erro)
+
+
+def cancelar(assinante: Assinante):
+    if assinante in assinantes:
+        assinantes.remove(assinante)
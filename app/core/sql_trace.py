@@ -0,0 +1,135 @@
+"""Rastreamento opcional do SQL executado por requisicao.
+
+Ligado por SQL_TRACE_ENABLED. Desligado, o tracer nao assina o hook de
+consultas (app.core.sql_events) e o middleware nao entra na pilha.
+
+Ligado, cada consulta da requisicao e guardada com o SQL (com
+placeholders), uma impressao digital dos parametros (hash, para nao
+guardar CPF/CNPJ e afins) e a duracao. Consultas acima de
+SQL_SLOW_QUERY_MS vao para o log `app.sql`, e as requisicoes que tiveram
+alguma delas ficam entre as ultimas SQL_TRACE_BUFFER em memoria, servidas
+em /admin/sql-traces. O buffer e por processo (worker).
+"""
+import logging
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from hashlib import blake2b
+from time import perf_counter
+
+from app.core import sql_events
+
+logger = logging.getLogger('app.sql')
+
+# SQL muito longo (IN com milhares de itens) e truncado no trace
+TAMANHO_MAXIMO_SQL = 2000
+
+
+@dataclass
+class ConsultaTrace:
+    sql: str
+    parametros: str
+    duracao_ms: float
+
+
+@dataclass
+class RequisicaoTrace:
+    metodo: str
+    caminho: str
+    inicio: datetime = field(default_factory=datetime.now)
+    duracao_ms: float = 0.0
+    consultas: list[ConsultaTrace] = field(default_factory=list)
+    omitidas: int = 0
+    lenta: bool = False
+
+    @property
+    def total_consultas(self) -> int:
+        return len(self.consultas) + self.omitidas
+
+    @property
+    def duracao_sql_ms(self) -> float:
+        return sum(c.duracao_ms for c in self.consultas)
+
+
+def fingerprint(parametros) -> str:
+    """Hash curto dos parametros: iguais entre chamadas, sem os valores."""
+    if not parametros:
+        return ''
+    return blake2b(repr(parametros).encode(), digest_size=8).hexdigest()
+
+
+class SqlTracer:
+    def __init__(
+        self,
+        limiar_ms: float,
+        tamanho_buffer: int = 50,
+        max_consultas: int = 200,
+    ):
+        self.limiar_ms = limiar_ms
+        self.max_consultas = max_consultas
+        self.traces: deque[RequisicaoTrace] = deque(maxlen=tamanho_buffer)
+        self.atual: ContextVar[RequisicaoTrace | None] = ContextVar(
+            'sql_trace_atual', default=None
+        )
+
+    def instrumentar(self):
+        sql_events.assinar(self._registrar)
+
+    def desinstrumentar(self):
+        sql_events.cancelar(self._registrar)
+
+    def _registrar(self, statement, parameters, segundos):
+        duracao_ms = segundos * 1000
+        trace = self.atual.get()
+        lenta = duracao_ms >= self.limiar_ms
+
+        if lenta:
+            logger.warning(
+                'consulta lenta (%.1f ms)%s: %s',
+                duracao_ms,
+                f' em {trace.metodo} {trace.caminho}' if trace else '',
+                statement,
+            )
+        if trace is None:
+            return
+        trace.lenta = trace.lenta or lenta
+        if len(trace.consultas) >= self.max_consultas:
+            trace.omitidas += 1
+            return
+        trace.consultas.append(
+            ConsultaTrace(
+                statement[:TAMANHO_MAXIMO_SQL],
+                fingerprint(parameters),
+                round(duracao_ms, 3),
+            )
+        )
+
+    def ultimos(self, quantidade: int) -> list[RequisicaoTrace]:
+        """Traces lentos mais recentes primeiro."""
+        return list(reversed(self.traces))[:quantidade]
+
+    def limpar(self):
+        self.traces.clear()
+
+
+class SqlTraceMiddleware:
+    def __init__(self, app, tracer: SqlTracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequisicaoTrace(scope['method'], scope['path'])
+        token = self.tracer.atual.set(trace)
+        inicio = perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.tracer.atual.reset(token)
+            trace.duracao_ms = round((perf_counter() - inicio) * 1000, 3)
+            if trace.lenta:
+                self.tracer.traces.append(trace)
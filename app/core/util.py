@@ -1,4 +1,6 @@
+import re
 from datetime import datetime
+
 import pytz
 
 def get_data_now_for_time_zone():
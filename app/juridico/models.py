@@ -3,17 +3,21 @@ from decimal import Decimal
 
 from dateutil.relativedelta import relativedelta
 from sqlalchemy import (
+    DDL,
     DECIMAL,
     BigInteger,
     Date,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
+    func,
+    insert,
+    text,
 )
 from sqlalchemy.orm import (
     Mapped,
-    Session,
     mapped_column,
     registry,
     relationship,
@@ -23,6 +27,20 @@ from app.models.models import Base, event
 
 table_registry = registry()
 
+# unaccent() e STABLE (o dicionario pode mudar) e nao serve em indice; o
+# wrapper fixa o dicionario e e IMMUTABLE
+F_UNACCENT = """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+"""
+COLUNAS_BUSCA = ('processo', 'executado', 'contrato')
+
+
+def sem_acento(expressao):
+    """Expressao sem acentos, como nos indices trigram da busca."""
+    return func.f_unaccent(expressao)
+
 
 @table_registry.mapped_as_dataclass
 class NegociacaoCredito(Base):
@@ -68,6 +86,8 @@ class NegociacaoCredito(Base):
         valor_emprestimo = self.val_neg
         taxa_juros = self.taxa_mes / 100
         numero_parcelas = self.qtd
+        if not taxa_juros:
+            return round(valor_emprestimo / numero_parcelas, 2)
         valor_parcela = (
             valor_emprestimo
             * (taxa_juros * (1 + taxa_juros) ** numero_parcelas)
@@ -80,78 +100,110 @@ class NegociacaoCredito(Base):
         return round(valor_parcela, 2)
 
 
+def _datas_mensais(primeira_data, quantidade: int):
+    data_temp = primeira_data + timedelta(days=1)
+    for i in range(1, quantidade + 1):
+        if i != 1:
+            # calcular_data_final
+            data_temp += relativedelta(months=1)
+        yield i, data_temp
+
+
+def gerar_parcelas(negociacao: 'NegociacaoCredito') -> list[dict]:
+    """Cronograma completo da negociacao como linhas prontas para insert.
+
+    Parcelas mensais (type=1) quando is_cal_parc_mensal e parcelas de
+    entrada (type=2) quando is_cal_parc_entrada. Sem negociacao_id, que so
+    existe depois do INSERT da negociacao.
+    """
+    linhas = []
+
+    def _linha(tipo, numero, data, valor):
+        return {
+            'type': tipo,
+            'numero_parcela': numero,
+            'data': data,
+            'val_parcela': valor,
+            'is_pg': False,
+            'is_val_juros': False,
+            'val_pago': None,
+            'data_pgto': None,
+            'obs_val_pago': '',
+        }
+
+    if negociacao.is_cal_parc_mensal and (negociacao.qtd or 0) > 0:
+        linhas.extend(
+            _linha(1, i, data, negociacao.val_parc)
+            for i, data in _datas_mensais(
+                negociacao.data_pri_parc, negociacao.qtd
+            )
+        )
+
+    if (
+        negociacao.is_cal_parc_entrada
+        and (negociacao.qtd_parc_ent or 0) > 0
+        and negociacao.val_entrada
+        and negociacao.data_pri_parc_entr
+    ):
+        valor_parcela = negociacao.val_entrada / negociacao.qtd_parc_ent
+        linhas.extend(
+            _linha(2, i, data, valor_parcela)
+            for i, data in _datas_mensais(
+                negociacao.data_pri_parc_entr, negociacao.qtd_parc_ent
+            )
+        )
+
+    return linhas
+
+
+# indices trigram (pg_trgm) sobre f_unaccent(coluna) para o filtro
+# searchTerm e a busca: sem diferenca de maiusculas nem de acentos
+for _coluna in COLUNAS_BUSCA:
+    Index(
+        f'ix_negociacao_credito_{_coluna}_trgm',
+        sem_acento(getattr(NegociacaoCredito, _coluna)).label(_coluna),
+        postgresql_using='gin',
+        postgresql_ops={_coluna: 'gin_trgm_ops'},
+    )
+
+# create_all (testes, benchmark) precisa das extensoes e da funcao antes
+# dos indices; em producao a migration a1f4c7e92d05 cria os mesmos
+for _ddl in (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    F_UNACCENT,
+):
+    event.listen(
+        NegociacaoCredito.__table__,
+        'before_create',
+        DDL(_ddl).execute_if(dialect='postgresql'),
+    )
+
+
+@event.listens_for(NegociacaoCredito, 'before_insert')
+def before_insert_negociacao_credito(mapper, connection, target):
+    # val_parc e as flags precisam mudar antes do INSERT para serem gravados
+    if target.is_cal_parc_mensal and (target.qtd or 0) > 0:
+        target.val_parc = target._gerarParcelasMensal()
+
+    target._parcelas_pendentes = gerar_parcelas(target)
+    target.is_cal_parc_mensal = False
+    target.is_cal_parc_entrada = False
+
+
 @event.listens_for(NegociacaoCredito, 'after_insert')
 def after_insert_negociacao_credito(mapper, connection, target):
-    # Abre uma nova sessão para realizar operações subsequentes
-    session = Session(bind=connection)
-
-    try:
-        if target.is_cal_parc_mensal:
-            target.val_parc = target._gerarParcelasMensal()
-            target.is_cal_parc_mensal = False
-
-            # Salvar parcelas qtd data_pri_parc
-            if target.qtd > 0:
-                data_temp = target.data_pri_parc + timedelta(days=1)
-                for i in range(1, target.qtd + 1):
-                    if i != 1:
-                        # calcular_data_final
-                        data_temp += relativedelta(months=1)
-                    try:
-                        parcela = ParcelamentoNegociacao(
-                            negociacao_id=target.id,  # type: ignore
-                            type=1,
-                            numero_parcela=i,
-                            data=data_temp,
-                            val_parcela=target.val_parc,
-                            is_pg=False,
-                            is_val_juros=False,
-                            val_pago=None,
-                            data_pgto=None,
-                            obs_val_pago='',
-                        )
-                        session.add(parcela)
-                    except Exception as e:
-                        print(f'Erro ao criar parcela: {e}')
-            session.commit()  # Salva as parcelas geradas
-            # session.refresh(target)  # Atualiza o objeto `target` na sessão
-
-        if target.is_cal_parc_entrada:
-            target.is_cal_parc_entrada = False
-
-            if target.qtd_parc_ent > 0:
-                valor_parcela = target.val_entrada / target.qtd_parc_ent
-                data_temp = target.data_pri_parc_entr + timedelta(days=1)
-                for i in range(1, target.qtd_parc_ent + 1):
-                    if i != 1:
-                        # calcular_data_final
-                        data_temp += relativedelta(months=1)
-                    try:
-                        parcela = ParcelamentoNegociacao(
-                            negociacao_id=target.id,  # type: ignore
-                            type=2,
-                            numero_parcela=i,
-                            data=data_temp,
-                            val_parcela=valor_parcela,
-                            is_pg=False,
-                            is_val_juros=False,
-                            val_pago=None,
-                            data_pgto=None,
-                            obs_val_pago='',
-                        )
-                        session.add(parcela)
-                    except Exception as e:
-                        print(f'Erro ao criar parcela de entrada: {e}')
-            session.commit()  # Salva as parcelas de entrada geradas
-            # session.refresh(target)  # Atualiza o objeto `target` na sessão
-
-        session.commit()  # Salva todas as alterações finais no objeto `target`
-
-    except Exception as e:
-        session.rollback()
-        print(f'Erro ao executar tarefa pós-inserção: {e}')
-    finally:
-        session.close()
+    # um unico INSERT multi-VALUES na mesma transacao da negociacao:
+    # se falhar, a negociacao tambem nao e gravada
+    parcelas = target.__dict__.pop('_parcelas_pendentes', None)
+    if not parcelas:
+        return
+
+    connection.execute(
+        insert(ParcelamentoNegociacao).values([
+            {**parcela, 'negociacao_id': target.id} for parcela in parcelas
+        ])
+    )
 
 
 @table_registry.mapped_as_dataclass
@@ -165,6 +217,31 @@ class ParcelamentoNegociacao(Base):
     #        name='unique_numero_type_negociacao',
     #    ),
     #)
+    __table_args__ = (
+        # parcelas de uma negociacao: filtro (negociacao_id, type) e
+        # ordem/keyset por (numero_parcela, id)
+        Index(
+            'ix_parcelamento_negociacao_negociacao_type_numero',
+            'negociacao_id',
+            'type',
+            'numero_parcela',
+            'id',
+        ),
+        # relatorios de vencimento: so as parcelas em aberto, por data
+        Index(
+            'ix_parcelamento_negociacao_aberta_data',
+            'data',
+            'id',
+            postgresql_where=text('data_pgto IS NULL'),
+        ),
+        # relatorio por periodo (tipo 2): data OU data_pgto no intervalo
+        Index('ix_parcelamento_negociacao_data', 'data'),
+        Index(
+            'ix_parcelamento_negociacao_data_pgto',
+            'data_pgto',
+            postgresql_where=text('data_pgto IS NOT NULL'),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
 
@@ -190,3 +267,41 @@ class ParcelamentoNegociacao(Base):
     def __repr__(self):
         return f'<ParcelamentoNegociacao(numero_parcela={self.numero_parcela},'
         +'data={self.data}, type={self.type})>'
+
+
+@table_registry.mapped_as_dataclass
+class NegociacaoResumo(Base):
+    """Totais das parcelas de uma negociacao por tipo (ver resumo.py).
+
+    Mantido a cada commit que cria, altera ou apaga parcelas. As vencidas
+    dependem do dia: `proximo_vencimento` e a data da proxima parcela em
+    aberto ainda nao vencida quando a linha foi calculada.
+    """
+    __tablename__ = 'negociacao_resumo'
+
+    negociacao_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('negociacao_credito.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    type: Mapped[int] = mapped_column(Integer, primary_key=True)
+    qtd_pagas: Mapped[int] = mapped_column(Integer, default=0)
+    val_pago: Mapped[Decimal] = mapped_column(DECIMAL(12, 2), default=0)
+    qtd_abertas: Mapped[int] = mapped_column(Integer, default=0)
+    val_aberto: Mapped[Decimal] = mapped_column(DECIMAL(12, 2), default=0)
+    qtd_vencidas: Mapped[int] = mapped_column(Integer, default=0)
+    val_vencido: Mapped[Decimal] = mapped_column(DECIMAL(12, 2), default=0)
+    proximo_vencimento: Mapped[Date] = mapped_column(
+        Date, nullable=True, default=None
+    )
+    calculado_em: Mapped[Date] = mapped_column(
+        Date, nullable=True, default=None
+    )
+
+    @property
+    def qtd_a_vencer(self):
+        return self.qtd_abertas - self.qtd_vencidas
+
+    @property
+    def val_a_vencer(self):
+        return self.val_aberto - self.val_vencido
@@ -61,9 +61,35 @@ class NegociacaoOutSchema(NegociacaoInSchema):
     id: int
 
 
+class ResumoParcelasSchema(BaseModel):
+    type: int
+    qtd_pagas: int
+    val_pago: Decimal
+    qtd_abertas: int
+    val_aberto: Decimal
+    qtd_vencidas: int
+    val_vencido: Decimal
+    qtd_a_vencer: int
+    val_a_vencer: Decimal
+    proximo_vencimento: date | None = None
+
+
+class NegociacaoComResumoSchema(NegociacaoOutSchema):
+    resumo: list[ResumoParcelasSchema] = []
+
+
 class NegociacaoListSchema(BaseModel):
-    rows: list[NegociacaoOutSchema]
-    total_records: int
+    rows: list[NegociacaoComResumoSchema]
+    total_records: int | None = None
+    next_cursor: str | None = None
+
+
+class NegociacaoBuscaOutSchema(NegociacaoOutSchema):
+    rank: float
+
+
+class NegociacaoBuscaSchema(BaseModel):
+    rows: list[NegociacaoBuscaOutSchema]
 
 
 class ParcelamentoInSchema(BaseModel):
@@ -98,7 +124,8 @@ class ParcelamentoOurSchema(ParcelamentoInSchema):
 
 class ParcelamentoListSchema(BaseModel):
     rows: list[ParcelamentoOurSchema]
-    total_records: int
+    total_records: int | None = None
+    next_cursor: str | None = None
 
 
 class ParcelaResponse(BaseModel):
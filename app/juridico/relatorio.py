@@ -0,0 +1,171 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import and_, asc, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.juridico.models import NegociacaoCredito, ParcelamentoNegociacao
+
+
+def _filtros_em_aberto(
+    data_apos: Optional[date] = None, data_antes: Optional[date] = None
+):
+    filtros = [
+        ParcelamentoNegociacao.data_pgto.is_(None),
+        NegociacaoCredito.is_liquidado.is_(False),
+    ]
+    if data_apos is not None:
+        filtros.append(ParcelamentoNegociacao.data > data_apos)
+    if data_antes is not None:
+        filtros.append(ParcelamentoNegociacao.data < data_antes)
+    return filtros
+
+
+def consulta_parcelas_em_aberto(
+    data_apos: Optional[date] = None, data_antes: Optional[date] = None
+):
+    """Parcelas em aberto ordenadas por (data, id), com totais de janela.
+
+    Atendida pelo indice parcial ix_parcelamento_negociacao_aberta_data.
+    """
+    return (
+        select(
+            ParcelamentoNegociacao.id,
+            NegociacaoCredito.processo.label('processo'),
+            NegociacaoCredito.executado,
+            ParcelamentoNegociacao.type,
+            ParcelamentoNegociacao.data,
+            ParcelamentoNegociacao.val_parcela,
+            ParcelamentoNegociacao.val_pago,
+            ParcelamentoNegociacao.data_pgto,
+            ParcelamentoNegociacao.is_val_juros.label('juros'),
+            func.count().over().label('total_records'),
+            func.sum(ParcelamentoNegociacao.val_parcela)
+            .over()
+            .label('total_val_parcela'),
+        )
+        .join(ParcelamentoNegociacao.negociacao)
+        .where(*_filtros_em_aberto(data_apos, data_antes))
+        .order_by(
+            asc(ParcelamentoNegociacao.data), asc(ParcelamentoNegociacao.id)
+        )
+    )
+
+
+async def parcelas_em_aberto(  # noqa: PLR0913
+    session: AsyncSession,
+    *,
+    data_apos: Optional[date] = None,
+    data_antes: Optional[date] = None,
+    page: int = 1,
+    page_size: int = 10,
+):
+    """Relatorio de parcelas nao pagas de negociacoes nao liquidadas.
+
+    Base dos relatorios de vencimento: a pagina, o total de linhas e a
+    soma de val_parcela vem em uma unica consulta (funcoes de janela
+    calculadas antes do LIMIT/OFFSET).
+    """
+    skip = (page - 1) * page_size
+    filtros = _filtros_em_aberto(data_apos, data_antes)
+
+    query = (
+        consulta_parcelas_em_aberto(data_apos, data_antes)
+        .offset(skip)
+        .limit(page_size)
+    )
+
+    rows = (await session.execute(query)).all()
+
+    if rows:
+        total_records = rows[0].total_records
+        total_val_parcela = rows[0].total_val_parcela
+    elif skip:
+        # pagina alem do fim: as janelas nao tem linha onde aparecer
+        total_records, total_val_parcela = (
+            await session.execute(
+                select(
+                    func.count(),
+                    func.sum(ParcelamentoNegociacao.val_parcela),
+                )
+                .select_from(ParcelamentoNegociacao)
+                .join(ParcelamentoNegociacao.negociacao)
+                .where(*filtros)
+            )
+        ).one()
+    else:
+        total_records, total_val_parcela = 0, None
+
+    return {
+        'rows': rows,
+        'total_records': total_records,
+        'total_val_parcela': total_val_parcela or 0,
+    }
+
+
+def consulta_relatorio(tipo: int, data_inicial: date, data_final: date):
+    """Consulta do /negociacao/relatorio/ (None para tipo desconhecido)."""
+    if tipo == 1:
+        # Tipo 1: Negociações de Crédito
+        return (
+            select(
+                NegociacaoCredito.id,
+                NegociacaoCredito.processo,
+                NegociacaoCredito.executado,
+                NegociacaoCredito.contrato,
+                NegociacaoCredito.val_devido,
+                NegociacaoCredito.val_neg,
+                NegociacaoCredito.taxa_mes,
+                NegociacaoCredito.qtd,
+                NegociacaoCredito.val_parc,
+            )
+            .filter(
+                and_(
+                    NegociacaoCredito.data_pri_parc >= data_inicial,
+                    NegociacaoCredito.data_pri_parc <= data_final,
+                )
+            )
+            .order_by(NegociacaoCredito.executado)
+        )
+
+    if tipo == 2:  # noqa: PLR2004
+        # Tipo 2: Parcelas de Negociação
+        return (
+            select(
+                ParcelamentoNegociacao.id,
+                ParcelamentoNegociacao.numero_parcela,
+                NegociacaoCredito.processo,
+                NegociacaoCredito.executado,
+                ParcelamentoNegociacao.type,
+                ParcelamentoNegociacao.data,
+                ParcelamentoNegociacao.val_parcela,
+                ParcelamentoNegociacao.val_pago,
+                ParcelamentoNegociacao.data_pgto,
+                ParcelamentoNegociacao.is_val_juros,
+            )
+            .join(
+                NegociacaoCredito,
+                (ParcelamentoNegociacao.negociacao_id == NegociacaoCredito.id),
+            )
+            .filter(
+                or_(
+                    and_(
+                        ParcelamentoNegociacao.data >= data_inicial,
+                        ParcelamentoNegociacao.data <= data_final,
+                    ),
+                    and_(
+                        ParcelamentoNegociacao.data_pgto >= data_inicial,
+                        ParcelamentoNegociacao.data_pgto <= data_final,
+                    ),
+                )
+            )
+            .order_by(
+                NegociacaoCredito.executado,
+                ParcelamentoNegociacao.numero_parcela,
+                ParcelamentoNegociacao.type,
+                ParcelamentoNegociacao.data,
+                ParcelamentoNegociacao.data_pgto,
+            )
+        )
+
+    return None
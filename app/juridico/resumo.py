@@ -0,0 +1,248 @@
+"""Manutencao da tabela negociacao_resumo.
+
+Criar, alterar ou apagar parcelas marca a negociacao na sessao; antes do
+commit as linhas de resumo dessas negociacoes sao recalculadas com um
+unico INSERT ... SELECT ... GROUP BY ... ON CONFLICT DO UPDATE, na mesma
+transacao, e apagadas as de tipos que ficaram sem parcelas. O upsert
+deixa duas transacoes recalcularem a mesma negociacao ao mesmo tempo
+(ex.: dois GETs depois da virada do dia) sem violar a chave primaria.
+
+Parcelas em aberto passam a vencidas so com a virada do dia. Uma linha
+fica desatualizada quando `proximo_vencimento` ja passou. O job
+`manter_resumos` (iniciado no lifespan) regrava essas linhas a cada
+RESUMO_RECALCULO_SEGUNDOS; ate la `carregar_resumos` calcula os totais
+delas na propria leitura, sem gravar nada.
+"""
+import asyncio
+import logging
+from datetime import date
+from itertools import chain
+
+from sqlalchemy import (
+    and_,
+    delete,
+    event,
+    exists,
+    func,
+    inspect,
+    literal,
+    or_,
+    select,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+from app.core.settings import Settings
+from app.juridico.models import (
+    NegociacaoCredito,
+    NegociacaoResumo,
+    ParcelamentoNegociacao,
+)
+
+settings = Settings()
+logger = logging.getLogger('app.juridico')
+
+PENDENTES = 'resumo_pendente'
+# pg_try_advisory_xact_lock: uma rodada do job por vez entre os workers
+LOCK_RECALCULO = 0x7E5D0
+COLUNAS = (
+    'negociacao_id',
+    'type',
+    'qtd_pagas',
+    'val_pago',
+    'qtd_abertas',
+    'val_aberto',
+    'qtd_vencidas',
+    'val_vencido',
+    'proximo_vencimento',
+    'calculado_em',
+)
+
+
+def _consulta_totais(ids, hoje: date):
+    parcela = ParcelamentoNegociacao
+    paga = parcela.data_pgto.is_not(None)
+    aberta = parcela.data_pgto.is_(None)
+    vencida = and_(aberta, parcela.data < hoje)
+
+    def _soma(valor, filtro):
+        return func.coalesce(func.sum(valor).filter(filtro), 0)
+
+    query = select(
+        parcela.negociacao_id,
+        parcela.type,
+        func.count().filter(paga),
+        _soma(func.coalesce(parcela.val_pago, parcela.val_parcela), paga),
+        func.count().filter(aberta),
+        _soma(parcela.val_parcela, aberta),
+        func.count().filter(vencida),
+        _soma(parcela.val_parcela, vencida),
+        func.min(parcela.data).filter(and_(aberta, parcela.data >= hoje)),
+        literal(hoje),
+    ).group_by(parcela.negociacao_id, parcela.type)
+
+    if ids is not None:
+        query = query.where(parcela.negociacao_id.in_(ids))
+    return query
+
+
+def recalcular(conexao, ids=None, hoje: date | None = None):
+    """Refaz o resumo das negociacoes `ids` (todas, se None)."""
+    hoje = hoje or date.today()
+    parcela = ParcelamentoNegociacao
+    # so os grupos (negociacao, tipo) que nao tem mais parcelas
+    apagar = delete(NegociacaoResumo).where(
+        ~exists().where(
+            parcela.negociacao_id == NegociacaoResumo.negociacao_id,
+            parcela.type == NegociacaoResumo.type,
+        )
+    )
+    if ids is not None:
+        ids = list(ids)
+        if not ids:
+            return
+        apagar = apagar.where(NegociacaoResumo.negociacao_id.in_(ids))
+
+    inserir = insert(NegociacaoResumo).from_select(
+        COLUNAS, _consulta_totais(ids, hoje)
+    )
+    conexao.execute(
+        inserir.on_conflict_do_update(
+            index_elements=['negociacao_id', 'type'],
+            set_={
+                coluna: inserir.excluded[coluna] for coluna in COLUNAS[2:]
+            },
+        )
+    )
+    conexao.execute(apagar)
+
+
+def _marcar(session: Session, *ids):
+    session.info.setdefault(PENDENTES, set()).update(
+        i for i in ids if i is not None
+    )
+
+
+def _parcela_alterada(mapper, connection, target):
+    # inclui a negociacao antiga quando a parcela troca de negociacao
+    historico = inspect(target).attrs.negociacao_id.history
+    _marcar(
+        Session.object_session(target),
+        target.negociacao_id,
+        *historico.deleted,
+    )
+
+
+def _negociacao_inserida(mapper, connection, target):
+    # as parcelas geradas no after_insert nao passam pelos eventos do ORM
+    _marcar(Session.object_session(target), target.id)
+
+
+for _evento in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(ParcelamentoNegociacao, _evento, _parcela_alterada)
+event.listen(NegociacaoCredito, 'after_insert', _negociacao_inserida)
+
+
+def _altera_parcelas(session: Session) -> bool:
+    return any(
+        isinstance(obj, (ParcelamentoNegociacao, NegociacaoCredito))
+        for obj in chain(session.new, session.dirty, session.deleted)
+    )
+
+
+@event.listens_for(Session, 'before_commit')
+def _recalcular_antes_do_commit(session):
+    # o flush dispara os eventos acima para o que ainda nao foi gravado;
+    # commits que nao mexem em negociacoes/parcelas passam direto
+    if _altera_parcelas(session):
+        session.flush()
+    ids = session.info.pop(PENDENTES, None)
+    if ids:
+        recalcular(session.connection(), ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_apos_rollback(session):
+    session.info.pop(PENDENTES, None)
+
+
+def _desatualizado(hoje: date):
+    return or_(
+        NegociacaoResumo.calculado_em.is_(None),
+        NegociacaoResumo.proximo_vencimento < hoje,
+    )
+
+
+def carregar_resumos(session: Session, ids) -> dict[int, list]:
+    """Resumos das negociacoes `ids`, sem gravar nada.
+
+    As linhas desatualizadas pela virada do dia sao substituidas pelos
+    totais calculados agora (objetos fora da sessao); quem as regrava e
+    o job `manter_resumos`.
+    """
+    ids = list(ids)
+    if not ids:
+        return {}
+    hoje = date.today()
+
+    desatualizados = session.scalars(
+        select(NegociacaoResumo.negociacao_id)
+        .where(NegociacaoResumo.negociacao_id.in_(ids), _desatualizado(hoje))
+        .distinct()
+    ).all()
+
+    resumos = {negociacao_id: [] for negociacao_id in ids}
+    for resumo in session.scalars(
+        select(NegociacaoResumo).where(
+            NegociacaoResumo.negociacao_id.in_(ids),
+            NegociacaoResumo.negociacao_id.not_in(desatualizados),
+        )
+    ):
+        resumos[resumo.negociacao_id].append(resumo)
+
+    if desatualizados:
+        for row in session.execute(_consulta_totais(desatualizados, hoje)):
+            resumo = NegociacaoResumo(**dict(zip(COLUNAS, row)))
+            resumos[resumo.negociacao_id].append(resumo)
+
+    for lista in resumos.values():
+        lista.sort(key=lambda resumo: resumo.type)
+    return resumos
+
+
+def recalcular_desatualizados(session: Session, hoje: date | None = None):
+    """Regrava os resumos desatualizados; devolve quantas negociacoes.
+
+    Se outro worker ja esta na mesma rodada, nao faz nada.
+    """
+    hoje = hoje or date.today()
+    if not session.scalar(
+        select(func.pg_try_advisory_xact_lock(LOCK_RECALCULO))
+    ):
+        return 0
+
+    ids = session.scalars(
+        select(NegociacaoResumo.negociacao_id)
+        .where(_desatualizado(hoje))
+        .distinct()
+    ).all()
+    recalcular(session.connection(), ids, hoje)
+    session.commit()
+    return len(ids)
+
+
+def _rodada():
+    with Session(engine) as session:
+        return recalcular_desatualizados(session)
+
+
+async def manter_resumos(intervalo: float | None = None):
+    """Job do lifespan: recalcula os resumos vencidos periodicamente."""
+    intervalo = intervalo or settings.RESUMO_RECALCULO_SEGUNDOS
+    while True:
+        try:
+            await asyncio.to_thread(_rodada)
+        except Exception:  # noqa: BLE001
+            logger.warning('recalculo de resumos falhou', exc_info=True)
+        await asyncio.sleep(intervalo)
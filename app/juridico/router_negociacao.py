@@ -1,17 +1,41 @@
 from datetime import date, timedelta
 from decimal import Decimal
 from http import HTTPStatus
-from typing import Annotated, Optional
+from typing import Annotated, Literal, Optional
 
 from dateutil import parser
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import and_, asc, desc, func, or_, select
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import (
+    asc,
+    desc,
+    func,
+    literal,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
 
-from app.core.database import get_session
-from app.core.security import get_current_user
-from app.juridico.models import NegociacaoCredito, ParcelamentoNegociacao
+from app.core.database import (
+    get_async_session,
+    get_async_session_factory,
+    get_session,
+)
+from app.core.exportacao import FORMATOS, STREAMS
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.responses import fast_json
+from app.core.security import Principal, get_current_user
+from app.juridico.models import (
+    COLUNAS_BUSCA,
+    NegociacaoCredito,
+    ParcelamentoNegociacao,
+    sem_acento,
+)
 from app.juridico.negociacao_schema import (
+    NegociacaoBuscaSchema,
+    NegociacaoComResumoSchema,
     NegociacaoInSchema,
     NegociacaoListSchema,
     NegociacaoOutSchema,
@@ -22,22 +46,77 @@ from app.juridico.negociacao_schema import (
     ParcelamentoOurSchema,
     ParcelamentoUpdateSchema,
 )
-from app.models.models import User
+from app.juridico.relatorio import consulta_relatorio, parcelas_em_aberto
+from app.juridico.resumo import carregar_resumos
 from app.schemas.schemas import Message
 
 router = APIRouter(prefix='/juridico', tags=['negociação'])
 T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+T_AsyncSession = Annotated[AsyncSession, Depends(get_async_session)]
+T_AsyncSessionFactory = Annotated[
+    async_sessionmaker, Depends(get_async_session_factory)
+]
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
+
+RELATORIO_YIELD_PER = 2000
+
+
+def filtro_contem(q: str):
+    """Filtros ILIKE '%q%' sem acento, atendidos pelos indices trigram.
+
+    O termo tambem passa por f_unaccent no banco, entao o escape de `%` e
+    `_` e feito aqui (o autoescape do `icontains` so vale para literais).
+    """
+    escapado = q.replace('/', '//').replace('%', '/%').replace('_', '/_')
+    padrao = sem_acento(literal(f'%{escapado}%'))
+    return [
+        sem_acento(getattr(NegociacaoCredito, coluna)).ilike(
+            padrao, escape='/'
+        )
+        for coluna in COLUNAS_BUSCA
+    ]
+
+
+def consulta_busca(q: str, limit: int):
+    """Negociacoes que contem ou lembram `q`, da mais parecida a menos."""
+    colunas = [
+        sem_acento(getattr(NegociacaoCredito, coluna))
+        for coluna in COLUNAS_BUSCA
+    ]
+    termo = sem_acento(literal(q))
+    rank = func.greatest(
+        *(func.word_similarity(termo, coluna) for coluna in colunas)
+    ).label('rank')
+
+    return (
+        select(NegociacaoCredito, rank)
+        .where(
+            or_(
+                *filtro_contem(q),
+                *(termo.op('<%')(coluna) for coluna in colunas),
+            )
+        )
+        .order_by(desc(rank), desc(NegociacaoCredito.id))
+        .limit(limit)
+    )
 
 
 @router.get('/negociacao', response_model=NegociacaoListSchema)
-def read_negociacao(
+def read_negociacao(  # noqa: PLR0913, PLR0917
     session: T_Session,
     user: T_CurrentUser,
     searchTerm: Optional[str] = '',
     page: int = 1,
     page_size: int = 10,
+    after: Optional[str] = None,
+    include_total: bool = True,
 ):
+    """Lista negociacoes por id decrescente.
+
+    Com `after` (token `next_cursor` da pagina anterior, ou vazio para a
+    primeira pagina) a paginacao e por chave (`id < ultimo id`) e `page`
+    e ignorado. `include_total=false` dispensa o count().
+    """
     skip = (page - 1) * page_size
     limit = page_size
 
@@ -45,27 +124,72 @@ def read_negociacao(
     query = select(NegociacaoCredito)
 
     if searchTerm:
-        partial_name = f'%{searchTerm}%'
-        query = query.where(
-            NegociacaoCredito.processo.ilike(partial_name)
-            | NegociacaoCredito.executado.ilike(partial_name)
-            | NegociacaoCredito.contrato.ilike(partial_name)
-        )
+        query = query.where(or_(*filtro_contem(searchTerm)))
 
     # Obter o total de registros
-    total_records = session.scalar(
-        select(func.count()).select_from(query.subquery())
+    total_records = None
+    if include_total:
+        total_records = session.scalar(
+            select(func.count()).select_from(query.subquery())
+        )
+
+    query = query.order_by(desc(NegociacaoCredito.id))
+    if after is not None:
+        if after:
+            (last_id,) = decode_cursor(after, 1)
+            query = query.where(NegociacaoCredito.id < last_id)
+    else:
+        query = query.offset(skip)
+
+    # Obter os registros paginados (+1 para saber se ha proxima pagina)
+    rows = session.scalars(query.limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+
+    resumos = carregar_resumos(session, (row.id for row in rows))
+    for row in rows:
+        row.resumo = resumos[row.id]
+
+    return fast_json(
+        NegociacaoListSchema,
+        {
+            'rows': rows,
+            'total_records': total_records,
+            'next_cursor': next_cursor,
+        },
     )
 
-    # Obter os registros paginados
-    rows = session.scalars(
-        query.order_by(desc(NegociacaoCredito.id)).offset(skip).limit(limit)
-    ).all()
 
-    return {'rows': rows, 'total_records': total_records}
+@router.get('/negociacao/busca', response_model=NegociacaoBuscaSchema)
+async def busca_negociacao(
+    session: T_AsyncSession,
+    user: T_CurrentUser,
+    q: str = Query(..., min_length=2),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Busca por processo/executado/contrato ordenada por relevancia.
+
+    Atendida pelos indices GIN trigram sobre f_unaccent(coluna): casa
+    substrings (ILIKE) e tambem termos parecidos (operador `<%` do
+    pg_trgm, tolera erros de digitacao), sem diferenciar maiusculas nem
+    acentos.
+    """
+    result = await session.execute(consulta_busca(q, limit))
+
+    rows = []
+    for row, row_rank in result:
+        row.rank = row_rank
+        rows.append(row)
 
+    return fast_json(NegociacaoBuscaSchema, {'rows': rows})
 
-@router.get('/negociacao/{negociacao_id}', response_model=NegociacaoOutSchema)
+
+@router.get(
+    '/negociacao/{negociacao_id}', response_model=NegociacaoComResumoSchema
+)
 def get_negociacao_by_id(
     session: T_Session, user: T_CurrentUser, negociacao_id: int
 ):
@@ -77,6 +201,7 @@ def get_negociacao_by_id(
             detail='Negociação not found',
         )
 
+    row.resumo = carregar_resumos(session, [row.id])[row.id]
     return row
 
 
@@ -190,7 +315,13 @@ def read_parcelmanto_by_negociacao_id(  # noqa: PLR0913, PLR0917
     type: int,
     page: int = 1,
     page_size: int = 10,
+    after: Optional[str] = None,
+    include_total: bool = True,
 ):
+    """Lista as parcelas de uma negociacao por (numero_parcela, id).
+
+    `after`/`include_total` funcionam como em `read_negociacao`.
+    """
     skip = (page - 1) * page_size
     limit = page_size
 
@@ -198,17 +329,44 @@ def read_parcelmanto_by_negociacao_id(  # noqa: PLR0913, PLR0917
         (ParcelamentoNegociacao.negociacao_id == negociacao_id)
         & (ParcelamentoNegociacao.type == type)
     )
-    total_records = session.scalar(
-        select(func.count()).select_from(query.subquery())
-    )
-
-    rows = session.scalars(
-        query.order_by(asc(ParcelamentoNegociacao.numero_parcela))
-        .offset(skip)
-        .limit(limit)
-    ).all()
+    total_records = None
+    if include_total:
+        total_records = session.scalar(
+            select(func.count()).select_from(query.subquery())
+        )
 
-    return {'rows': rows, 'total_records': total_records}
+    query = query.order_by(
+        asc(ParcelamentoNegociacao.numero_parcela),
+        asc(ParcelamentoNegociacao.id),
+    )
+    if after is not None:
+        if after:
+            numero_parcela, last_id = decode_cursor(after, 2)
+            query = query.where(
+                tuple_(
+                    ParcelamentoNegociacao.numero_parcela,
+                    ParcelamentoNegociacao.id,
+                )
+                > tuple_(numero_parcela, last_id)
+            )
+    else:
+        query = query.offset(skip)
+
+    rows = session.scalars(query.limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].numero_parcela, rows[-1].id)
+
+    return fast_json(
+        ParcelamentoListSchema,
+        {
+            'rows': rows,
+            'total_records': total_records,
+            'next_cursor': next_cursor,
+        },
+    )
 
 
 @router.get(
@@ -299,17 +457,17 @@ def update_parcelamento_by_id(
 
 @router.delete('/parcelamento/{parcelamento_id}', response_model=Message)
 async def delete_parcelamento(
-    parcelamento_id: int, session: T_Session, user: T_CurrentUser
+    parcelamento_id: int, session: T_AsyncSession, user: T_CurrentUser
 ):
-    db_row = session.get(ParcelamentoNegociacao, parcelamento_id)
+    db_row = await session.get(ParcelamentoNegociacao, parcelamento_id)
 
     if not db_row:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Parcelamento not found.'
         )
 
-    session.delete(db_row)
-    session.commit()
+    await session.delete(db_row)
+    await session.commit()
 
     return {'message': 'Parcelamento deletado'}
 
@@ -319,80 +477,24 @@ async def delete_parcelamento(
     response_model=NegociacaoVenciNaSemanaResponse,
 )
 async def negoc_venci_na_semana(
-    session: T_Session,
+    session: T_AsyncSession,
     user: T_CurrentUser,
     page: int = 1,
     page_size: int = 10,
 ):
-    skip = (page - 1) * page_size
-    limit = page_size
-
     hoje = date.today()
     inicio_da_semana = hoje - timedelta(days=hoje.weekday())
     fim_da_semana = inicio_da_semana + timedelta(days=6)
 
-    query = (
-        select(
-            ParcelamentoNegociacao.id,
-            NegociacaoCredito.processo.label('processo'),
-            NegociacaoCredito.executado,
-            ParcelamentoNegociacao.type,
-            ParcelamentoNegociacao.data,
-            ParcelamentoNegociacao.val_parcela,
-            ParcelamentoNegociacao.val_pago,
-            ParcelamentoNegociacao.data_pgto,
-            ParcelamentoNegociacao.is_val_juros.label('juros'),
-        )
-        .join(ParcelamentoNegociacao.negociacao)
-        .filter(
-            and_(
-                ParcelamentoNegociacao.data > inicio_da_semana,
-                ParcelamentoNegociacao.data < fim_da_semana,
-                ParcelamentoNegociacao.data_pgto.is_(None),
-                NegociacaoCredito.is_liquidado.is_(False),
-            )
-        )
-        .order_by(asc(ParcelamentoNegociacao.data))
-    )
-
-    total_records = session.scalar(
-        select(func.count()).select_from(query.subquery())
-    )
-
-    rows = session.execute(query.offset(skip).limit(limit)).all()
-
-    # resumo
-    query2 = (
-        select(
-            # func.count(ParcelamentoNegociacao.id).label("total_parcelas"),
-            func.sum(ParcelamentoNegociacao.val_parcela).label(
-                'total_val_parcela'
-            ),
-        )
-        .select_from(ParcelamentoNegociacao)
-        .join(
-            NegociacaoCredito,
-            ParcelamentoNegociacao.negociacao_id == NegociacaoCredito.id,
-        )
-        .filter(
-            and_(
-                ParcelamentoNegociacao.data > inicio_da_semana,
-                ParcelamentoNegociacao.data < fim_da_semana,
-                ParcelamentoNegociacao.data_pgto.is_(None),
-                NegociacaoCredito.is_liquidado.is_(False),
-            )
-        )
+    relatorio = await parcelas_em_aberto(
+        session,
+        data_apos=inicio_da_semana,
+        data_antes=fim_da_semana,
+        page=page,
+        page_size=page_size,
     )
 
-    result = session.execute(query2).first()
-
-    total_val_parcela = result[0] if result is not None else 0
-
-    return {
-        'rows': rows,
-        'total_records': total_records,
-        'total_val_parcela': total_val_parcela,
-    }
+    return fast_json(NegociacaoVenciNaSemanaResponse, relatorio)
 
 
 @router.get(
@@ -400,79 +502,23 @@ async def negoc_venci_na_semana(
     response_model=NegociacaoVenciNaSemanaResponse,
 )
 async def negoc_ha_venc_30d(
-    session: T_Session,
+    session: T_AsyncSession,
     user: T_CurrentUser,
     page: int = 1,
     page_size: int = 10,
 ):
-    skip = (page - 1) * page_size
-    limit = page_size
-
     hoje = date.today()
     data_mais_30_dias = hoje + timedelta(days=30)
 
-    query = (
-        select(
-            ParcelamentoNegociacao.id,
-            NegociacaoCredito.processo.label('processo'),
-            NegociacaoCredito.executado,
-            ParcelamentoNegociacao.type,
-            ParcelamentoNegociacao.data,
-            ParcelamentoNegociacao.val_parcela,
-            ParcelamentoNegociacao.val_pago,
-            ParcelamentoNegociacao.data_pgto,
-            ParcelamentoNegociacao.is_val_juros.label('juros'),
-        )
-        .join(ParcelamentoNegociacao.negociacao)
-        .filter(
-            and_(
-                ParcelamentoNegociacao.data > hoje,
-                ParcelamentoNegociacao.data < data_mais_30_dias,
-                ParcelamentoNegociacao.data_pgto.is_(None),
-                NegociacaoCredito.is_liquidado.is_(False),
-            )
-        )
-        .order_by(asc(ParcelamentoNegociacao.data))
+    relatorio = await parcelas_em_aberto(
+        session,
+        data_apos=hoje,
+        data_antes=data_mais_30_dias,
+        page=page,
+        page_size=page_size,
     )
 
-    total_records = session.scalar(
-        select(func.count()).select_from(query.subquery())
-    )
-
-    rows = session.execute(query.offset(skip).limit(limit)).all()
-
-    # resumo
-    query2 = (
-        select(
-            # func.count(ParcelamentoNegociacao.id).label("total_parcelas"),
-            func.sum(ParcelamentoNegociacao.val_parcela).label(
-                'total_val_parcela'
-            ),
-        )
-        .select_from(ParcelamentoNegociacao)
-        .join(
-            NegociacaoCredito,
-            ParcelamentoNegociacao.negociacao_id == NegociacaoCredito.id,
-        )
-        .filter(
-            and_(
-                ParcelamentoNegociacao.data > hoje,
-                ParcelamentoNegociacao.data < data_mais_30_dias,
-                ParcelamentoNegociacao.data_pgto.is_(None),
-                NegociacaoCredito.is_liquidado.is_(False),
-            )
-        )
-    )
-
-    result = session.execute(query2).first()
-
-    total_val_parcela = result[0] if result is not None else 0
-
-    return {
-        'rows': rows,
-        'total_records': total_records,
-        'total_val_parcela': total_val_parcela,
-    }
+    return fast_json(NegociacaoVenciNaSemanaResponse, relatorio)
 
 
 @router.get(
@@ -480,158 +526,69 @@ async def negoc_ha_venc_30d(
     response_model=NegociacaoVenciNaSemanaResponse,
 )
 async def negoc_vencidos(
-    session: T_Session,
+    session: T_AsyncSession,
     user: T_CurrentUser,
     page: int = 1,
     page_size: int = 10,
 ):
-    skip = (page - 1) * page_size
-    limit = page_size
-
     hoje = date.today()
 
-    query = (
-        select(
-            ParcelamentoNegociacao.id,
-            NegociacaoCredito.processo.label('processo'),
-            NegociacaoCredito.executado,
-            ParcelamentoNegociacao.type,
-            ParcelamentoNegociacao.data,
-            ParcelamentoNegociacao.val_parcela,
-            ParcelamentoNegociacao.val_pago,
-            ParcelamentoNegociacao.data_pgto,
-            ParcelamentoNegociacao.is_val_juros.label('juros'),
-        )
-        .join(ParcelamentoNegociacao.negociacao)
-        .filter(
-            and_(
-                ParcelamentoNegociacao.data < hoje,
-                ParcelamentoNegociacao.data_pgto.is_(None),
-                NegociacaoCredito.is_liquidado.is_(False),
-            )
-        )
-        .order_by(asc(ParcelamentoNegociacao.data))
+    relatorio = await parcelas_em_aberto(
+        session, data_antes=hoje, page=page, page_size=page_size
     )
 
-    total_records = session.scalar(
-        select(func.count()).select_from(query.subquery())
-    )
+    return fast_json(NegociacaoVenciNaSemanaResponse, relatorio)
 
-    rows = session.execute(query.offset(skip).limit(limit)).all()
 
-    # resumo
-    query2 = (
-        select(
-            # func.count(ParcelamentoNegociacao.id).label("total_parcelas"),
-            func.sum(ParcelamentoNegociacao.val_parcela).label(
-                'total_val_parcela'
-            ),
-        )
-        .select_from(ParcelamentoNegociacao)
-        .join(
-            NegociacaoCredito,
-            ParcelamentoNegociacao.negociacao_id == NegociacaoCredito.id,
-        )
-        .filter(
-            and_(
-                ParcelamentoNegociacao.data < hoje,
-                ParcelamentoNegociacao.data_pgto.is_(None),
-                NegociacaoCredito.is_liquidado.is_(False),
-            )
+async def _lotes_relatorio(nova_sessao: async_sessionmaker, query):
+    # sessao propria: a do Depends ja foi fechada quando o corpo da
+    # StreamingResponse comeca a ser enviado
+    async with nova_sessao() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=RELATORIO_YIELD_PER)
         )
-    )
-
-    result = session.execute(query2).first()
-
-    total_val_parcela = result[0] if result is not None else 0
-
-    return {
-        'rows': rows,
-        'total_records': total_records,
-        'total_val_parcela': total_val_parcela,
-    }
+        async for lote in result.partitions():
+            yield lote
 
 
 @router.get('/negociacao/relatorio/')
-async def negociacao_relatorio(
-    session: T_Session,
+async def negociacao_relatorio(  # noqa: PLR0913, PLR0917
+    session: T_AsyncSession,
+    nova_sessao: T_AsyncSessionFactory,
     user: T_CurrentUser,
     tipo: int,
     data_inicial: str,
     data_final: str,
+    formato: Literal['json', 'ndjson', 'csv', 'xlsx'] = 'json',
 ):
+    """Relatorio por periodo.
+
+    `formato=json` (padrao) devolve a lista inteira. `ndjson`, `csv` e
+    `xlsx` sao enviados em streaming, lendo o resultado em lotes por um
+    cursor no servidor, sem carregar o periodo todo em memoria.
+    """
     # Parse das datas
     data_inicial_parsed = parser.parse(' '.join(data_inicial.split(' ')[0:6]))
     data_final_parsed = parser.parse(' '.join(data_final.split(' ')[0:6]))
 
-    if tipo == 1:
-        # Tipo 1: Negociações de Crédito
-        query = (
-            select(
-                NegociacaoCredito.id,
-                NegociacaoCredito.processo,
-                NegociacaoCredito.executado,
-                NegociacaoCredito.contrato,
-                NegociacaoCredito.val_devido,
-                NegociacaoCredito.val_neg,
-                NegociacaoCredito.taxa_mes,
-                NegociacaoCredito.qtd,
-                NegociacaoCredito.val_parc,
-            )
-            .filter(
-                and_(
-                    NegociacaoCredito.data_pri_parc >= data_inicial_parsed,
-                    NegociacaoCredito.data_pri_parc <= data_final_parsed,
-                )
-            )
-            .order_by(NegociacaoCredito.executado)
-        )
-        result = session.execute(query).all()
-        return [dict(row._mapping) for row in result]
+    query = consulta_relatorio(tipo, data_inicial_parsed, data_final_parsed)
+    if query is None:
+        return {'detail': 'Invalid type parameter'}
 
-    elif tipo == int(2):
-        # Tipo 2: Parcelas de Negociação
-        query = (
-            select(
-                ParcelamentoNegociacao.id,
-                ParcelamentoNegociacao.numero_parcela,
-                NegociacaoCredito.processo,
-                NegociacaoCredito.executado,
-                ParcelamentoNegociacao.type,
-                ParcelamentoNegociacao.data,
-                ParcelamentoNegociacao.val_parcela,
-                ParcelamentoNegociacao.val_pago,
-                ParcelamentoNegociacao.data_pgto,
-                ParcelamentoNegociacao.is_val_juros,
-            )
-            .join(
-                NegociacaoCredito,
-                (ParcelamentoNegociacao.negociacao_id == NegociacaoCredito.id),
-            )
-            .filter(
-                or_(
-                    and_(
-                        ParcelamentoNegociacao.data >= data_inicial_parsed,
-                        ParcelamentoNegociacao.data <= data_final_parsed,
-                    ),
-                    and_(
-                        (
-                            ParcelamentoNegociacao.data_pgto
-                            >= data_inicial_parsed
-                        ),
-                        ParcelamentoNegociacao.data_pgto <= data_final_parsed,
-                    ),
-                )
-            )
-            .order_by(
-                NegociacaoCredito.executado,
-                ParcelamentoNegociacao.numero_parcela,
-                ParcelamentoNegociacao.type,
-                ParcelamentoNegociacao.data,
-                ParcelamentoNegociacao.data_pgto,
-            )
-        )
-        result = session.execute(query).all()
+    if formato == 'json':
+        result = (await session.execute(query)).all()
         return [dict(row._mapping) for row in result]
 
-    return {'detail': 'Invalid type parameter'}
+    media_type, extensao = FORMATOS[formato]
+    return StreamingResponse(
+        STREAMS[formato](
+            [coluna.name for coluna in query.selected_columns],
+            _lotes_relatorio(nova_sessao, query),
+        ),
+        media_type=media_type,
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="relatorio_tipo{tipo}.{extensao}"'
+            )
+        },
+    )
@@ -12,12 +12,14 @@ from sqlalchemy import (
     func,
     select,
 )
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import (
     Mapped,
     Session,
     mapped_column,
     registry,
     relationship,
+    selectinload,
     validates,
 )
 
@@ -72,9 +74,9 @@ class UserRoles(Base):
     role = relationship('Role', backref='UserRoles')
 
     @classmethod
-    def get_role_by_user_id(
+    async def get_role_by_user_id(
         cls,
-        session: Session,
+        session: AsyncSession,
         user_id: int,
         page: int = 1,
         page_size: int = 10,
@@ -84,17 +86,20 @@ class UserRoles(Base):
 
         subquery = select(cls).where(cls.user_id == user_id).subquery()
 
-        total_records = session.scalar(
+        total_records = await session.scalar(
             select(func.count()).select_from(subquery)
         )
 
-        rows = session.scalars(
-            select(cls)
-            .where((cls.user_id == user_id))
-            .order_by(cls.role_id)
-            .offset(skip)
-            .limit(limit)
-        )
+        rows = (
+            await session.scalars(
+                select(cls)
+                .options(selectinload(cls.role))
+                .where((cls.user_id == user_id))
+                .order_by(cls.role_id)
+                .offset(skip)
+                .limit(limit)
+            )
+        ).all()
 
         return {
             'rows': rows,
@@ -183,13 +188,15 @@ class User(Base):
         return totp.verify(otp)
 
     @classmethod
-    def get_by_username(cls, session: Session, username: str):
-        return session.query(cls).filter_by(username=username).first()
+    async def get_by_username(cls, session: AsyncSession, username: str):
+        return await session.scalar(
+            select(cls).where(cls.username == username).limit(1)
+        )
 
     @classmethod
-    def get_like_by_username(
+    async def get_like_by_username(
         cls,
-        session: Session,
+        session: AsyncSession,
         username: str,
         page: int = 1,
         page_size: int = 10,
@@ -202,18 +209,19 @@ class User(Base):
             select(cls).where(cls.username.like(partial_name)).subquery()
         )
 
-        total_records = session.scalar(
+        total_records = await session.scalar(
             select(func.count()).select_from(subquery)
         )
 
         rows = (
-            session.query(cls)
-            .filter(cls.username.like(partial_name))
-            .order_by(cls.id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+            await session.scalars(
+                select(cls)
+                .where(cls.username.like(partial_name))
+                .order_by(cls.id)
+                .offset(skip)
+                .limit(limit)
+            )
+        ).all()
 
         return {
             'rows': rows,
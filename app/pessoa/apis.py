@@ -1,7 +1,22 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import json
+from datetime import datetime, timedelta
+from time import monotonic
+
+import httpx
 import requests
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.database import async_engine
+from app.core.settings import Settings
 from app.core.util import get_numbers
+from app.pessoa.models import ConsultaExterna
+
+settings = Settings()
 
 
 def getCityforState(UF) -> list:
@@ -22,6 +37,19 @@ def getStates() -> list:
     return []
 
 
+async def getStatesAsync(client: httpx.AsyncClient) -> list:
+    # client com base_url = Settings().IBGE_API_URL
+    response = await client.get('/estados')
+    response.raise_for_status()
+    return response.json()
+
+
+async def getCityforStateAsync(client: httpx.AsyncClient, UF) -> list:
+    response = await client.get(f'/estados/{UF}/municipios')
+    response.raise_for_status()
+    return response.json()
+
+
 def getDadosCEP(cep):
     """
     "cep": "77023-432",
@@ -49,4 +77,220 @@ def getDadosCNPJ(cnpj):
     if response.status_code == 200:
         dados_json = json.loads(response.content)
         return dados_json
-    return None
\ No newline at end of file
+    return None
+
+
+# --- consultas assincronas (CEP/CNPJ) -------------------------------------
+
+
+class RateLimitExceeded(Exception):
+    """O limite do servico externo nao liberou a consulta a tempo."""
+
+
+class ConsultaInterrompida(Exception):
+    """A requisicao dona da consulta compartilhada foi cancelada."""
+
+
+class TokenBucket:
+    """Limita as chamadas a um servico externo (`rate` por `per` segundos).
+
+    Por processo. Quem nao tem ficha espera ate `max_wait` segundos.
+    """
+
+    def __init__(self, rate: int, per: float = 60):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self._updated_at = monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self._updated_at) * self.fill_rate,
+        )
+        self._updated_at = now
+
+    async def acquire(self, max_wait: float):
+        async with self._lock:
+            self._refill()
+            wait = (1 - self.tokens) / self.fill_rate
+            if wait > max_wait:
+                raise RateLimitExceeded
+            if wait > 0:
+                await asyncio.sleep(wait)
+                self._refill()
+            self.tokens -= 1
+
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Pool de conexoes compartilhado pelas consultas externas."""
+    global _http_client  # noqa: PLW0603
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.ENRIQUECIMENTO_HTTP_TIMEOUT,
+            headers={'Accept': 'application/json'},
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client  # noqa: PLW0603
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+class ConsultaCacheada:
+    """Consulta a um servico externo com cache em dois niveis.
+
+    1. LRU em memoria (por processo);
+    2. tabela `consulta_externa`, com validade de `ttl` segundos.
+
+    Consultas simultaneas pela mesma chave compartilham uma unica
+    chamada, e as chamadas passam pelo limitador do servico. A gravacao
+    no cache do banco usa sessao propria: a consulta e de todas as
+    requisicoes que a esperam, nao so da que a iniciou.
+    """
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        tipo,
+        url,
+        normalizar,
+        tamanho,
+        ttl,
+        rate_per_minute,
+        nova_sessao=lambda: AsyncSession(async_engine),
+    ):
+        self.tipo = tipo
+        self.url = url
+        self.normalizar = normalizar
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self.memoria = TTLCache(
+            maxsize=settings.ENRIQUECIMENTO_CACHE_MAXSIZE, ttl=ttl
+        )
+        self.limite = TokenBucket(rate_per_minute)
+        self.nova_sessao = nova_sessao
+        self._em_andamento: dict[str, asyncio.Future] = {}
+
+    async def consultar(self, session: AsyncSession, valor: str):
+        chave = self.normalizar(valor)
+        if len(chave) != self.tamanho:
+            return None
+
+        dados = self.memoria.get(chave)
+        if dados is not None:
+            return dados or None
+
+        if chave in self._em_andamento:
+            try:
+                return await asyncio.shield(self._em_andamento[chave])
+            except ConsultaInterrompida:
+                # a dona foi cancelada (cliente desconectou): tenta de novo
+                return await self.consultar(session, valor)
+
+        future = asyncio.get_running_loop().create_future()
+        self._em_andamento[chave] = future
+        try:
+            dados = await self._buscar(session, chave)
+        except Exception as e:
+            future.set_exception(e)
+            # evita "exception was never retrieved" quando ninguem esperou
+            future.exception()
+            raise
+        else:
+            future.set_result(dados)
+        finally:
+            del self._em_andamento[chave]
+            if not future.done():
+                # CancelledError nao e Exception: sem isto quem esperava
+                # pela consulta ficaria preso para sempre
+                future.set_exception(ConsultaInterrompida())
+                future.exception()
+        return dados
+
+    async def _buscar(self, session: AsyncSession, chave: str):
+        dados = await session.scalar(
+            select(ConsultaExterna.dados).where(
+                ConsultaExterna.tipo == self.tipo,
+                ConsultaExterna.chave == chave,
+                ConsultaExterna.expira_em > datetime.now(),
+            )
+        )
+        if dados is not None:
+            self.memoria.set(chave, dados)
+            return dados
+
+        await self.limite.acquire(settings.RATE_LIMIT_MAX_WAIT)
+        response = await get_http_client().get(self.url.format(chave))
+        dados = self._ler_resposta(response)
+
+        if dados is None:
+            # inexistente: lembra so em memoria e por pouco tempo
+            self.memoria.set(chave, {}, ttl=min(self.ttl, 3600))
+            return None
+
+        stmt = insert(ConsultaExterna).values(
+            tipo=self.tipo,
+            chave=chave,
+            dados=dados,
+            expira_em=datetime.now() + timedelta(seconds=self.ttl),
+        )
+        async with self.nova_sessao() as sessao_cache:
+            await sessao_cache.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=['tipo', 'chave'],
+                    set_={
+                        'dados': stmt.excluded.dados,
+                        'expira_em': stmt.excluded.expira_em,
+                        'consultado_em': datetime.now(),
+                    },
+                )
+            )
+            await sessao_cache.commit()
+        self.memoria.set(chave, dados)
+        return dados
+
+    @staticmethod
+    def _ler_resposta(response: httpx.Response):
+        if response.status_code in {400, 404}:
+            return None
+        response.raise_for_status()
+        dados = response.json()
+        # ViaCEP responde 200 com {"erro": true};
+        # ReceitaWS com {"status": "ERROR"}
+        if dados.get('erro') or dados.get('status') == 'ERROR':
+            return None
+        return dados
+
+
+consulta_cep = ConsultaCacheada(
+    tipo='cep',
+    url=settings.CEP_API_URL + '/{}/json/',
+    normalizar=get_numbers,
+    tamanho=8,
+    ttl=settings.CEP_CACHE_TTL,
+    rate_per_minute=settings.CEP_RATE_PER_MINUTE,
+)
+consulta_cnpj = ConsultaCacheada(
+    tipo='cnpj',
+    url=settings.CNPJ_API_URL + '/cnpj/{}',
+    normalizar=get_numbers,
+    tamanho=14,
+    ttl=settings.CNPJ_CACHE_TTL,
+    rate_per_minute=settings.CNPJ_RATE_PER_MINUTE,
+)
+
+
+async def getDadosCEPAsync(session: AsyncSession, cep: str):
+    return await consulta_cep.consultar(session, cep)
+
+
+async def getDadosCNPJAsync(session: AsyncSession, cnpj: str):
+    return await consulta_cnpj.consultar(session, cnpj)
@@ -0,0 +1,171 @@
+"""Resolucao de CEP a partir das tabelas locais (Cep, Bairro, Municipio).
+
+O indice fica em memoria em forma compacta: um array ordenado com os CEPs
+(8 digitos, como inteiro) e outro, paralelo, com o bairro de cada um. A
+busca exata e por prefixo sao bisect sobre esse array. So quando o CEP
+nao esta no indice a consulta vai para o ViaCEP, e o resultado e gravado
+em Bairro/Cep para as proximas vezes.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_engine
+from app.core.util import get_numbers
+from app.pessoa.apis import getDadosCEPAsync
+from app.pessoa.models import Bairro, Cep
+from app.pessoa.referencia import referencia
+
+TAMANHO_CEP = 8
+
+
+def normalizar_cep(cep: str) -> str | None:
+    digitos = get_numbers(cep or '')
+    return digitos if len(digitos) == TAMANHO_CEP else None
+
+
+def formatar_cep(cep: int | str) -> str:
+    cep = f'{int(cep):08d}'
+    return f'{cep[:5]}-{cep[5:]}'
+
+
+class CepIndex:
+    def __init__(self):
+        self._ceps = array('L')
+        self._bairros = array('L')
+        # bairro_id -> (nome, municipio_id)
+        self.bairros: dict[int, tuple[str, int]] = {}
+        self.carregado = False
+
+    def __len__(self):
+        return len(self._ceps)
+
+    def montar(self, ceps, bairros: dict[int, tuple[str, int]]):
+        """`ceps`: pares (cep, bairro_id); CEPs invalidos sao ignorados."""
+        normalizados = ((normalizar_cep(c), bairro) for c, bairro in ceps)
+        pares = sorted(
+            {(int(c), bairro_id) for c, bairro_id in normalizados if c}
+        )
+        self._ceps = array('L', (cep for cep, _ in pares))
+        self._bairros = array('L', (bairro_id for _, bairro_id in pares))
+        self.bairros = dict(bairros)
+        self.carregado = True
+
+    def limpar(self):
+        self._ceps = array('L')
+        self._bairros = array('L')
+        self.bairros = {}
+        self.carregado = False
+
+    def adicionar(self, cep: str, bairro_id: int, nome: str, municipio_id):
+        numero = int(cep)
+        self.bairros[bairro_id] = (nome, municipio_id)
+        posicao = bisect_left(self._ceps, numero)
+        if posicao < len(self._ceps) and self._ceps[posicao] == numero:
+            return
+        self._ceps.insert(posicao, numero)
+        self._bairros.insert(posicao, bairro_id)
+
+    def buscar(self, cep: str) -> int | None:
+        """bairro_id do CEP (8 digitos) ou None."""
+        numero = int(cep)
+        posicao = bisect_left(self._ceps, numero)
+        if posicao < len(self._ceps) and self._ceps[posicao] == numero:
+            return self._bairros[posicao]
+        return None
+
+    def por_prefixo(self, prefixo: str) -> list[tuple[str, int]]:
+        """(cep, bairro_id) de todos os CEPs que comecam com `prefixo`."""
+        faltam = TAMANHO_CEP - len(prefixo)
+        inicio = int(prefixo) * 10**faltam
+        fim = inicio + 10**faltam - 1
+        a = bisect_left(self._ceps, inicio)
+        b = bisect_right(self._ceps, fim)
+        return [
+            (f'{self._ceps[i]:08d}', self._bairros[i]) for i in range(a, b)
+        ]
+
+
+cep_index = CepIndex()
+
+
+async def carregar_indice(session: AsyncSession | None = None):
+    if session is None:
+        async with AsyncSession(async_engine) as nova_sessao:
+            return await carregar_indice(nova_sessao)
+
+    bairros = {
+        row.id: (row.nome, row.municipio_id)
+        for row in await session.execute(
+            select(Bairro.id, Bairro.nome, Bairro.municipio_id)
+        )
+    }
+    ceps = (await session.execute(select(Cep.cep, Cep.bairro_id))).all()
+    cep_index.montar(ceps, bairros)
+    return cep_index
+
+
+async def _dados_locais(session: AsyncSession, cep: str, bairro_id: int):
+    nome_bairro, municipio_id = cep_index.bairros[bairro_id]
+    snapshot = await referencia.obter(session)
+    municipio = snapshot.municipios.get(municipio_id, {})
+    uf = snapshot.ufs.get(municipio.get('uf_id'), {})
+    return {
+        'cep': formatar_cep(cep),
+        'bairro': nome_bairro,
+        'localidade': municipio.get('nome'),
+        'uf': uf.get('sigla'),
+        'ibge': str(municipio_id),
+        'origem': 'local',
+    }
+
+
+async def _gravar(session: AsyncSession, cep: str, dados: dict):
+    """Guarda em Bairro/Cep o que o ViaCEP devolveu."""
+    municipio_id = int(dados['ibge'])
+    nome_bairro = dados.get('bairro') or ''
+
+    await session.execute(
+        insert(Bairro)
+        .values(municipio_id=municipio_id, nome=nome_bairro)
+        .on_conflict_do_nothing(constraint='uix_municipio_id_nome')
+    )
+    bairro_id = await session.scalar(
+        select(Bairro.id).where(
+            Bairro.municipio_id == municipio_id, Bairro.nome == nome_bairro
+        )
+    )
+    await session.execute(
+        insert(Cep)
+        .values(cep=cep, bairro_id=bairro_id)
+        .on_conflict_do_nothing(constraint='uix_cep_bairro_id')
+    )
+    await session.commit()
+    cep_index.adicionar(cep, bairro_id, nome_bairro, municipio_id)
+
+
+async def resolver_cep(session: AsyncSession, valor: str) -> dict | None:
+    """Endereco do CEP: indice local primeiro, ViaCEP so na falta."""
+    cep = normalizar_cep(valor)
+    if cep is None:
+        return None
+
+    if not cep_index.carregado:
+        await carregar_indice(session)
+
+    bairro_id = cep_index.buscar(cep)
+    if bairro_id is not None:
+        return await _dados_locais(session, cep, bairro_id)
+
+    dados = await getDadosCEPAsync(session, cep)
+    if dados is None:
+        return None
+
+    snapshot = await referencia.obter(session)
+    if dados.get('ibge') and int(dados['ibge']) in snapshot.municipios:
+        await _gravar(session, cep, dados)
+
+    return {**dados, 'origem': 'remoto'}
@@ -0,0 +1,188 @@
+"""Sincronizacao de regioes, UFs e municipios com a API de localidades do IBGE.
+
+Roda como job em background: todas as UFs sao baixadas em paralelo por um
+unico httpx.AsyncClient (pool de conexoes), comparadas com o que ja existe
+no banco (uma consulta por tabela) e so as linhas novas ou alteradas sao
+gravadas, em INSERT ... ON CONFLICT em lote.
+
+O estado dos jobs fica na tabela sincronizacao_ibge, entao o status e
+visivel em qualquer worker e so um job roda por vez entre todos eles. A
+task em si roda no worker que recebeu o pedido.
+"""
+import asyncio
+from datetime import timedelta
+from uuid import uuid4
+
+import httpx
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_engine
+from app.core.settings import Settings
+from app.pessoa.apis import getCityforStateAsync, getStatesAsync
+from app.pessoa.models import Municipio, Regiao, SincronizacaoIbge, Uf
+from app.pessoa.referencia import referencia
+
+settings = Settings()
+
+UPSERT_CHUNK = 1000
+
+
+# tasks deste processo; as referencias evitam que sejam coletadas
+_tasks: dict[str, asyncio.Task] = {}
+
+
+def http_client(**kwargs) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=settings.IBGE_API_URL,
+        timeout=settings.IBGE_HTTP_TIMEOUT,
+        limits=httpx.Limits(max_connections=settings.IBGE_MAX_CONCURRENCY),
+        **kwargs,
+    )
+
+
+async def buscar_localidades(client: httpx.AsyncClient):
+    """Baixa as UFs e, em paralelo, os municipios de cada UF."""
+    estados = await getStatesAsync(client)
+    limite = asyncio.Semaphore(settings.IBGE_MAX_CONCURRENCY)
+
+    async def _cidades(uf):
+        async with limite:
+            return await getCityforStateAsync(client, uf['sigla'])
+
+    cidades = await asyncio.gather(*(_cidades(uf) for uf in estados))
+    return estados, dict(zip((uf['id'] for uf in estados), cidades))
+
+
+def montar_linhas(estados: list, cidades_por_uf: dict):
+    regioes = {
+        uf['regiao']['id']: {
+            'id': uf['regiao']['id'],
+            'nome': uf['regiao']['nome'],
+            'sigla': uf['regiao']['sigla'],
+        }
+        for uf in estados
+    }
+    ufs = [
+        {'id': uf['id'], 'sigla': uf['sigla'], 'nome': uf['nome']}
+        for uf in estados
+    ]
+    municipios = [
+        {'id': cidade['id'], 'nome': cidade['nome'], 'uf_id': uf_id}
+        for uf_id, cidades in cidades_por_uf.items()
+        for cidade in cidades
+    ]
+    return list(regioes.values()), ufs, municipios
+
+
+def diff_linhas(existentes: dict, linhas: list, colunas: tuple) -> list:
+    """Linhas novas ou com alguma das `colunas` diferente do banco."""
+    return [
+        linha
+        for linha in linhas
+        if existentes.get(linha['id'])
+        != tuple(linha[coluna] for coluna in colunas)
+    ]
+
+
+async def _upsert(session: AsyncSession, model, linhas: list, colunas):
+    for inicio in range(0, len(linhas), UPSERT_CHUNK):
+        stmt = insert(model).values(linhas[inicio : inicio + UPSERT_CHUNK])
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=['id'],
+                set_={coluna: stmt.excluded[coluna] for coluna in colunas},
+            )
+        )
+
+
+async def gravar_localidades(session: AsyncSession, regioes, ufs, municipios):
+    resumo = {}
+    tabelas = (
+        (Regiao, regioes, ('nome', 'sigla')),
+        (Uf, ufs, ('sigla', 'nome')),
+        (Municipio, municipios, ('nome', 'uf_id')),
+    )
+    for model, linhas, colunas in tabelas:
+        result = await session.execute(
+            select(model.id, *(getattr(model, c) for c in colunas))
+        )
+        existentes = {row[0]: tuple(row[1:]) for row in result}
+        alteradas = diff_linhas(existentes, linhas, colunas)
+        await _upsert(session, model, alteradas, colunas)
+        resumo[model.__tablename__] = {
+            'recebidos': len(linhas),
+            'gravados': len(alteradas),
+        }
+    await session.commit()
+    return resumo
+
+
+async def _gravar(estados, cidades_por_uf):
+    async with AsyncSession(async_engine) as session:
+        return await gravar_localidades(
+            session, *montar_linhas(estados, cidades_por_uf)
+        )
+
+
+async def sincronizar(job_id: str, client: httpx.AsyncClient | None = None):
+    try:
+        async with asyncio.timeout(settings.IBGE_SYNC_TIMEOUT):
+            async with client or http_client() as http:
+                estados, cidades_por_uf = await buscar_localidades(http)
+
+            resumo = await _gravar(estados, cidades_por_uf)
+
+        valores = {'status': 'concluido', 'resumo': resumo}
+    except Exception as e:  # noqa: BLE001
+        valores = {'status': 'erro', 'erro': str(e) or type(e).__name__}
+    finally:
+        _tasks.pop(job_id, None)
+
+    async with AsyncSession(async_engine) as session:
+        await session.execute(
+            update(SincronizacaoIbge)
+            .where(SincronizacaoIbge.id == job_id)
+            .values(finalizado_em=func.now(), **valores)
+        )
+        await session.commit()
+
+        if valores['status'] == 'concluido':
+            # troca o cache de referencia deste worker ja com a versao do
+            # job; os demais recarregam na proxima verificacao
+            await referencia.carregar(session)
+
+
+async def iniciar_sincronizacao(session: AsyncSession) -> SincronizacaoIbge:
+    """Dispara o job (ou devolve o que ja esta em execucao em algum worker)."""
+    # job de um worker que morreu no meio: libera a vaga apos o timeout
+    await session.execute(
+        update(SincronizacaoIbge)
+        .where(
+            SincronizacaoIbge.status == 'executando',
+            SincronizacaoIbge.iniciado_em
+            < func.now() - timedelta(seconds=settings.IBGE_SYNC_TIMEOUT),
+        )
+        .values(status='erro', erro='interrompido', finalizado_em=func.now())
+    )
+    job_id = await session.scalar(
+        insert(SincronizacaoIbge)
+        .values(id=uuid4().hex, status='executando', resumo={})
+        .on_conflict_do_nothing()
+        .returning(SincronizacaoIbge.id)
+    )
+    await session.commit()
+
+    if job_id is None:
+        # o indice parcial barrou: outro job esta em execucao
+        job = await session.scalar(
+            select(SincronizacaoIbge).where(
+                SincronizacaoIbge.status == 'executando'
+            )
+        )
+        # terminou entre o INSERT e o SELECT: tenta de novo
+        return job or await iniciar_sincronizacao(session)
+
+    _tasks[job_id] = asyncio.create_task(sincronizar(job_id))
+    return await session.get(SincronizacaoIbge, job_id)
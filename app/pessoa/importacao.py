@@ -0,0 +1,184 @@
+"""Importacao em lote de pessoas a partir de CSV.
+
+O arquivo e lido em streaming, em lotes de `batch_size` linhas. Para cada
+lote: normaliza e valida os cpf_cnpj de uma vez (validate.py), descarta
+os repetidos no proprio arquivo e os ja cadastrados (uma consulta por
+lote), resolve o cep_id pelo mapa carregado no inicio e grava com um
+INSERT ... ON CONFLICT (cpf_cnpj) DO NOTHING de varias linhas. Linhas
+recusadas vao para o relatorio de rejeitados com o numero da linha e o
+motivo.
+
+Colunas esperadas (cabecalho): cpf_cnpj, rua, numero, complemento, cep,
+rg, ie, email, telefone.
+"""
+import csv
+from dataclasses import dataclass, field
+
+from sqlalchemy import String, any_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session
+
+from app.core.util import get_numbers
+from app.pessoa.cep import normalizar_cep
+from app.pessoa.models import Cep, Pessoa
+from app.routers.validate import validate_documentos_batch
+
+COLUNAS_OBRIGATORIAS = ('cpf_cnpj', 'rua', 'numero', 'cep')
+TAMANHOS = {'rua': 255, 'numero': 10, 'rg': 11, 'ie': 12}
+OPCIONAIS = ('rg', 'ie', 'email', 'telefone')
+# linhas por INSERT (10 colunas: fica longe do limite de parametros)
+INSERT_CHUNK = 1000
+
+
+@dataclass
+class Rejeitado:
+    linha: int
+    cpf_cnpj: str
+    motivo: str
+
+
+@dataclass
+class ResultadoImportacao:
+    lidas: int = 0
+    inseridas: int = 0
+    rejeitados: list[Rejeitado] = field(default_factory=list)
+
+
+def ler_lotes(arquivo, batch_size: int):
+    """Gera lotes de (numero_da_linha, registro) de um CSV em texto."""
+    primeira = arquivo.readline()
+    if not primeira.strip():
+        raise ValueError('Arquivo vazio')
+    try:
+        dialeto = csv.Sniffer().sniff(primeira, delimiters=',;')
+    except csv.Error:
+        dialeto = csv.excel
+    cabecalho = [
+        coluna.strip().lower()
+        for coluna in next(csv.reader([primeira], dialeto))
+    ]
+    faltando = set(COLUNAS_OBRIGATORIAS) - set(cabecalho)
+    if faltando:
+        raise ValueError(
+            f'Colunas obrigatorias ausentes: {", ".join(sorted(faltando))}'
+        )
+
+    lote = []
+    # linha 1 e o cabecalho
+    for numero, registro in enumerate(
+        csv.DictReader(arquivo, fieldnames=cabecalho, dialect=dialeto), 2
+    ):
+        lote.append((numero, registro))
+        if len(lote) >= batch_size:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def mapa_ceps(session: Session):
+    """CEP (8 digitos) -> cep_id."""
+    rows = session.execute(select(Cep.cep, func.min(Cep.id)).group_by(Cep.cep))
+    return {normalizar_cep(cep): cep_id for cep, cep_id in rows}
+
+
+def _texto(registro: dict, coluna: str) -> str:
+    return (registro.get(coluna) or '').strip()
+
+
+def _motivo(registro: dict) -> str | None:
+    for coluna in COLUNAS_OBRIGATORIAS:
+        if not _texto(registro, coluna):
+            return f'{coluna} vazio'
+    for coluna, tamanho in TAMANHOS.items():
+        if len(_texto(registro, coluna)) > tamanho:
+            return f'{coluna} maior que {tamanho} caracteres'
+    return None
+
+
+def preparar_lote(lote, ceps: dict, vistos: set, resultado):
+    """Valida o lote; devolve {cpf_cnpj: (linha, valores)} das aceitas.
+
+    `vistos` acumula os documentos ja aceitos no arquivo (dedup interno).
+    """
+    documentos = [get_numbers(_texto(r, 'cpf_cnpj')) for _, r in lote]
+    tipos, validos = validate_documentos_batch(documentos)
+
+    linhas = {}
+    for (numero, registro), documento, tipo, valido in zip(
+        lote, documentos, tipos.tolist(), validos.tolist()
+    ):
+        motivo = _motivo(registro)
+        cep_id = ceps.get(normalizar_cep(_texto(registro, 'cep')))
+        if motivo is None and not valido:
+            motivo = f'{tipo or "cpf_cnpj"} invalido'
+        if motivo is None and cep_id is None:
+            motivo = 'CEP nao cadastrado'
+        if motivo is None and (documento in vistos or documento in linhas):
+            motivo = 'cpf_cnpj repetido no arquivo'
+
+        if motivo is not None:
+            resultado.rejeitados.append(
+                Rejeitado(numero, _texto(registro, 'cpf_cnpj'), motivo)
+            )
+            continue
+
+        linhas[documento] = (
+            numero,
+            {
+                'cpf_cnpj': documento,
+                'rua': _texto(registro, 'rua'),
+                'numero': _texto(registro, 'numero'),
+                'complemento': _texto(registro, 'complemento'),
+                'cep_id': cep_id,
+                'is_blocked': False,
+                **{c: _texto(registro, c) or None for c in OPCIONAIS},
+            },
+        )
+    return linhas
+
+
+def _separar_existentes(linhas: dict, existentes, resultado):
+    for documento in existentes:
+        numero, _ = linhas.pop(documento)
+        resultado.rejeitados.append(
+            Rejeitado(numero, documento, 'cpf_cnpj ja cadastrado')
+        )
+    return [linha for _, linha in linhas.values()]
+
+
+def _consulta_existentes(linhas: dict):
+    # um unico parametro (array) qualquer que seja o tamanho do lote
+    documentos = bindparam('documentos', list(linhas), type_=ARRAY(String))
+    return select(Pessoa.cpf_cnpj).where(Pessoa.cpf_cnpj == any_(documentos))
+
+
+def _inserts(linhas: list):
+    for inicio in range(0, len(linhas), INSERT_CHUNK):
+        yield (
+            insert(Pessoa)
+            .values(linhas[inicio : inicio + INSERT_CHUNK])
+            .on_conflict_do_nothing(index_elements=['cpf_cnpj'])
+            # rowcount de INSERT nao e confiavel no driver: conta o RETURNING
+            .returning(Pessoa.cpf_cnpj)
+        )
+
+
+def importar(session: Session, arquivo, batch_size: int = 5000, eco=None):
+    resultado = ResultadoImportacao()
+    ceps = mapa_ceps(session)
+    vistos = set()
+
+    for lote in ler_lotes(arquivo, batch_size):
+        resultado.lidas += len(lote)
+        linhas = preparar_lote(lote, ceps, vistos, resultado)
+        if linhas:
+            existentes = session.scalars(_consulta_existentes(linhas)).all()
+            novas = _separar_existentes(linhas, existentes, resultado)
+            vistos.update(linhas)
+            for stmt in _inserts(novas):
+                resultado.inseridas += len(session.scalars(stmt).all())
+        session.commit()
+        if eco is not None:
+            eco(resultado)
+    return resultado
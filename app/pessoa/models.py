@@ -5,10 +5,13 @@ from enum import Enum
 from dateutil.relativedelta import relativedelta
 from sqlalchemy import (
     ForeignKey,
+    Index,
     String,
     UniqueConstraint,
     func,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import (
     Mapped,
     Session,
@@ -106,6 +109,45 @@ class Cep(Base):
     bairro_id: Mapped[int] = mapped_column(ForeignKey('bairro.id'))
 
 
+@table_registry.mapped_as_dataclass
+class ConsultaExterna(Base):
+    """Cache persistido das consultas de CEP/CNPJ (ViaCEP, ReceitaWS)."""
+    __tablename__ = 'consulta_externa'
+
+    tipo: Mapped[str] = mapped_column(String(10), primary_key=True)
+    chave: Mapped[str] = mapped_column(String(14), primary_key=True)
+    dados: Mapped[dict] = mapped_column(JSONB)
+    expira_em: Mapped[datetime] = mapped_column(index=True)
+    consultado_em: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+
+
+@table_registry.mapped_as_dataclass
+class SincronizacaoIbge(Base):
+    """Jobs de /pessoa/atualizar: no banco, visiveis a todos os workers."""
+    __tablename__ = 'sincronizacao_ibge'
+    __table_args__ = (
+        # no maximo um job em execucao, entre todos os workers
+        Index(
+            'ix_sincronizacao_ibge_executando',
+            'status',
+            unique=True,
+            postgresql_where=text("status = 'executando'"),
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    # executando | concluido | erro
+    status: Mapped[str] = mapped_column(String(12))
+    iniciado_em: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+    finalizado_em: Mapped[datetime | None] = mapped_column(default=None)
+    resumo: Mapped[dict] = mapped_column(JSONB, default_factory=dict)
+    erro: Mapped[str | None] = mapped_column(default=None)
+
+
 #@table_registry.mapped_as_dataclass
 #class Endereco(Base):
 #    __tablename__ = 'endereco'
@@ -1,5 +1,7 @@
 
-from pydantic import BaseModel
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
 
 class UFIn(BaseModel):
     sigla: str
@@ -40,3 +42,14 @@ class MunicipioOut(MunicipioIn):
 class MunicipioList(BaseModel):
     rows: list[MunicipioOut]
     total_records: int
+
+
+class SyncJobSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    status: str
+    iniciado_em: datetime
+    finalizado_em: datetime | None = None
+    resumo: dict
+    erro: str | None = None
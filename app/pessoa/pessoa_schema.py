@@ -0,0 +1,35 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+TipoDocumento = Literal['cpf', 'cnpj']
+
+
+class ValidateBatchIn(BaseModel):
+    documentos: list[str] = Field(max_length=50_000)
+    # sem tipo: decide pela quantidade de digitos (11 cpf, 14 cnpj)
+    tipo: TipoDocumento | None = None
+
+
+class ValidateBatchItem(BaseModel):
+    documento: str
+    tipo: TipoDocumento | None
+    valido: bool
+
+
+class ValidateBatchOut(BaseModel):
+    rows: list[ValidateBatchItem]
+    total_validos: int
+    total_invalidos: int
+
+
+class RejeitadoOut(BaseModel):
+    linha: int
+    cpf_cnpj: str
+    motivo: str
+
+
+class ImportacaoOut(BaseModel):
+    lidas: int
+    inseridas: int
+    rejeitados: list[RejeitadoOut]
@@ -0,0 +1,148 @@
+"""Cache em memoria das tabelas de referencia (Regiao, Uf e Municipio).
+
+Os dados mudam raramente (so pela sincronizacao com o IBGE), entao sao
+carregados uma vez por processo e servidos direto da memoria. Cada carga
+monta um `Snapshot` novo e imutavel, trocado atomicamente: quem ja pegou
+o snapshot anterior continua lendo dados consistentes.
+
+O snapshot e de cada worker. Para que todos sigam a sincronizacao feita
+em um deles, cada worker confere no banco, no maximo a cada
+REFERENCIA_VERIFICAR_SEGUNDOS, se ha sincronizacao concluida mais nova
+que a do seu snapshot e, havendo, recarrega. O ETag e o hash dos dados,
+entao workers atualizados servem o mesmo ETag.
+"""
+import hashlib
+import json
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime
+from time import monotonic
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_engine
+from app.core.settings import Settings
+from app.pessoa.models import Municipio, Regiao, SincronizacaoIbge, Uf
+
+settings = Settings()
+
+
+def normalizar_nome(nome: str) -> str:
+    """'São João' -> 'sao joao' (sem acentos, minusculo, espacos unicos)."""
+    sem_acento = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore')
+    return ' '.join(sem_acento.decode().lower().split())
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    etag: str
+    regioes: dict[int, dict]
+    ufs: dict[int, dict]
+    ufs_por_sigla: dict[str, dict]
+    municipios: dict[int, dict]
+    # municipios de cada uf, ja ordenados por nome
+    municipios_por_uf: dict[int, list[dict]]
+    municipios_por_nome: dict[tuple[int, str], dict]
+
+    @classmethod
+    def montar(cls, regioes: list, ufs: list, municipios: list):
+        ufs = sorted(ufs, key=lambda uf: uf['sigla'])
+        municipios = sorted(
+            municipios, key=lambda m: (normalizar_nome(m['nome']), m['id'])
+        )
+
+        por_uf = {uf['id']: [] for uf in ufs}
+        for municipio in municipios:
+            por_uf.setdefault(municipio['uf_id'], []).append(municipio)
+
+        conteudo = json.dumps(
+            [regioes, ufs, municipios], sort_keys=True, default=str
+        ).encode()
+
+        return cls(
+            etag=f'W/"{hashlib.sha1(conteudo).hexdigest()}"',
+            regioes={regiao['id']: regiao for regiao in regioes},
+            ufs={uf['id']: uf for uf in ufs},
+            ufs_por_sigla={uf['sigla'].upper(): uf for uf in ufs},
+            municipios={m['id']: m for m in municipios},
+            municipios_por_uf=por_uf,
+            municipios_por_nome={
+                (m['uf_id'], normalizar_nome(m['nome'])): m
+                for m in municipios
+            },
+        )
+
+    def municipio_por_nome(self, uf_sigla: str, nome: str) -> dict | None:
+        uf = self.ufs_por_sigla.get(uf_sigla.upper())
+        if uf is None:
+            return None
+        return self.municipios_por_nome.get((uf['id'], normalizar_nome(nome)))
+
+
+async def ultima_sincronizacao(session: AsyncSession) -> datetime | None:
+    return await session.scalar(
+        select(func.max(SincronizacaoIbge.finalizado_em)).where(
+            SincronizacaoIbge.status == 'concluido'
+        )
+    )
+
+
+class ReferenceStore:
+    def __init__(
+        self, intervalo: float = settings.REFERENCIA_VERIFICAR_SEGUNDOS
+    ):
+        self.intervalo = intervalo
+        self._snapshot: Snapshot | None = None
+        # ultima sincronizacao concluida quando o snapshot foi carregado
+        self._versao: datetime | None = None
+        self._verificado_em = 0.0
+
+    @property
+    def snapshot(self) -> Snapshot | None:
+        return self._snapshot
+
+    def trocar(self, snapshot: Snapshot, versao: datetime | None = None):
+        self._snapshot = snapshot
+        self._versao = versao
+        self._verificado_em = monotonic()
+
+    async def carregar(self, session: AsyncSession | None = None) -> Snapshot:
+        """Le as tres tabelas e troca o snapshot vigente."""
+        if session is None:
+            async with AsyncSession(async_engine) as nova_sessao:
+                return await self.carregar(nova_sessao)
+
+        async def _linhas(*colunas):
+            result = await session.execute(select(*colunas))
+            return [dict(row._mapping) for row in result]
+
+        # lida antes das tabelas: uma sincronizacao que termine durante a
+        # carga ainda aparece como mais nova na proxima verificacao
+        versao = await ultima_sincronizacao(session)
+        snapshot = Snapshot.montar(
+            await _linhas(Regiao.id, Regiao.nome, Regiao.sigla),
+            await _linhas(Uf.id, Uf.sigla, Uf.nome),
+            await _linhas(Municipio.id, Municipio.nome, Municipio.uf_id),
+        )
+        self.trocar(snapshot, versao)
+        return snapshot
+
+    async def obter(self, session: AsyncSession) -> Snapshot:
+        # carga preguicosa caso o startup nao tenha conseguido carregar
+        if self._snapshot is None:
+            return await self.carregar(session)
+
+        if monotonic() - self._verificado_em >= self.intervalo:
+            self._verificado_em = monotonic()
+            if await ultima_sincronizacao(session) != self._versao:
+                return await self.carregar(session)
+
+        return self._snapshot
+
+    def limpar(self):
+        self._snapshot = None
+        self._versao = None
+
+
+referencia = ReferenceStore()
@@ -25,96 +25,100 @@ def save_states_and_citys():
 
 from http import HTTPStatus
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import asc, func, select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_session
-from app.pessoa.apis import getCityforState, getStates
-from app.pessoa.models import Municipio, Regiao, Uf
-from app.pessoa.municipio_schema import MunicipioList, UfList
+from app.core.database import get_async_session
+from app.pessoa.ibge_sync import iniciar_sincronizacao
+from app.pessoa.models import SincronizacaoIbge
+from app.pessoa.municipio_schema import MunicipioList, SyncJobSchema, UfList
+from app.pessoa.referencia import normalizar_nome, referencia
 
 
 router = APIRouter(prefix='/pessoa', tags=['municipio'])
-T_Session = Annotated[Session, Depends(get_session)]
+T_AsyncSession = Annotated[AsyncSession, Depends(get_async_session)]
 
+# o ETag muda a cada sincronizacao; entre elas o cliente pode reaproveitar
+CACHE_CONTROL = 'public, max-age=3600, must-revalidate'
 
-@router.get('/atualizar')
-def update_municipios(session: T_Session):
-    # salva stados e cidades via api ibge
-    list_uf = getStates()
-    for _uf in list_uf:
-        unidade = session.get(Uf, _uf.get('id'))
-        if not unidade:
-            unidade = Uf(
-                id=_uf.get('id'),
-                sigla=_uf.get('sigla'),
-                nome=_uf.get('nome')
-            )
-            session.add(unidade)
-        
-        regiao = session.get(Regiao, _uf.get('regiao').get('id'))
-        if not regiao:
-            regiao = Regiao(
-                id=_uf.get('regiao').get('id'),
-                nome=_uf.get('regiao').get('nome'),
-                sigla=_uf.get('regiao').get('sigla')
-            )
-            session.add(regiao)
-        
-        list_city = getCityforState(_uf.get('sigla'))
-        for city in list_city:
-            db_municipio = session.get(Municipio, city.get('id'))
-            if not db_municipio:
-                db_municipio = Municipio(
-                    id=city.get('id'),
-                    nome=city.get('nome'),
-                    uf_id=_uf.get('id'),
-                    uf=unidade,
-                )
-                session.add(db_municipio)
 
-        session.commit()
+@router.get(
+    '/atualizar',
+    status_code=HTTPStatus.ACCEPTED,
+    response_model=SyncJobSchema,
+)
+async def update_municipios(session: T_AsyncSession):
+    # salva stados e cidades via api ibge (em background)
+    return await iniciar_sincronizacao(session)
+
+
+@router.get('/atualizar/{job_id}', response_model=SyncJobSchema)
+async def get_update_municipios_job(session: T_AsyncSession, job_id: str):
+    job = await session.get(SincronizacaoIbge, job_id)
+
+    if job is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail='Job not found'
+        )
+
+    return job
+
+
+def _resposta_cacheada(request: Request, response: Response, etag: str):
+    """Aplica ETag/Cache-Control; devolve 304 se o cliente ja tem a versao."""
+    headers = {'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
 
 
 @router.get('/uf', response_model=UfList)
-def read_ufs(session: T_Session):
-    rows = session.scalars(
-        select(Uf).order_by(Uf.sigla)
-    ).all()
+async def read_ufs(
+    session: T_AsyncSession, request: Request, response: Response
+):
+    snapshot = await referencia.obter(session)
+
+    if nao_modificado := _resposta_cacheada(request, response, snapshot.etag):
+        return nao_modificado
 
-    return {'rows': rows}
+    return {'rows': list(snapshot.ufs.values())}
 
 
 @router.get('/cidades/{uf_id}', response_model=MunicipioList)
-def read_cidades_by_uf(
-    session:T_Session,
+async def read_cidades_by_uf(  # noqa: PLR0913, PLR0917
+    session: T_AsyncSession,
+    request: Request,
+    response: Response,
     uf_id: int,
     page: int = 1,
-    page_size: int = 10
+    page_size: int = 10,
+    nome: str | None = None,
 ):
     skip = (page - 1) * page_size
     limit = page_size
 
-    db_uf = session.get(Uf, uf_id)
-    
-    if db_uf is None:
+    snapshot = await referencia.obter(session)
+
+    if uf_id not in snapshot.ufs:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='UF not found'
         )
 
-    query = select(Municipio).where(
-        (Municipio.uf_id == uf_id)
-    )
-    total_records = session.scalar(
-        select(func.count()).select_from(query.subquery())
-    )
-
-    rows = session.scalars(
-        query.order_by(asc(Municipio.nome))
-        .offset(skip)
-        .limit(limit)
-    ).all()
-
-    return {'rows': rows, 'total_records': total_records}
\ No newline at end of file
+    if nao_modificado := _resposta_cacheada(request, response, snapshot.etag):
+        return nao_modificado
+
+    municipios = snapshot.municipios_por_uf[uf_id]
+    if nome:
+        prefixo = normalizar_nome(nome)
+        municipios = [
+            m for m in municipios
+            if normalizar_nome(m['nome']).startswith(prefixo)
+        ]
+
+    return {
+        'rows': municipios[skip : skip + limit],
+        'total_records': len(municipios),
+    }
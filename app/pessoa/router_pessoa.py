@@ -0,0 +1,109 @@
+import io
+from dataclasses import asdict
+from http import HTTPStatus
+from typing import Annotated
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import get_async_session, get_session
+from app.core.security import (
+    Principal,
+    get_current_user,
+    verify_user_with_roles_and_permissions,
+)
+from app.pessoa.apis import (
+    RateLimitExceeded,
+    getDadosCNPJAsync,
+)
+from app.pessoa.cep import resolver_cep
+from app.pessoa.importacao import importar
+from app.pessoa.pessoa_schema import (
+    ImportacaoOut,
+    ValidateBatchIn,
+    ValidateBatchOut,
+)
+from app.routers.validate import validate_documentos_batch
+
+router = APIRouter(prefix='/pessoa', tags=['pessoa'])
+T_Session = Annotated[Session, Depends(get_session)]
+T_AsyncSession = Annotated[AsyncSession, Depends(get_async_session)]
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
+
+
+async def _consultar(consulta, session: AsyncSession, valor: str, nome: str):
+    try:
+        dados = await consulta(session, valor)
+    except RateLimitExceeded:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='Limite de consultas excedido, tente novamente',
+        )
+    except httpx.HTTPError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_GATEWAY,
+            detail='Servico de consulta indisponivel',
+        )
+
+    if dados is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail=f'{nome} not found'
+        )
+    return dados
+
+
+@router.get('/cep/{cep}')
+async def read_cep(session: T_AsyncSession, user: T_CurrentUser, cep: str):
+    return await _consultar(resolver_cep, session, cep, 'CEP')
+
+
+@router.get('/cnpj/{cnpj}')
+async def read_cnpj(session: T_AsyncSession, user: T_CurrentUser, cnpj: str):
+    return await _consultar(getDadosCNPJAsync, session, cnpj, 'CNPJ')
+
+
+@router.post('/validate/batch', response_model=ValidateBatchOut)
+def validate_batch(payload: ValidateBatchIn):
+    tipos, validos = validate_documentos_batch(
+        payload.documentos, payload.tipo
+    )
+    total_validos = int(validos.sum())
+
+    return {
+        'rows': [
+            {'documento': documento, 'tipo': tipo, 'valido': valido}
+            for documento, tipo, valido in zip(
+                payload.documentos, tipos.tolist(), validos.tolist()
+            )
+        ],
+        'total_validos': total_validos,
+        'total_invalidos': len(payload.documentos) - total_validos,
+    }
+
+
+# def (nao async): leitura, parse do CSV e validacao sao bloqueantes e
+# rodam no threadpool, sem parar o event loop durante arquivos grandes
+@router.post('/import', response_model=ImportacaoOut)
+def import_pessoas(
+    session: T_Session,
+    user: T_CurrentUser,
+    arquivo: UploadFile,
+    batch_size: int = 5000,
+):
+    verify_user_with_roles_and_permissions(
+        user, permissions=['pessoa.importar']
+    )
+    # o upload ja esta em arquivo temporario; le linha a linha
+    texto = io.TextIOWrapper(arquivo.file, encoding='utf-8-sig')
+    try:
+        resultado = importar(session, texto, batch_size)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail=str(e)
+        )
+    finally:
+        texto.detach()
+
+    return asdict(resultado)
@@ -4,13 +4,15 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select, func
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.core.database import get_session
+from app.core.database import get_async_session
 from app.core.security import (
+    Principal,
     create_access_token,
     get_current_user,
-    verify_password,
+    verify_password_async,
 )
 from app.models.models import Permission, Role, User, UserRoles
 from app.schemas.permissioes_schema import (
@@ -20,16 +22,16 @@ from app.schemas.schemas import Message, Token
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 
-T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+T_Session = Annotated[AsyncSession, Depends(get_async_session)]
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.post('/token', response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
+    session: T_Session,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session),
 ):
-    user = session.scalar(
+    user = await session.scalar(
         select(User).where(User.username == form_data.username)
     )
 
@@ -45,7 +47,7 @@ def login_for_access_token(
             detail='Incorrect status, username or password',
         )
 
-    if not verify_password(form_data.password, user.password):
+    if not await verify_password_async(form_data.password, user.password):
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Incorrect username or password',
@@ -70,7 +72,7 @@ def login_for_access_token(
 
 
 @router.post('/refresh_token', response_model=Token)
-def refresh_access_token(user: User = Depends(get_current_user)):
+def refresh_access_token(user: Principal = Depends(get_current_user)):
     new_access_token = create_access_token(data={'sub': user.username})
 
     return {'access_token': new_access_token, 'token_type': 'Bearer'}
@@ -86,10 +88,14 @@ async def verify_user_token(
 
 
 @router.get('/modules', response_model=ModuleListSchema)
-async def get_user_modules(current_user: T_CurrentUser, session: T_Session):
+async def get_user_modules(
+    current_user: T_CurrentUser, session: T_Session
+):
     # Obtém as roles do usuário atual
-    user_roles = session.scalars(
-        select(UserRoles).where(UserRoles.user_id == current_user.id)
+    user_roles = (
+        await session.scalars(
+            select(UserRoles).where(UserRoles.user_id == current_user.id)
+        )
     ).all()
 
     # Coleta os IDs das roles
@@ -101,8 +107,13 @@ async def get_user_modules(current_user: T_CurrentUser, session: T_Session):
         )
 
     # Obtém as permissões associadas às roles
-    permissions = session.scalars(
-        select(Permission).join(Role.permissions).where(Role.id.in_(role_ids))
+    permissions = (
+        await session.scalars(
+            select(Permission)
+            .options(selectinload(Permission.module))
+            .join(Role.permissions)
+            .where(Role.id.in_(role_ids))
+        )
     ).all()
 
     if not permissions:
@@ -0,0 +1,29 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from app.core.database import settings, sql_tracer
+from app.core.security import (
+    Principal,
+    get_current_user,
+    verify_user_with_roles_and_permissions,
+)
+from app.schemas.diagnostico_schema import SqlTracesSchema
+
+router = APIRouter(prefix='/admin', tags=['admin'])
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
+
+
+@router.get('/sql-traces', response_model=SqlTracesSchema)
+async def read_sql_traces(
+    user_current: T_CurrentUser,
+    limit: Annotated[int, Query(ge=1, le=500)] = 20,
+):
+    verify_user_with_roles_and_permissions(
+        user_current, permissions=['is_superuser']
+    )
+    return {
+        'ativo': settings.SQL_TRACE_ENABLED,
+        'limiar_ms': sql_tracer.limiar_ms,
+        'traces': sql_tracer.ultimos(limit),
+    }
@@ -6,8 +6,12 @@ from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.core.database import get_session
-from app.core.security import get_current_user, verify_user_with_roles_and_permissions
-from app.models.models import Module, Permission, User
+from app.core.security import (
+    Principal,
+    get_current_user,
+    verify_user_with_roles_and_permissions,
+)
+from app.models.models import Module, Permission
 from app.schemas.permissioes_schema import (
     ModuleOutSchema,
     PermissionListSchema,
@@ -19,7 +23,7 @@ from app.schemas.schemas import Message
 
 router = APIRouter(prefix='/permissoes', tags=['permission'])
 T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.get('/permission', response_model=PermissionListSchema)
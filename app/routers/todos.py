@@ -5,8 +5,7 @@ from sqlalchemy.orm import Session
 
 from app.controllers.todo_controller import TodoController
 from app.core.database import get_session
-from app.core.security import get_current_user
-from app.models.models import User
+from app.core.security import Principal, get_current_user
 from app.schemas.schemas import (
     Message,
     TodoList,
@@ -18,7 +17,7 @@ from app.schemas.schemas import (
 router = APIRouter(prefix='/todos', tags=['todos'])
 
 T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+T_CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.post('/', response_model=TodoPublic)
@@ -5,13 +5,15 @@ from typing import Annotated
 import pytz
 from fastapi import APIRouter, Body, Depends, HTTPException, Path
 from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_session
+from app.core.database import get_async_session
 from app.core.security import (
+    Principal,
     get_current_active_user,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    invalidate_principal,
+    verify_password_async,
     verify_user_with_roles_and_permissions,
 )
 from app.core.util import get_data_now_for_time_zone
@@ -32,14 +34,14 @@ from app.schemas.schemas import (
 )
 
 router = APIRouter(prefix='/users', tags=['users'])
-T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[User, Depends(get_current_active_user)]
+T_Session = Annotated[AsyncSession, Depends(get_async_session)]
+T_CurrentUser = Annotated[Principal, Depends(get_current_active_user)]
 
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
 async def create_user(user: UserSchema, session: T_Session, user_current: T_CurrentUser):
     verify_user_with_roles_and_permissions(user_current, permissions=["is_superuser"])
-    db_user = session.scalar(
+    db_user = await session.scalar(
         select(User).where(
             (User.email == user.email) | (User.username == user.username)
         )
@@ -55,7 +57,7 @@ async def create_user(user: UserSchema, session: T_Session, user_current: T_Curr
             detail='Username already registered',
         )
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
 
     db_user = User(
         email=user.email,
@@ -72,8 +74,8 @@ async def create_user(user: UserSchema, session: T_Session, user_current: T_Curr
     db_user.otp_created_at = get_data_now_for_time_zone()
 
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    await session.commit()
+    await session.refresh(db_user)
     return db_user
 
 
@@ -83,9 +85,11 @@ async def read_users(session: T_Session, user: T_CurrentUser, page: int = 1, pag
     skip = (page - 1) * page_size
     limit = page_size
 
-    total_records = session.scalar(select(func.count(User.id)))
-    users = session.scalars(
-        select(User).order_by(User.id).offset(skip).limit(limit)
+    total_records = await session.scalar(select(func.count(User.id)))
+    users = (
+        await session.scalars(
+            select(User).order_by(User.id).offset(skip).limit(limit)
+        )
     ).all()
     return {
         'users': users,
@@ -102,7 +106,7 @@ async def get_user_by_username(
     username: str = Path(..., title='nome de usuario'),
 ):
     verify_user_with_roles_and_permissions(user_current, permissions=["is_superuser"])
-    user = User.get_by_username(session, username)
+    user = await User.get_by_username(session, username)
     if user is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
@@ -120,7 +124,9 @@ async def get_user_like_by_username(
     page_size: int = 10,
 ):
     verify_user_with_roles_and_permissions(user, permissions=["is_superuser"])
-    db_rows = User.get_like_by_username(session, username, page, page_size)
+    db_rows = await User.get_like_by_username(
+        session, username, page, page_size
+    )
 
     return db_rows
 
@@ -132,7 +138,7 @@ async def get_user_by_id(
     user_id: int = Path(..., title='The ID of the user to retrieve'),
 ):
     verify_user_with_roles_and_permissions(user, permissions=["is_superuser"])
-    db_user = session.get(User, user_id)
+    db_user = await session.get(User, user_id)
     if db_user is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
@@ -147,20 +153,22 @@ async def update_user(
     user_id: int,
     user: UserSchema,
     session: T_Session,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     if current_user.id != user_id:
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST, detail='Not enough permissions'
         )
 
-    current_user.username = user.username
-    current_user.password = get_password_hash(user.password)
-    current_user.email = user.email
-    session.commit()
-    session.refresh(current_user)
+    db_user = await session.get(User, current_user.id)
+    db_user.username = user.username
+    db_user.password = await get_password_hash_async(user.password)
+    db_user.email = user.email
+    await session.commit()
+    await session.refresh(db_user)
+    invalidate_principal(db_user.id)
 
-    return current_user
+    return db_user
 
 
 @router.put('/update-password/', response_model=Message)
@@ -169,22 +177,22 @@ async def update_password(
     current_user: T_CurrentUser,
     data: UpdatePasswordRequest,
 ):
-    db_user = session.get(User, current_user.id)
+    db_user = await session.get(User, current_user.id)
     if db_user is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='User not found',
         )
 
-    if not verify_password(data.password, db_user.password):
+    if not await verify_password_async(data.password, db_user.password):
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Incorrect password',
         )
 
-    db_user.password = get_password_hash(data.new_password)
-    session.commit()
-    session.refresh(db_user)
+    db_user.password = await get_password_hash_async(data.new_password)
+    await session.commit()
+    await session.refresh(db_user)
 
     return {'message': 'Senha atualizada'}
 
@@ -197,16 +205,16 @@ async def update_user_password(
     password: UserPasswordUpdate = Body(...),
 ):
     verify_user_with_roles_and_permissions(user_current, permissions=["is_superuser"])
-    db_user = session.get(User, user_id)
+    db_user = await session.get(User, user_id)
     if db_user is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='User not found',
         )
 
-    db_user.password = get_password_hash(password.password)
-    session.commit()
-    session.refresh(db_user)
+    db_user.password = await get_password_hash_async(password.password)
+    await session.commit()
+    await session.refresh(db_user)
 
     return db_user
 
@@ -219,7 +227,9 @@ async def update_user_by_id(
     session: T_Session,
 ):
     verify_user_with_roles_and_permissions(user_current, permissions=["is_superuser"])
-    db_user = session.scalar(select(User).where(User.id == user_id))
+    db_user = await session.scalar(
+        select(User).where(User.id == user_id)
+    )
 
     if user.id != user_id:
         raise HTTPException(
@@ -231,7 +241,7 @@ async def update_user_by_id(
             status_code=HTTPStatus.NOT_FOUND, detail='User not found.'
         )
 
-    db_user2 = session.scalar(
+    db_user2 = await session.scalar(
         select(User).where(
             ((User.email == user.email) | (User.username == user.username))
             & (User.id != user.id)
@@ -253,8 +263,9 @@ async def update_user_by_id(
 
     db_user.updated_at = func.now()
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    await session.commit()
+    await session.refresh(db_user)
+    invalidate_principal(user_id)
 
     return db_user
 
@@ -266,7 +277,9 @@ async def update_otp_user_by_id(
     session: T_Session,
 ):
     verify_user_with_roles_and_permissions(user_current, permissions=["is_superuser"])
-    db_user = session.scalar(select(User).where(User.id == user_id))
+    db_user = await session.scalar(
+        select(User).where(User.id == user_id)
+    )
 
     if not db_user:
         raise HTTPException(
@@ -281,8 +294,8 @@ async def update_otp_user_by_id(
         setattr(db_user, 'otp_auth_url', db_user.get_otp_auth_url())
         setattr(db_user, 'qr_code', str(db_user.get_qr_code()))
 
-        session.commit()
-        session.refresh(db_user)
+        await session.commit()
+        await session.refresh(db_user)
     except Exception as e:
         print(f'Erro ao update otp: {e}')
         raise
@@ -295,7 +308,7 @@ async def delete_user(
     user_id: int,
     user_current: T_CurrentUser,
     session: T_Session,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     verify_user_with_roles_and_permissions(user_current, permissions=["is_superuser"])
     if current_user.id != user_id:
@@ -303,8 +316,10 @@ async def delete_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
 
-    session.delete(current_user)
-    session.commit()
+    db_user = await session.get(User, current_user.id)
+    await session.delete(db_user)
+    await session.commit()
+    invalidate_principal(user_id)
 
     return {'message': 'User deleted'}
 
@@ -318,7 +333,7 @@ async def get_role_by_user_id(
     page_size: int = 10,
 ):
     verify_user_with_roles_and_permissions(user_current, permissions=["is_superuser"])
-    row = session.get(User, user_id)
+    row = await session.get(User, user_id)
     # user = session.query(User).filter_by(id=user_id).one_or_none()
 
     if row is None:
@@ -327,7 +342,9 @@ async def get_role_by_user_id(
         )
 
     # db_rows = user.roles.order_by(UserRoles.id.desc()).limit(10).all()
-    db_rows = UserRoles.get_role_by_user_id(session, user_id, page, page_size)
+    db_rows = await UserRoles.get_role_by_user_id(
+        session, user_id, page, page_size
+    )
 
     return db_rows
 
@@ -339,7 +356,7 @@ async def create_role_user(
     role_user: UserRolesIn
 ):
     verify_user_with_roles_and_permissions(user_current, permissions=["is_superuser"])
-    db_role_user = session.scalar(
+    db_role_user = await session.scalar(
         select(UserRoles).where(
             (UserRoles.user_id == role_user.user_id)
             & (UserRoles.role_id == role_user.role_id)
@@ -357,8 +374,9 @@ async def create_role_user(
     )
 
     session.add(db_role_user)
-    session.commit()
-    session.refresh(db_role_user)
+    await session.commit()
+    await session.refresh(db_role_user, ['role'])
+    invalidate_principal(db_role_user.user_id)
     return db_role_user
 
 
@@ -369,7 +387,7 @@ async def delete_role_user_by_id(
     user_current: T_CurrentUser
 ):
     verify_user_with_roles_and_permissions(user_current, permissions=["is_superuser"])
-    db_row = session.get(UserRoles, user_role_id)
+    db_row = await session.get(UserRoles, user_role_id)
 
     if db_row is None:
         raise HTTPException(
@@ -377,7 +395,8 @@ async def delete_role_user_by_id(
             detail='User role not found.',
         )
 
-    session.delete(db_row)
-    session.commit()
+    await session.delete(db_row)
+    await session.commit()
+    invalidate_principal(db_row.user_id)
 
     return {'message': 'User role deletado'}
@@ -1,30 +1,95 @@
-import re
+import numpy as np
+
+TAMANHO_CPF = 11
+TAMANHO_CNPJ = 14
+
+PESOS_CPF = (
+    np.arange(10, 1, -1),
+    np.arange(11, 1, -1),
+)
+PESOS_CNPJ = (
+    np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]),
+    np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]),
+)
+
+
+def matriz_digitos(documentos, tamanho: int):
+    """Extrai os digitos de cada documento de uma vez.
+
+    Retorna `(digitos, ok)`: matriz (n, tamanho) de inteiros e a mascara
+    das linhas que tinham exatamente `tamanho` digitos (as demais linhas
+    da matriz ficam zeradas).
+    """
+    textos = np.asarray(
+        ['' if doc is None else str(doc) for doc in documentos], dtype=str
+    )
+    largura = max(textos.dtype.itemsize // 4, 1)
+    codigos = np.ascontiguousarray(textos, dtype=f'<U{largura}')
+    codigos = codigos.view(np.uint32).reshape(len(textos), largura)
+
+    e_digito = (codigos >= ord('0')) & (codigos <= ord('9'))
+    ok = e_digito.sum(axis=1) == tamanho
+
+    digitos = np.zeros((len(textos), tamanho), dtype=np.int64)
+    if ok.any():
+        digitos[ok] = (
+            codigos[ok][e_digito[ok]].reshape(-1, tamanho) - ord('0')
+        )
+    return digitos, ok
+
+
+def _digito_verificador(digitos, pesos):
+    resto = (digitos[:, : len(pesos)] @ pesos) % 11
+    return np.where(resto < 2, 0, 11 - resto)  # noqa: PLR2004
+
+
+def _validar(documentos, tamanho: int, pesos):
+    """Retorna `(validos, tamanho_ok)`."""
+    digitos, ok = matriz_digitos(documentos, tamanho)
+    # 000.000.000-00, 111.111.111-11 ... passam no calculo mas sao invalidos
+    repetidos = (digitos == digitos[:, :1]).all(axis=1)
+    valido = ok & ~repetidos
+    for posicao, peso in zip(range(len(pesos[0]), tamanho), pesos):
+        valido &= _digito_verificador(digitos, peso) == digitos[:, posicao]
+    return valido, ok
+
+
+def validate_cpf_batch(cpfs) -> np.ndarray:
+    """Valida uma lista/array de CPFs (com ou sem mascara)."""
+    return _validar(cpfs, TAMANHO_CPF, PESOS_CPF)[0]
+
+
+def validate_cnpj_batch(cnpjs) -> np.ndarray:
+    """Valida uma lista/array de CNPJs (com ou sem mascara)."""
+    return _validar(cnpjs, TAMANHO_CNPJ, PESOS_CNPJ)[0]
+
+
+def validate_documentos_batch(documentos, tipo: str | None = None):
+    """Valida CPFs e CNPJs misturados.
+
+    Retorna `(tipos, validos)`: o tipo de cada documento ('cpf', 'cnpj' ou
+    None quando a quantidade de digitos nao bate com nenhum) e a mascara
+    dos validos. Com `tipo` informado, todos sao tratados como esse tipo.
+    """
+    documentos = list(documentos)
+    if tipo == 'cpf':
+        tipos = np.full(len(documentos), 'cpf', dtype=object)
+        return tipos, validate_cpf_batch(documentos)
+    if tipo == 'cnpj':
+        tipos = np.full(len(documentos), 'cnpj', dtype=object)
+        return tipos, validate_cnpj_batch(documentos)
+
+    cpf_validos, e_cpf = _validar(documentos, TAMANHO_CPF, PESOS_CPF)
+    cnpj_validos, e_cnpj = _validar(documentos, TAMANHO_CNPJ, PESOS_CNPJ)
+    tipos = np.full(len(documentos), None, dtype=object)
+    tipos[e_cpf] = 'cpf'
+    tipos[e_cnpj] = 'cnpj'
+    return tipos, cpf_validos | cnpj_validos
 
 
 def validate_cpf(cpf: str) -> bool:
-    cpf = re.sub(r'\D', '', cpf)
-    if len(cpf) != int(11) or cpf == cpf[0] * len(cpf):
-        return False
-    for i in range(9, 11):
-        value = sum((int(cpf[num]) * ((i + 1) - num) for num in range(0, i)))
-        check = ((value * 10) % 11) % 10
-        if check != int(cpf[i]):
-            return False
-    return True
+    return bool(validate_cpf_batch([cpf])[0])
 
 
 def validate_cnpj(cnpj: str) -> bool:
-    cnpj = re.sub(r'\D', '', cnpj)
-    if len(cnpj) != int(14) or cnpj == cnpj[0] * len(cnpj):
-        return False
-    for i in range(12, 14):
-        value = sum(
-            (
-                int(cnpj[num]) * ((i - 7 if num >= i - 8 else i + 1) - num)
-                for num in range(0, i)
-            )
-        )
-        check = ((value * 10) % 11) % 10
-        if check != int(cnpj[i]):
-            return False
-    return True
+    return bool(validate_cnpj_batch([cnpj])[0])
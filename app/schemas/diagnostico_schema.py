@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ConsultaTraceSchema(BaseModel):
+    sql: str
+    parametros: str
+    duracao_ms: float
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RequisicaoTraceSchema(BaseModel):
+    metodo: str
+    caminho: str
+    inicio: datetime
+    duracao_ms: float
+    duracao_sql_ms: float
+    total_consultas: int
+    omitidas: int
+    consultas: list[ConsultaTraceSchema]
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SqlTracesSchema(BaseModel):
+    ativo: bool
+    limiar_ms: float
+    traces: list[RequisicaoTraceSchema]
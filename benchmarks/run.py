@@ -0,0 +1,275 @@
+"""Benchmark das rotas quentes da API contra um Postgres descartavel.
+
+Sobe um Postgres (testcontainers, como os testes) ou usa --database-url,
+gera a massa (seed.py), e chama cada cenario N vezes pelo TestClient,
+passando pela pilha inteira: middlewares, autenticacao, pools de conexao
+e serializacao. O resultado (requisicoes/s, media, p50/p95/p99 em ms)
+vai para um JSON que pode ser comparado com o de outro commit:
+
+    python -m benchmarks.run --saida benchmarks/baseline.json
+    python -m benchmarks.run --comparar benchmarks/baseline.json
+
+Com --comparar o processo termina com codigo 1 se o p95 de algum cenario
+piorar mais que --tolerancia.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter, sleep, time
+
+import click
+import pyotp
+
+# cenario: (metodo, caminho); os de relatorio tem paginacao padrao (10)
+CENARIOS = {
+    'auth_token': ('POST', '/auth/token'),
+    'get_current_user': ('GET', '/auth/verify-token'),
+    'read_negociacao': ('GET', '/juridico/negociacao'),
+    'read_negociacao_busca': (
+        'GET',
+        '/juridico/negociacao?searchTerm=EXECUTADO 4242',
+    ),
+    'read_negociacao_cursor': (
+        'GET',
+        '/juridico/negociacao?after=&include_total=false',
+    ),
+    'venci_na_semana': (
+        'GET',
+        '/juridico/negociacao/relatorio/venci-na-semana',
+    ),
+    'ha_venc_30d': ('GET', '/juridico/negociacao/relatorio/ha-venc-30d'),
+    'negoc_vencidos': ('GET', '/juridico/negociacao/relatorio/negoc-venvidos'),
+}
+
+
+def resumir(duracoes: list[float], total: float) -> dict:
+    """Estatisticas de uma serie de duracoes (segundos)."""
+    p = statistics.quantiles(duracoes, n=100, method='inclusive')
+    return {
+        'requisicoes': len(duracoes),
+        'rps': round(len(duracoes) / total, 2),
+        'media_ms': round(statistics.fmean(duracoes) * 1000, 3),
+        'p50_ms': round(p[49] * 1000, 3),
+        'p95_ms': round(p[94] * 1000, 3),
+        'p99_ms': round(p[98] * 1000, 3),
+    }
+
+
+def comparar(base: dict, atual: dict, tolerancia: float):
+    """Linhas (cenario, p95 base, p95 atual, variacao) e se houve regressao."""
+    linhas, regressao = [], False
+    for nome, resultado in atual['resultados'].items():
+        anterior = base['resultados'].get(nome)
+        if anterior is None:
+            linhas.append((nome, None, resultado['p95_ms'], None))
+            continue
+        variacao = resultado['p95_ms'] / anterior['p95_ms'] - 1
+        regressao = regressao or variacao > tolerancia
+        linhas.append((
+            nome,
+            anterior['p95_ms'],
+            resultado['p95_ms'],
+            variacao,
+        ))
+    return linhas, regressao
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+def _medir(client, preparar, repeticoes: int, aquecimento: int):
+    for _ in range(aquecimento):
+        client.request(**preparar())
+
+    duracoes = []
+    inicio = perf_counter()
+    for _ in range(repeticoes):
+        requisicao = preparar()
+        t0 = perf_counter()
+        response = client.request(**requisicao)
+        duracoes.append(perf_counter() - t0)
+        if response.status_code != 200:  # noqa: PLR2004
+            raise click.ClickException(
+                f'{response.request.url}: {response.status_code} '
+                f'{response.text[:200]}'
+            )
+    return resumir(duracoes, perf_counter() - inicio)
+
+
+def _codigo_totp(totp: pyotp.TOTP) -> str:
+    # perto da virada do intervalo o codigo expiraria durante o login
+    restante = totp.interval - time() % totp.interval
+    if restante < 1:
+        sleep(restante)
+    return totp.now()
+
+
+def _requisicoes(credenciais: tuple, otp_base32: str, headers: dict):
+    """Cenario -> funcao que monta os argumentos de `client.request`."""
+    usuario, senha = credenciais
+    totp = pyotp.TOTP(otp_base32)
+
+    def _login():
+        return {
+            'method': 'POST',
+            'url': '/auth/token',
+            'data': {
+                'username': usuario,
+                'password': senha,
+                'client_secret': _codigo_totp(totp),
+            },
+        }
+
+    def _get(caminho):
+        return lambda: {'method': 'GET', 'url': caminho, 'headers': headers}
+
+    return {
+        nome: _login if nome == 'auth_token' else _get(caminho)
+        for nome, (_, caminho) in CENARIOS.items()
+    }
+
+
+@click.command()
+@click.option(
+    '--database-url',
+    envvar='BENCH_DATABASE_URL',
+    help='Postgres ja existente (vazio); sem ela sobe um container.',
+)
+@click.option('--negociacoes', default=50_000, show_default=True)
+@click.option(
+    '--parcelas',
+    default=40,
+    show_default=True,
+    help='Parcelas por negociacao.',
+)
+@click.option('--repeticoes', default=200, show_default=True)
+@click.option('--aquecimento', default=20, show_default=True)
+@click.option(
+    '--cenario',
+    'cenarios',
+    multiple=True,
+    type=click.Choice(list(CENARIOS)),
+    help='Roda so estes cenarios (repetivel).',
+)
+@click.option(
+    '--saida',
+    type=click.Path(dir_okay=False, path_type=Path),
+    help='Grava o resultado em JSON.',
+)
+@click.option(
+    '--comparar',
+    'base',
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help='JSON de uma execucao anterior.',
+)
+@click.option('--tolerancia', default=0.10, show_default=True)
+def main(  # noqa: PLR0913, PLR0917
+    database_url,
+    negociacoes,
+    parcelas,
+    repeticoes,
+    aquecimento,
+    cenarios,
+    saida,
+    base,
+    tolerancia,
+):
+    with ExitStack() as pilha:
+        if not database_url:
+            from testcontainers.postgres import (  # noqa: PLC0415
+                PostgresContainer,
+            )
+
+            postgres = pilha.enter_context(
+                PostgresContainer('postgres:16', driver='psycopg')
+            )
+            database_url = postgres.get_connection_url()
+
+        # os engines da aplicacao sao criados no import, a partir do env
+        os.environ['DATABASE_URL'] = database_url
+        os.environ.setdefault('SECRET_KEY', 'benchmark')
+        os.environ.setdefault('ALGORITHM', 'HS256')
+        os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+
+        from fastapi.testclient import TestClient  # noqa: PLC0415
+
+        from app.app import app  # noqa: PLC0415
+        from app.core.database import engine  # noqa: PLC0415
+        from benchmarks import seed  # noqa: PLC0415
+
+        click.echo(
+            f'populando: {negociacoes} negociacoes, '
+            f'{negociacoes * parcelas} parcelas'
+        )
+        inicio = perf_counter()
+        seed.criar_schema(engine)
+        otp_base32 = seed.popular(engine, negociacoes, parcelas)
+        click.echo(f'massa pronta em {perf_counter() - inicio:.1f}s')
+
+        client = pilha.enter_context(TestClient(app))
+        credenciais = (seed.USUARIO, seed.SENHA)
+        login = client.request(
+            **_requisicoes(credenciais, otp_base32, {})['auth_token']()
+        )
+        headers = {'Authorization': f'Bearer {login.json()["access_token"]}'}
+        requisicoes = _requisicoes(credenciais, otp_base32, headers)
+
+        resultados = {}
+        for nome in cenarios or CENARIOS:
+            resultados[nome] = _medir(
+                client, requisicoes[nome], repeticoes, aquecimento
+            )
+            r = resultados[nome]
+            click.echo(
+                f'{nome:<24} {r["rps"]:>9.1f} req/s  p50 {r["p50_ms"]:>8.2f}'
+                f'  p95 {r["p95_ms"]:>8.2f}  p99 {r["p99_ms"]:>8.2f} ms'
+            )
+
+    atual = {
+        'commit': _commit(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'volumes': {
+            'negociacoes': negociacoes,
+            'parcelas_por_negociacao': parcelas,
+        },
+        'repeticoes': repeticoes,
+        'resultados': resultados,
+    }
+    if saida:
+        saida.write_text(json.dumps(atual, indent=2) + '\n')
+        click.echo(f'resultado gravado em {saida}')
+
+    if base:
+        anterior = json.loads(base.read_text())
+        linhas, regressao = comparar(anterior, atual, tolerancia)
+        click.echo(f'\np95 contra {base} ({anterior["commit"]}):')
+        if anterior['volumes'] != atual['volumes']:
+            click.echo(f'atencao: volumes diferentes {anterior["volumes"]}')
+        for nome, antes, depois, variacao in linhas:
+            if variacao is None:
+                click.echo(f'{nome:<24} {"-":>9} -> {depois:>9.2f} ms')
+            else:
+                click.echo(
+                    f'{nome:<24} {antes:>9.2f} -> {depois:>9.2f} ms'
+                    f'  ({variacao:+.1%})'
+                )
+        if regressao:
+            click.echo(f'regressao acima de {tolerancia:.0%} no p95')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
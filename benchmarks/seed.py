@@ -0,0 +1,133 @@
+"""Massa de dados do benchmark, gerada no proprio Postgres.
+
+INSERT ... SELECT sobre generate_series: milhoes de parcelas em segundos,
+sem passar pelo ORM (e sem os eventos que geram parcelas na insercao).
+As datas se espalham por dois anos para tras e para frente de `hoje`, e
+uma em cada cinco parcelas vencidas fica em aberto, para os relatorios
+de vencimento terem volume.
+"""
+from datetime import date
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.core.security import get_password_hash
+from app.juridico.models import table_registry as juridico_registry
+from app.juridico.resumo import recalcular
+from app.models.models import (
+    Module,
+    Permission,
+    Role,
+    RolePermissions,
+    User,
+    UserRoles,
+)
+from app.models.models import table_registry as models_registry
+
+USUARIO = 'bench'
+SENHA = 'bench-senha'
+
+NEGOCIACOES = text("""
+    INSERT INTO negociacao_credito (
+        processo, executado, contrato, val_devido, val_desconto, val_neg,
+        data_pri_parc, data_ult_parc, val_entrada, qtd_parc_ent,
+        is_term_ex_jud, is_hom_ext_jud, qtd, taxa_mes, val_parc,
+        is_cal_parc_mensal, is_cal_parc_entrada, is_descumprido,
+        is_liquidado, is_retorno_execucao
+    )
+    SELECT
+        lpad(n::text, 7, '0') || '-00.2023.8.27.2729',
+        'EXECUTADO ' || n,
+        'CT-' || n,
+        10000, 0, 9000,
+        CAST(:hoje AS date) - 730 + (n % 730),
+        CAST(:hoje AS date) - 730 + (n % 730) + 30 * :parcelas,
+        0, 0, false, false, :parcelas, 0,
+        round(9000.0 / :parcelas, 2),
+        false, false, false, false, false
+    FROM generate_series(1, :negociacoes) AS n
+""")
+
+PARCELAS = text("""
+    INSERT INTO parcelamento_negociacao (
+        negociacao_id, data, val_parcela, val_pago, obs_val_pago,
+        data_pgto, type, numero_parcela, is_pg, is_val_juros
+    )
+    SELECT
+        id, data, val_parc,
+        CASE WHEN paga THEN val_parc END, '',
+        CASE WHEN paga THEN data END,
+        1, numero, paga, false
+    FROM (
+        SELECT
+            c.id, c.val_parc, p AS numero,
+            (c.data_pri_parc + make_interval(months => p - 1))::date AS data,
+            (c.data_pri_parc + make_interval(months => p - 1))::date
+                < CAST(:hoje AS date)
+                AND (c.id + p) % 5 <> 0 AS paga
+        FROM negociacao_credito c
+        CROSS JOIN generate_series(1, :parcelas) AS p
+    ) AS parcelas
+""")
+
+
+def criar_schema(engine):
+    with engine.begin() as conexao:
+        conexao.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+    models_registry.metadata.create_all(engine)
+    juridico_registry.metadata.create_all(engine)
+
+
+def _dar_acesso_juridico(session, user_id: int):
+    # sem role/permissao o /auth/modules (SideNavbar) responde 404
+    def _inserir(modelo, **valores):
+        return session.scalar(
+            insert(modelo).values(**valores).returning(modelo.id)
+        )
+
+    module_id = _inserir(Module, title='Juridico')
+    permission_id = _inserir(
+        Permission, name='negociacao', description=None, module_id=module_id
+    )
+    role_id = _inserir(Role, name='juridico')
+    _inserir(RolePermissions, role_id=role_id, permission_id=permission_id)
+    _inserir(UserRoles, user_id=user_id, role_id=role_id)
+
+
+def popular(engine, negociacoes: int, parcelas: int, hoje: date = None):
+    """Cria o usuario do benchmark, as negociacoes, parcelas e resumos.
+
+    Devolve o segredo TOTP do usuario (o login exige o codigo).
+    """
+    hoje = hoje or date.today()
+    parametros = {
+        'hoje': hoje,
+        'negociacoes': negociacoes,
+        'parcelas': parcelas,
+    }
+
+    with Session(engine) as session:
+        usuario = User(
+            username=USUARIO,
+            password=get_password_hash(SENHA),
+            email=f'{USUARIO}@bench.local',
+            full_name='Benchmark',
+            otp_auth_url=None,
+            otp_base32=None,
+        )
+        session.add(usuario)
+        session.flush()
+        _dar_acesso_juridico(session, usuario.id)
+        session.commit()
+        otp_base32 = usuario.otp_base32
+
+    with engine.begin() as conexao:
+        conexao.execute(NEGOCIACOES, parametros)
+        conexao.execute(PARCELAS, parametros)
+        recalcular(conexao, hoje=hoje)
+
+    with engine.connect() as conexao:
+        conexao.execution_options(isolation_level='AUTOCOMMIT').execute(
+            text('VACUUM ANALYZE')
+        )
+    return otp_base32
@@ -3,5 +3,5 @@
 # Executa as migrações do banco de dados
 poetry run alembic upgrade head
 
-# Inicia a aplicação
-poetry run uvicorn --host 0.0.0.0 --port 8002 app.app:app
\ No newline at end of file
+# Inicia a aplicação (gunicorn + workers uvicorn, ver gunicorn.conf.py)
+exec poetry run gunicorn -c gunicorn.conf.py app.app:app
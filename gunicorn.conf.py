@@ -0,0 +1,46 @@
+"""Configuracao do gunicorn (workers uvicorn) para producao.
+
+Uso: gunicorn -c gunicorn.conf.py app.app:app
+
+Cada worker tem o proprio registro do prometheus_client; em modo
+multiprocesso os valores vao para arquivos em PROMETHEUS_MULTIPROC_DIR e
+o /metrics de qualquer worker agrega todos. O prometheus_client
+escolhe onde guardar os valores no import, entao a variavel precisa
+existir antes de qualquer import dele (inclusive o deste arquivo e o da
+aplicacao): e definida aqui, no master, e herdada pelos forks.
+"""
+
+import os
+import shutil
+from multiprocessing import cpu_count
+
+from app.core.settings import Settings
+
+settings = Settings()
+
+multiproc_dir = settings.PROMETHEUS_MULTIPROC_DIR
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = multiproc_dir
+
+bind = f'{settings.WEB_HOST}:{settings.WEB_PORT}'
+workers = settings.WEB_WORKERS or cpu_count()
+worker_class = 'uvicorn.workers.UvicornWorker'
+timeout = settings.WEB_TIMEOUT
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+keepalive = settings.WEB_KEEPALIVE
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS_JITTER
+accesslog = '-'
+
+
+def on_starting(server):
+    # arquivos de uma execucao anterior somariam contadores antigos
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # import tardio: so depois de PROMETHEUS_MULTIPROC_DIR estar definida
+    from prometheus_client import multiprocess  # noqa: PLC0415
+
+    # descarta as gauges "live" do worker que saiu
+    multiprocess.mark_process_dead(worker.pid)
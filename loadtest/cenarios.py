@@ -0,0 +1,207 @@
+"""Jornadas de usuario no padrao de chamadas do frontend (Next.js).
+
+Reproduz o que o navegador e o servidor do Next fazem contra a API:
+
+- login: POST /auth/token com usuario, senha e codigo OTP (NextAuth);
+- cada chamada do `lib/api.ts` passa antes pelo `getSession()`, que no
+  callback jwt do NextAuth faz GET /auth/verify-token;
+- toda pagina do dashboard monta o SideNavbar, que busca /auth/modules;
+- componentes da mesma pagina buscam em paralelo (ex.: as duas tabelas de
+  parcelas da negociacao).
+
+Os rotulos das metricas sao os templates das rotas, como no /metrics.
+"""
+import asyncio
+import random
+from dataclasses import dataclass, field
+from time import perf_counter, time
+
+import httpx
+import pyotp
+
+RELATORIOS = (
+    'negoc-venvidos',
+    'venci-na-semana',
+    'ha-venc-30d',
+)
+
+
+@dataclass
+class Credenciais:
+    usuario: str
+    senha: str
+    otp_base32: str
+
+
+@dataclass
+class Estatistica:
+    duracoes: list[float] = field(default_factory=list)
+    erros: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return len(self.duracoes) + sum(self.erros.values())
+
+
+class Coletor:
+    """Duracoes das respostas 2xx e contagem de erros por rotulo."""
+
+    def __init__(self):
+        self.inicio = perf_counter()
+        self.estatisticas: dict[str, Estatistica] = {}
+
+    def registrar(self, rotulo: str, duracao: float, erro: str = None):
+        estatistica = self.estatisticas.setdefault(rotulo, Estatistica())
+        if erro is None:
+            estatistica.duracoes.append(duracao)
+        else:
+            estatistica.erros[erro] = estatistica.erros.get(erro, 0) + 1
+
+
+class Sessao:
+    """Um usuario do frontend: token proprio, ids ja vistos, pausas."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        carga,
+        pensar: float,
+        rng: random.Random,
+    ):
+        self.client = client
+        self.carga = carga
+        self.tempo_pensar = pensar
+        self.rng = rng
+        self.headers = {}
+        self.negociacoes_vistas: list[dict] = []
+
+    async def chamar(self, rotulo: str, metodo: str, url: str, **kwargs):
+        inicio = perf_counter()
+        try:
+            response = await self.client.request(
+                metodo, url, headers=self.headers, **kwargs
+            )
+        except httpx.HTTPError as e:
+            self.carga.coletor.registrar(
+                rotulo, perf_counter() - inicio, type(e).__name__
+            )
+            return None
+        duracao = perf_counter() - inicio
+        if response.is_success:
+            self.carga.coletor.registrar(rotulo, duracao)
+            return response.json()
+        self.carga.coletor.registrar(
+            rotulo, duracao, str(response.status_code)
+        )
+        return None
+
+    async def login(self, credenciais: Credenciais) -> bool:
+        totp = pyotp.TOTP(credenciais.otp_base32)
+        # perto da virada do intervalo o codigo expiraria durante o login
+        restante = totp.interval - time() % totp.interval
+        if restante < 1:
+            await asyncio.sleep(restante)
+        dados = await self.chamar(
+            'POST /auth/token',
+            'POST',
+            '/auth/token',
+            data={
+                'username': credenciais.usuario,
+                'password': credenciais.senha,
+                'client_secret': totp.now(),
+            },
+        )
+        if dados is None:
+            return False
+        self.headers = {'Authorization': f'Bearer {dados["access_token"]}'}
+        return True
+
+    async def api(self, rotulo: str, url: str, params: dict = None):
+        # lib/api.ts: getSession() -> callback jwt -> verify-token
+        await self.chamar(
+            'GET /auth/verify-token', 'GET', '/auth/verify-token'
+        )
+        return await self.chamar(rotulo, 'GET', url, params=params)
+
+    async def abrir_pagina(self):
+        await self.api('GET /auth/modules', '/auth/modules')
+
+    async def pensar(self):
+        if self.tempo_pensar:
+            await asyncio.sleep(self.rng.expovariate(1 / self.tempo_pensar))
+
+
+async def listar_negociacoes(sessao: Sessao):
+    """Pagina /juridico/negociacao: lista, pagina e busca."""
+    await sessao.abrir_pagina()
+
+    async def _pagina(page: int, termo: str = ''):
+        dados = await sessao.api(
+            'GET /juridico/negociacao',
+            '/juridico/negociacao',
+            {'searchTerm': termo, 'page': page, 'page_size': 10},
+        )
+        if dados and dados['rows']:
+            sessao.negociacoes_vistas = dados['rows']
+        return dados
+
+    await _pagina(1)
+    for page in range(2, 2 + sessao.rng.randint(0, 2)):
+        await sessao.pensar()
+        await _pagina(page)
+
+    if sessao.negociacoes_vistas:
+        await sessao.pensar()
+        linha = sessao.rng.choice(sessao.negociacoes_vistas)
+        await _pagina(1, linha['executado'][:12])
+
+
+async def abrir_negociacao(sessao: Sessao):
+    """Pagina /juridico/negociacao/[id]: dados e as duas tabelas."""
+    if not sessao.negociacoes_vistas:
+        await listar_negociacoes(sessao)
+        if not sessao.negociacoes_vistas:
+            return
+        await sessao.pensar()
+
+    negociacao_id = sessao.rng.choice(sessao.negociacoes_vistas)['id']
+    await sessao.abrir_pagina()
+
+    def _parcelas(tipo: int, page: int = 1):
+        return sessao.api(
+            'GET /juridico/parcelamento',
+            f'/juridico/parcelamento?negociacao_id={negociacao_id}'
+            f'&type={tipo}&page={page}&page_size=10',
+        )
+
+    await asyncio.gather(
+        sessao.api(
+            'GET /juridico/negociacao/{negociacao_id}',
+            f'/juridico/negociacao/{negociacao_id}',
+        ),
+        _parcelas(1),
+        _parcelas(2),
+    )
+    if sessao.rng.random() < 0.5:  # noqa: PLR2004
+        await sessao.pensar()
+        await _parcelas(1, 2)
+
+
+async def dashboard(sessao: Sessao):
+    """Pagina /juridico/dashboard: abre os relatorios de vencimento."""
+    await sessao.abrir_pagina()
+    for relatorio in sessao.rng.sample(RELATORIOS, len(RELATORIOS)):
+        await sessao.pensar()
+        rota = f'/juridico/negociacao/relatorio/{relatorio}'
+        await sessao.api(f'GET {rota}', f'{rota}?page=1&page_size=10')
+        if sessao.rng.random() < 0.3:  # noqa: PLR2004
+            await sessao.pensar()
+            await sessao.api(f'GET {rota}', f'{rota}?page=2&page_size=10')
+
+
+# jornada -> peso
+JORNADAS = {
+    listar_negociacoes: 4,
+    abrir_negociacao: 4,
+    dashboard: 2,
+}
@@ -0,0 +1,301 @@
+"""Teste de carga: usuarios simultaneos do frontend contra a API rodando.
+
+Cada usuario virtual faz login com OTP e repete as jornadas de
+cenarios.py (lista/busca de negociacoes, detalhe com parcelas, dashboard
+de vencimentos), com pausas de "leitura" de media --pensar segundos.
+A carga sobe em degraus ate --usuarios; em cada degrau, depois da rampa,
+mede --duracao segundos e informa vazao, taxa de erro e p50/p95/p99 por
+endpoint. A saturacao e o primeiro degrau em que a vazao deixa de crescer
+(menos de 5%) ou a taxa de erro passa de --erro-maximo.
+
+    # API e banco locais (gunicorn -c gunicorn.conf.py app.app:app)
+    python -m loadtest.run --url http://127.0.0.1:8002 \\
+        --usuario bench --senha bench-senha --otp-secret BASE32...
+
+    # ou popula um banco de teste vazio com a massa do benchmark e usa o
+    # usuario criado por ela
+    python -m loadtest.run --popular --database-url postgresql+psycopg://...
+
+Um unico processo gera a carga; acompanhe a CPU dele: se chegar a 100%,
+o gargalo e o gerador, nao a API.
+"""
+import asyncio
+import json
+import os
+import random
+from pathlib import Path
+from time import perf_counter
+
+import click
+import httpx
+
+from loadtest.cenarios import JORNADAS, Coletor, Credenciais, Sessao
+
+GANHO_MINIMO = 0.05
+
+
+class Carga:
+    """Estado compartilhado: o coletor e trocado a cada degrau."""
+
+    def __init__(self):
+        self.coletor = Coletor()
+
+
+async def usuario_virtual(client, carga, credenciais, pensar, semente):
+    rng = random.Random(semente)
+    sessao = Sessao(client, carga, pensar, rng)
+    while not await sessao.login(credenciais):
+        await asyncio.sleep(1)
+
+    jornadas, pesos = list(JORNADAS), list(JORNADAS.values())
+    while True:
+        await sessao.pensar()
+        await rng.choices(jornadas, pesos)[0](sessao)
+
+
+def percentis(duracoes: list[float]) -> dict:
+    if not duracoes:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    ordenadas = sorted(duracoes)
+
+    def _p(q):
+        indice = min(len(ordenadas) - 1, int(q * len(ordenadas)))
+        return round(ordenadas[indice] * 1000, 3)
+
+    return {'p50_ms': _p(0.50), 'p95_ms': _p(0.95), 'p99_ms': _p(0.99)}
+
+
+def resumir_degrau(usuarios: int, coletor: Coletor, segundos: float):
+    endpoints = {}
+    for rotulo, estatistica in sorted(coletor.estatisticas.items()):
+        erros = sum(estatistica.erros.values())
+        endpoints[rotulo] = {
+            'requisicoes': estatistica.total,
+            'rps': round(estatistica.total / segundos, 2),
+            'erros': erros,
+            'taxa_erro': round(erros / estatistica.total, 4),
+            'erros_por_tipo': estatistica.erros,
+            **percentis(estatistica.duracoes),
+        }
+
+    total = sum(e['requisicoes'] for e in endpoints.values())
+    erros = sum(e['erros'] for e in endpoints.values())
+    todas = [d for e in coletor.estatisticas.values() for d in e.duracoes]
+    return {
+        'usuarios': usuarios,
+        'segundos': round(segundos, 1),
+        'requisicoes': total,
+        'rps': round(total / segundos, 2),
+        'taxa_erro': round(erros / total, 4) if total else 0,
+        **percentis(todas),
+        'endpoints': endpoints,
+    }
+
+
+def saturacao(degraus: list[dict], erro_maximo: float) -> dict:
+    """Maior vazao sem erro acima do limite e onde a vazao parou de subir."""
+    validos = [d for d in degraus if d['taxa_erro'] <= erro_maximo]
+    melhor = max(validos, key=lambda d: d['rps'], default=None)
+
+    saturado_em = None
+    for anterior, atual in zip(degraus, degraus[1:]):
+        parou = atual['rps'] < anterior['rps'] * (1 + GANHO_MINIMO)
+        if parou or atual['taxa_erro'] > erro_maximo:
+            saturado_em = atual['usuarios']
+            break
+
+    return {
+        'rps_maximo': melhor['rps'] if melhor else 0,
+        'usuarios_no_maximo': melhor['usuarios'] if melhor else None,
+        'saturado_em_usuarios': saturado_em,
+    }
+
+
+def _niveis(usuarios: int, degraus: int) -> list[int]:
+    degraus = max(1, min(degraus, usuarios))
+    return sorted({
+        max(1, round(usuarios * i / degraus)) for i in range(1, degraus + 1)
+    })
+
+
+async def executar(  # noqa: PLR0913, PLR0917
+    url, credenciais, niveis, rampa, duracao, pensar, timeout, semente
+):
+    carga = Carga()
+    tarefas = []
+    limites = httpx.Limits(
+        max_connections=niveis[-1] * 2, max_keepalive_connections=niveis[-1]
+    )
+    resultados = []
+    async with httpx.AsyncClient(
+        base_url=url, timeout=timeout, limits=limites
+    ) as client:
+        try:
+            for usuarios in niveis:
+                novos = usuarios - len(tarefas)
+                for _ in range(novos):
+                    tarefas.append(
+                        asyncio.create_task(
+                            usuario_virtual(
+                                client,
+                                carga,
+                                credenciais,
+                                pensar,
+                                semente + len(tarefas),
+                            )
+                        )
+                    )
+                    await asyncio.sleep(rampa / novos)
+
+                carga.coletor = coletor = Coletor()
+                await asyncio.sleep(duracao)
+                degrau = resumir_degrau(
+                    usuarios, coletor, perf_counter() - coletor.inicio
+                )
+                resultados.append(degrau)
+                click.echo(
+                    f'{usuarios:>5} usuarios  {degrau["rps"]:>8.1f} req/s'
+                    f'  erros {degrau["taxa_erro"]:>7.2%}'
+                    f'  p95 {degrau["p95_ms"] or 0:>9.1f} ms'
+                )
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+            await asyncio.gather(*tarefas, return_exceptions=True)
+    return resultados
+
+
+def _popular(database_url, negociacoes, parcelas) -> Credenciais:
+    # os engines da aplicacao sao criados no import, a partir do env
+    os.environ['DATABASE_URL'] = database_url
+    from app.core.database import engine  # noqa: PLC0415
+    from benchmarks import seed  # noqa: PLC0415
+
+    seed.criar_schema(engine)
+    otp_base32 = seed.popular(engine, negociacoes, parcelas)
+    engine.dispose()
+    return Credenciais(seed.USUARIO, seed.SENHA, otp_base32)
+
+
+def _imprimir_endpoints(degrau: dict):
+    click.echo(f'\npor endpoint ({degrau["usuarios"]} usuarios):')
+    for rotulo, e in degrau['endpoints'].items():
+        click.echo(
+            f'{rotulo:<52} {e["rps"]:>8.1f} req/s'
+            f'  erros {e["taxa_erro"]:>7.2%}'
+            f'  p50 {e["p50_ms"] or 0:>8.1f}'
+            f'  p95 {e["p95_ms"] or 0:>8.1f}'
+            f'  p99 {e["p99_ms"] or 0:>8.1f} ms'
+        )
+
+
+@click.command()
+@click.option('--url', default='http://127.0.0.1:8002', show_default=True)
+@click.option('--usuario', envvar='LOADTEST_USUARIO')
+@click.option('--senha', envvar='LOADTEST_SENHA')
+@click.option(
+    '--otp-secret',
+    envvar='LOADTEST_OTP_SECRET',
+    help='otp_base32 do usuario (gera o codigo do login).',
+)
+@click.option(
+    '--popular',
+    is_flag=True,
+    help='Cria schema e massa em --database-url (banco vazio de teste).',
+)
+@click.option('--database-url', envvar='LOADTEST_DATABASE_URL')
+@click.option('--negociacoes', default=50_000, show_default=True)
+@click.option('--parcelas', default=40, show_default=True)
+@click.option('--usuarios', default=200, show_default=True)
+@click.option('--degraus', default=4, show_default=True)
+@click.option(
+    '--rampa',
+    default=20.0,
+    show_default=True,
+    help='Segundos para iniciar os usuarios novos de cada degrau.',
+)
+@click.option(
+    '--duracao',
+    default=60.0,
+    show_default=True,
+    help='Segundos medidos em cada degrau.',
+)
+@click.option(
+    '--pensar',
+    default=1.0,
+    show_default=True,
+    help='Pausa media entre acoes (0 = sem pausa).',
+)
+@click.option('--timeout', default=30.0, show_default=True)
+@click.option('--erro-maximo', default=0.01, show_default=True)
+@click.option('--semente', default=42, show_default=True)
+@click.option(
+    '--saida',
+    type=click.Path(dir_okay=False, path_type=Path),
+    help='Grava o resultado em JSON.',
+)
+def main(  # noqa: PLR0913, PLR0917
+    url,
+    usuario,
+    senha,
+    otp_secret,
+    popular,
+    database_url,
+    negociacoes,
+    parcelas,
+    usuarios,
+    degraus,
+    rampa,
+    duracao,
+    pensar,
+    timeout,
+    erro_maximo,
+    semente,
+    saida,
+):
+    if popular:
+        if not database_url:
+            raise click.UsageError('--popular exige --database-url')
+        credenciais = _popular(database_url, negociacoes, parcelas)
+    elif usuario and senha and otp_secret:
+        credenciais = Credenciais(usuario, senha, otp_secret)
+    else:
+        raise click.UsageError(
+            'informe --usuario, --senha e --otp-secret (ou --popular)'
+        )
+
+    niveis = _niveis(usuarios, degraus)
+    click.echo(f'degraus: {niveis} usuarios, {duracao:.0f}s cada')
+    resultados = asyncio.run(
+        executar(
+            url, credenciais, niveis, rampa, duracao, pensar, timeout, semente
+        )
+    )
+
+    _imprimir_endpoints(resultados[-1])
+    resumo = saturacao(resultados, erro_maximo)
+    click.echo(
+        f'\nvazao maxima: {resumo["rps_maximo"]:.1f} req/s'
+        f' com {resumo["usuarios_no_maximo"]} usuarios'
+    )
+    if resumo['saturado_em_usuarios']:
+        click.echo(f'saturou em {resumo["saturado_em_usuarios"]} usuarios')
+
+    if saida:
+        saida.write_text(
+            json.dumps(
+                {
+                    'url': url,
+                    'pensar': pensar,
+                    'saturacao': resumo,
+                    'degraus': resultados,
+                },
+                indent=2,
+            )
+            + '\n'
+        )
+        click.echo(f'resultado gravado em {saida}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""busca negociacao sem acento
+
+Revision ID: a1f4c7e92d05
+Revises: e5a2c9d37f48
+Create Date: 2026-10-18 18:20:05.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f4c7e92d05'
+down_revision: Union[str, None] = 'e5a2c9d37f48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUNAS = ('processo', 'executado', 'contrato')
+
+# unaccent() nao e IMMUTABLE; o wrapper fixa o dicionario e pode ser
+# usado em indice (mesma definicao de app/juridico/models.py)
+F_UNACCENT = """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+"""
+
+
+def _recriar_indices(expressao):
+    # CONCURRENTLY: a tabela continua aceitando escrita durante a troca
+    with op.get_context().autocommit_block():
+        for coluna in COLUNAS:
+            nome = f'ix_negociacao_credito_{coluna}_trgm'
+            op.drop_index(
+                nome,
+                table_name='negociacao_credito',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+            op.create_index(
+                nome,
+                'negociacao_credito',
+                [sa.text(f'{expressao.format(coluna)} gin_trgm_ops')],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_concurrently=True,
+            )
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    op.execute(F_UNACCENT)
+    _recriar_indices('f_unaccent({})')
+
+
+def downgrade() -> None:
+    _recriar_indices('{}')
+    op.execute('DROP FUNCTION IF EXISTS f_unaccent(text)')
@@ -0,0 +1,37 @@
+"""cria sincronizacao ibge
+
+Revision ID: b2e8d5f31c64
+Revises: a1f4c7e92d05
+Create Date: 2026-10-18 20:41:37.204519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e8d5f31c64'
+down_revision: Union[str, None] = 'a1f4c7e92d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sincronizacao_ibge',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('status', sa.String(length=12), nullable=False),
+    sa.Column('iniciado_em', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finalizado_em', sa.DateTime(), nullable=True),
+    sa.Column('resumo', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('erro', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_sincronizacao_ibge_executando', 'sincronizacao_ibge', ['status'], unique=True, postgresql_where=sa.text("status = 'executando'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sincronizacao_ibge_executando', table_name='sincronizacao_ibge', postgresql_where=sa.text("status = 'executando'"))
+    op.drop_table('sincronizacao_ibge')
@@ -0,0 +1,41 @@
+"""indices trigram negociacao
+
+Revision ID: b7e2c4a91d3f
+Revises: 6aebf6a57a89
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c4a91d3f'
+down_revision: Union[str, None] = '6aebf6a57a89'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUNAS = ('processo', 'executado', 'contrato')
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for coluna in COLUNAS:
+        op.create_index(
+            f'ix_negociacao_credito_{coluna}_trgm',
+            'negociacao_credito',
+            [coluna],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={coluna: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    for coluna in COLUNAS:
+        op.drop_index(
+            f'ix_negociacao_credito_{coluna}_trgm',
+            table_name='negociacao_credito',
+        )
@@ -0,0 +1,36 @@
+"""cria consulta externa
+
+Revision ID: c3d9a7e15b20
+Revises: b7e2c4a91d3f
+Create Date: 2026-10-18 14:03:12.517842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d9a7e15b20'
+down_revision: Union[str, None] = 'b7e2c4a91d3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('consulta_externa',
+    sa.Column('tipo', sa.String(length=10), nullable=False),
+    sa.Column('chave', sa.String(length=14), nullable=False),
+    sa.Column('dados', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('expira_em', sa.DateTime(), nullable=False),
+    sa.Column('consultado_em', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('tipo', 'chave')
+    )
+    op.create_index(op.f('ix_consulta_externa_expira_em'), 'consulta_externa', ['expira_em'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_consulta_externa_expira_em'), table_name='consulta_externa')
+    op.drop_table('consulta_externa')
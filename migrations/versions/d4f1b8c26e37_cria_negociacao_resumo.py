@@ -0,0 +1,60 @@
+"""cria negociacao resumo
+
+Revision ID: d4f1b8c26e37
+Revises: c3d9a7e15b20
+Create Date: 2026-10-18 16:41:05.288310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f1b8c26e37'
+down_revision: Union[str, None] = 'c3d9a7e15b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('negociacao_resumo',
+    sa.Column('negociacao_id', sa.BigInteger(), nullable=False),
+    sa.Column('type', sa.Integer(), nullable=False),
+    sa.Column('qtd_pagas', sa.Integer(), nullable=False),
+    sa.Column('val_pago', sa.DECIMAL(precision=12, scale=2), nullable=False),
+    sa.Column('qtd_abertas', sa.Integer(), nullable=False),
+    sa.Column('val_aberto', sa.DECIMAL(precision=12, scale=2), nullable=False),
+    sa.Column('qtd_vencidas', sa.Integer(), nullable=False),
+    sa.Column('val_vencido', sa.DECIMAL(precision=12, scale=2), nullable=False),
+    sa.Column('proximo_vencimento', sa.Date(), nullable=True),
+    sa.Column('calculado_em', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['negociacao_id'], ['negociacao_credito.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('negociacao_id', 'type')
+    )
+    # carga inicial a partir das parcelas existentes
+    op.execute(
+        """
+        INSERT INTO negociacao_resumo
+        SELECT negociacao_id, type,
+               count(*) FILTER (WHERE data_pgto IS NOT NULL),
+               coalesce(sum(coalesce(val_pago, val_parcela))
+                        FILTER (WHERE data_pgto IS NOT NULL), 0),
+               count(*) FILTER (WHERE data_pgto IS NULL),
+               coalesce(sum(val_parcela) FILTER (WHERE data_pgto IS NULL), 0),
+               count(*) FILTER (WHERE data_pgto IS NULL
+                                AND data < current_date),
+               coalesce(sum(val_parcela) FILTER (WHERE data_pgto IS NULL
+                                                 AND data < current_date), 0),
+               min(data) FILTER (WHERE data_pgto IS NULL
+                                 AND data >= current_date),
+               current_date
+        FROM parcelamento_negociacao
+        GROUP BY negociacao_id, type
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('negociacao_resumo')
@@ -0,0 +1,65 @@
+"""indices parcelamento negociacao
+
+Revision ID: e5a2c9d37f48
+Revises: d4f1b8c26e37
+Create Date: 2026-10-18 18:07:44.913526
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a2c9d37f48'
+down_revision: Union[str, None] = 'd4f1b8c26e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# nome, colunas, where (indice parcial)
+INDICES = (
+    (
+        'ix_parcelamento_negociacao_negociacao_type_numero',
+        ['negociacao_id', 'type', 'numero_parcela', 'id'],
+        None,
+    ),
+    (
+        'ix_parcelamento_negociacao_aberta_data',
+        ['data', 'id'],
+        'data_pgto IS NULL',
+    ),
+    ('ix_parcelamento_negociacao_data', ['data'], None),
+    (
+        'ix_parcelamento_negociacao_data_pgto',
+        ['data_pgto'],
+        'data_pgto IS NOT NULL',
+    ),
+)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY: a tabela continua aceitando escrita durante a criacao
+    with op.get_context().autocommit_block():
+        for nome, colunas, where in INDICES:
+            op.create_index(
+                nome,
+                'parcelamento_negociacao',
+                colunas,
+                unique=False,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    op.execute('ANALYZE parcelamento_negociacao')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nome, _, _ in INDICES:
+            op.drop_index(
+                nome,
+                table_name='parcelamento_negociacao',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
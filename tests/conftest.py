@@ -1,23 +1,56 @@
+from datetime import date
+from decimal import Decimal
+
 import factory
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
 from testcontainers.postgres import PostgresContainer
 
 from app.app import app
-from app.core.database import get_session
-from app.core.security import get_password_hash
+from app.core.database import (
+    get_async_session,
+    get_async_session_factory,
+    get_session,
+)
+from app.core.security import (
+    Principal,
+    get_current_user,
+    get_password_hash,
+    principal_cache,
+)
+from app.juridico.models import NegociacaoCredito
+from app.juridico.models import table_registry as juridico_registry
 from app.models.models import User, table_registry
 
 
 @pytest.fixture()
-def client(session):
+def client(session, async_engine):
     def get_session_override():
         return session
 
+    async def get_async_session_override():
+        async with AsyncSession(
+            async_engine, expire_on_commit=False
+        ) as async_session:
+            yield async_session
+
+    principal_cache.clear()
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_async_session] = (
+            get_async_session_override
+        )
+        app.dependency_overrides[get_async_session_factory] = lambda: (
+            async_sessionmaker(async_engine, expire_on_commit=False)
+        )
         yield client
     app.dependency_overrides.clear()
 
@@ -42,6 +75,12 @@ def engine():
             yield _engine
 
 
+@pytest.fixture(scope='session')
+def async_engine(engine):
+    # NullPool: o TestClient abre um event loop por teste
+    return create_async_engine(engine.url, poolclass=NullPool)
+
+
 @pytest.fixture()
 def user(session):
     password = 'testtest'
@@ -70,6 +109,23 @@ def other_user(session):
     return user
 
 
+@pytest.fixture()
+def juridico_client(client, engine):
+    """Client com as tabelas do juridico e um usuario ja autenticado."""
+    juridico_registry.metadata.create_all(engine)
+    app.dependency_overrides[get_current_user] = lambda: Principal(
+        id=1,
+        username='alice',
+        email='alice@test.com',
+        full_name='Alice',
+        is_active=True,
+        is_staff=True,
+        is_superuser=False,
+    )
+    yield client
+    juridico_registry.metadata.drop_all(engine)
+
+
 @pytest.fixture()
 def token(client, user):
     response = client.post(
@@ -86,3 +142,22 @@ class UserFactory(factory.Factory):
     username = factory.Sequence(lambda n: f'fest{n}')
     email = factory.LazyAttribute(lambda obj: f'{obj.username}@test.com')
     password = factory.LazyAttribute(lambda obj: f'{obj.username}@example.com')
+
+
+class NegociacaoFactory(factory.Factory):
+    class Meta:
+        model = NegociacaoCredito
+
+    processo = factory.Sequence(lambda n: f'{n:07d}-00.2023.8.27.2729')
+    executado = factory.Sequence(lambda n: f'Executado {n}')
+    contrato = factory.Sequence(lambda n: f'CT-{n}')
+    val_devido = Decimal('100')
+    val_desconto = Decimal('0')
+    val_neg = Decimal('100')
+    data_pri_parc = date(2024, 1, 31)
+    data_ult_parc = date(2024, 1, 31)
+    val_entrada = Decimal('0')
+    qtd_parc_ent = 0
+    data_pri_parc_entr = None
+    data_ult_parc_entr = None
+    obs_val_neg = None
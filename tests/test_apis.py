@@ -0,0 +1,137 @@
+import asyncio
+from http import HTTPStatus
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.app import app
+from app.pessoa import apis
+from app.pessoa.apis import ConsultaCacheada, RateLimitExceeded, TokenBucket
+
+
+class SessaoSemCache:
+    """Sessao falsa: nada em cache no banco; so conta os commits."""
+
+    def __init__(self):
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        return False
+
+    @staticmethod
+    async def scalar(stmt):
+        return None
+
+    @staticmethod
+    async def execute(stmt):
+        return None
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_token_bucket_sem_ficha_estoura_o_limite():
+    async def _consumir():
+        bucket = TokenBucket(rate=2, per=60)
+        await bucket.acquire(max_wait=0)
+        await bucket.acquire(max_wait=0)
+        with pytest.raises(RateLimitExceeded):
+            await bucket.acquire(max_wait=1)
+
+    asyncio.run(_consumir())
+
+
+def test_consultas_simultaneas_compartilham_a_chamada(monkeypatch):
+    chamadas = []
+
+    async def _viacep(request: httpx.Request):
+        chamadas.append(request.url.path)
+        await asyncio.sleep(0.01)
+        if '00000000' in request.url.path:
+            return httpx.Response(200, json={'erro': True})
+        return httpx.Response(200, json={'cep': '77023-432'})
+
+    async def _consultar():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(_viacep))
+        monkeypatch.setattr(apis, 'get_http_client', lambda: client)
+        session = SessaoSemCache()
+        consulta = ConsultaCacheada(
+            'cep',
+            'https://cep/{}',
+            apis.get_numbers,
+            8,
+            60,
+            60,
+            nova_sessao=lambda: session,
+        )
+
+        resultados = await asyncio.gather(
+            *(consulta.consultar(session, '77023-432') for _ in range(5))
+        )
+        de_novo = await consulta.consultar(session, '77023432')
+        inexistente = await consulta.consultar(session, '00000-000')
+        invalido = await consulta.consultar(session, '123')
+        await client.aclose()
+        return resultados, de_novo, inexistente, invalido, session.commits
+
+    resultados, de_novo, inexistente, invalido, commits = asyncio.run(
+        _consultar()
+    )
+
+    assert resultados == [{'cep': '77023-432'}] * 5
+    assert de_novo == {'cep': '77023-432'}
+    assert inexistente is None
+    assert invalido is None
+    assert chamadas == ['/77023432', '/00000000']
+    assert commits == 1
+
+
+def test_cancelar_a_dona_nao_prende_quem_espera(monkeypatch):
+    chamadas = []
+
+    async def _viacep(request: httpx.Request):
+        chamadas.append(request.url.path)
+        if len(chamadas) == 1:
+            await asyncio.sleep(60)
+        return httpx.Response(200, json={'cep': '77023-432'})
+
+    async def _consultar():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(_viacep))
+        monkeypatch.setattr(apis, 'get_http_client', lambda: client)
+        session = SessaoSemCache()
+        consulta = ConsultaCacheada(
+            'cep',
+            'https://cep/{}',
+            apis.get_numbers,
+            8,
+            60,
+            60,
+            nova_sessao=lambda: session,
+        )
+
+        dona = asyncio.create_task(consulta.consultar(session, '77023432'))
+        await asyncio.sleep(0.01)
+        espera = asyncio.create_task(consulta.consultar(session, '77023432'))
+        await asyncio.sleep(0.01)
+        dona.cancel()
+
+        resultado = await asyncio.wait_for(espera, timeout=2)
+        await client.aclose()
+        return resultado, dona.cancelled()
+
+    resultado, dona_cancelada = asyncio.run(_consultar())
+
+    assert resultado == {'cep': '77023-432'}
+    assert dona_cancelada
+    assert chamadas == ['/77023432', '/77023432']
+
+
+@pytest.mark.parametrize('url', ['/pessoa/cep/77023432', '/pessoa/cnpj/1'])
+def test_consultas_exigem_autenticacao(url):
+    response = TestClient(app).get(url)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,40 @@
+import pytest
+
+from benchmarks.run import comparar, resumir
+
+
+def _execucao(**p95):
+    return {
+        'resultados': {nome: {'p95_ms': v} for nome, v in p95.items()},
+    }
+
+
+def test_resumir_percentis():
+    duracoes = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+
+    resumo = resumir(duracoes, total=2.0)
+
+    assert resumo['requisicoes'] == 100  # noqa: PLR2004
+    assert resumo['rps'] == 50  # noqa: PLR2004
+    assert resumo['p50_ms'] == pytest.approx(50.5)
+    assert resumo['p95_ms'] == pytest.approx(95.05)
+    assert resumo['p99_ms'] == pytest.approx(99.01)
+
+
+def test_comparar_detecta_regressao_acima_da_tolerancia():
+    base = _execucao(login=100, lista=10)
+    atual = _execucao(login=105, lista=12, novo=1)
+
+    linhas, regressao = comparar(base, atual, tolerancia=0.10)
+
+    assert regressao
+    assert linhas[0] == ('login', 100, 105, pytest.approx(0.05))
+    assert linhas[2] == ('novo', None, 1, None)
+
+
+def test_comparar_dentro_da_tolerancia():
+    _, regressao = comparar(
+        _execucao(login=100), _execucao(login=109), tolerancia=0.10
+    )
+
+    assert not regressao
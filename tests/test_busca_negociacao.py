@@ -0,0 +1,62 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy.orm import Session
+
+from tests.conftest import NegociacaoFactory
+
+EXECUTADOS = (
+    'JOÃO DA SILVA',
+    'Joao Silva Santos',
+    'MARIA JOANA PEREIRA',
+    'JOSÉ 50% SOUZA',
+    'EMPRESA QUALQUER LTDA',
+)
+
+
+@pytest.fixture()
+def busca_client(juridico_client, engine):
+    with Session(engine) as session:
+        session.add_all(
+            NegociacaoFactory(executado=executado, contrato=f'CT-{numero}')
+            for numero, executado in enumerate(EXECUTADOS, 1)
+        )
+        session.commit()
+    return juridico_client
+
+
+def _busca(client, q):
+    response = client.get('/juridico/negociacao/busca', params={'q': q})
+    assert response.status_code == HTTPStatus.OK
+    return response.json()['rows']
+
+
+def test_busca_ordena_por_relevancia(busca_client):
+    rows = _busca(busca_client, 'joao silva')
+
+    assert [row['executado'] for row in rows[:2]] == [
+        'Joao Silva Santos',
+        'JOÃO DA SILVA',
+    ]
+    assert rows[0]['rank'] >= rows[1]['rank']
+    assert 'EMPRESA QUALQUER LTDA' not in {row['executado'] for row in rows}
+
+
+@pytest.mark.parametrize(
+    ('q', 'esperado'),
+    [
+        ('JOÃO', 'JOÃO DA SILVA'),  # com acento, maiusculas
+        ('joão', 'Joao Silva Santos'),  # acento no termo, nao no dado
+        ('jose', 'JOSÉ 50% SOUZA'),  # acento no dado, nao no termo
+        ('50%', 'JOSÉ 50% SOUZA'),  # % literal, nao coringa
+        ('ct-3', 'MARIA JOANA PEREIRA'),  # contrato
+    ],
+)
+def test_busca_ignora_maiusculas_e_acentos(busca_client, q, esperado):
+    rows = _busca(busca_client, q)
+
+    assert esperado in {row['executado'] for row in rows}
+
+
+def test_busca_escapa_coringas(busca_client):
+    assert _busca(busca_client, '_%') == []
@@ -0,0 +1,33 @@
+from app.pessoa.cep import CepIndex, formatar_cep, normalizar_cep
+
+
+def test_normalizar_cep():
+    assert normalizar_cep('77023-432') == '77023432'
+    assert normalizar_cep('7702343') is None
+    assert normalizar_cep(None) is None
+    assert formatar_cep('01001000') == '01001-000'
+
+
+def test_cep_index_busca_exata_e_prefixo():
+    index = CepIndex()
+    index.montar(
+        [('77023-432', 1), ('77001002', 2), ('invalido', 3), ('01001000', 4)],
+        {1: ('Plano Diretor Sul', 1721000), 2: ('Centro', 1721000)},
+    )
+
+    assert len(index) == 3  # noqa: PLR2004
+    assert index.buscar('77023432') == 1
+    assert index.buscar('77023433') is None
+    assert index.por_prefixo('770') == [('77001002', 2), ('77023432', 1)]
+    assert index.por_prefixo('0100') == [('01001000', 4)]
+
+
+def test_cep_index_adicionar_mantem_ordem():
+    index = CepIndex()
+    index.montar([('77023432', 1)], {1: ('Plano Diretor Sul', 1721000)})
+
+    index.adicionar('77010000', 5, 'Centro', 1721000)
+    index.adicionar('77010000', 5, 'Centro', 1721000)
+
+    assert index.por_prefixo('77') == [('77010000', 5), ('77023432', 1)]
+    assert index.bairros[5] == ('Centro', 1721000)
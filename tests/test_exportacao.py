@@ -0,0 +1,60 @@
+import asyncio
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+from openpyxl import load_workbook
+
+from app.core.exportacao import csv_stream, ndjson_stream, xlsx_stream
+
+COLUNAS = ['id', 'data', 'val_parcela']
+LOTES = [
+    [(1, date(2024, 1, 10), Decimal('150.50'))],
+    [(2, date(2024, 2, 10), Decimal('150.50')), (3, None, None)],
+]
+
+
+async def _lotes():
+    for lote in LOTES:
+        yield lote
+
+
+def _coletar(stream):
+    async def _ler():
+        return [chunk async for chunk in stream(COLUNAS, _lotes())]
+
+    return asyncio.run(_ler())
+
+
+def test_ndjson_stream_um_chunk_por_lote():
+    chunks = _coletar(ndjson_stream)
+
+    assert len(chunks) == len(LOTES)
+    linhas = b''.join(chunks).decode().splitlines()
+    assert [json.loads(linha) for linha in linhas] == [
+        {'id': 1, 'data': '2024-01-10', 'val_parcela': 150.5},
+        {'id': 2, 'data': '2024-02-10', 'val_parcela': 150.5},
+        {'id': 3, 'data': None, 'val_parcela': None},
+    ]
+
+
+def test_csv_stream_cabecalho_primeiro():
+    chunks = _coletar(csv_stream)
+
+    assert chunks[0].decode('utf-8-sig') == 'id,data,val_parcela\r\n'
+    assert b''.join(chunks).decode('utf-8-sig').splitlines() == [
+        'id,data,val_parcela',
+        '1,2024-01-10,150.50',
+        '2,2024-02-10,150.50',
+        '3,,',
+    ]
+
+
+def test_xlsx_stream():
+    planilha = load_workbook(io.BytesIO(b''.join(_coletar(xlsx_stream))))
+
+    linhas = list(planilha.active.values)
+    assert linhas[0] == tuple(COLUNAS)
+    assert linhas[1][0] == 1
+    assert len(linhas) == 4  # noqa: PLR2004
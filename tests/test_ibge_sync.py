@@ -0,0 +1,176 @@
+import asyncio
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.pessoa import ibge_sync
+from app.pessoa.ibge_sync import (
+    buscar_localidades,
+    diff_linhas,
+    http_client,
+    iniciar_sincronizacao,
+    montar_linhas,
+)
+from app.pessoa.models import (
+    Municipio,
+    Regiao,
+    SincronizacaoIbge,
+    Uf,
+    table_registry,
+)
+from app.pessoa.referencia import referencia
+
+ESTADOS = [
+    {
+        'id': 17,
+        'sigla': 'TO',
+        'nome': 'Tocantins',
+        'regiao': {'id': 1, 'sigla': 'N', 'nome': 'Norte'},
+    },
+    {
+        'id': 11,
+        'sigla': 'RO',
+        'nome': 'Rondônia',
+        'regiao': {'id': 1, 'sigla': 'N', 'nome': 'Norte'},
+    },
+]
+MUNICIPIOS = {
+    'TO': [{'id': 1721000, 'nome': 'Palmas'}],
+    'RO': [{'id': 1100205, 'nome': 'Porto Velho'}],
+}
+
+
+def _stub_ibge(request: httpx.Request):
+    partes = request.url.path.strip('/').split('/')
+    if partes[-1] == 'estados':
+        return httpx.Response(200, json=ESTADOS)
+    return httpx.Response(200, json=MUNICIPIOS[partes[-2]])
+
+
+def test_buscar_localidades_em_paralelo():
+    async def _buscar():
+        async with http_client(
+            transport=httpx.MockTransport(_stub_ibge)
+        ) as client:
+            return await buscar_localidades(client)
+
+    estados, cidades_por_uf = asyncio.run(_buscar())
+    regioes, ufs, municipios = montar_linhas(estados, cidades_por_uf)
+
+    assert regioes == [{'id': 1, 'nome': 'Norte', 'sigla': 'N'}]
+    assert [uf['sigla'] for uf in ufs] == ['TO', 'RO']
+    assert {'id': 1721000, 'nome': 'Palmas', 'uf_id': 17} in municipios
+
+
+def test_diff_linhas_so_novas_ou_alteradas():
+    existentes = {1721000: ('Palmas', 17), 1100205: ('Porto Velho', 11)}
+    linhas = [
+        {'id': 1721000, 'nome': 'Palmas', 'uf_id': 17},
+        {'id': 1100205, 'nome': 'Porto Velho (RO)', 'uf_id': 11},
+        {'id': 1702109, 'nome': 'Araguaína', 'uf_id': 17},
+    ]
+
+    alteradas = diff_linhas(existentes, linhas, ('nome', 'uf_id'))
+
+    assert [linha['id'] for linha in alteradas] == [1100205, 1702109]
+
+
+@pytest.fixture()
+def tabelas_ibge(engine, async_engine, monkeypatch):
+    tabelas = [
+        Regiao.__table__,
+        Uf.__table__,
+        Municipio.__table__,
+        SincronizacaoIbge.__table__,
+    ]
+    table_registry.metadata.create_all(engine, tables=tabelas)
+    monkeypatch.setattr(ibge_sync, 'async_engine', async_engine)
+    yield async_engine
+    referencia.limpar()
+    table_registry.metadata.drop_all(engine, tables=tabelas)
+
+
+def test_um_job_por_vez_entre_workers(tabelas_ibge, monkeypatch):
+    async def _sem_sincronizar(job_id):
+        pass
+
+    monkeypatch.setattr(ibge_sync, 'sincronizar', _sem_sincronizar)
+
+    async def _iniciar():
+        # uma sessao por "worker": o estado so e compartilhado pelo banco
+        async with AsyncSession(tabelas_ibge) as worker_1:
+            primeiro = await iniciar_sincronizacao(worker_1)
+        async with AsyncSession(tabelas_ibge) as worker_2:
+            segundo = await iniciar_sincronizacao(worker_2)
+        return primeiro.id, segundo.id
+
+    primeiro, segundo = asyncio.run(_iniciar())
+
+    assert primeiro == segundo
+
+
+def test_job_interrompido_libera_a_vaga(tabelas_ibge, monkeypatch):
+    async def _sem_sincronizar(job_id):
+        pass
+
+    monkeypatch.setattr(ibge_sync, 'sincronizar', _sem_sincronizar)
+
+    async def _iniciar():
+        async with AsyncSession(tabelas_ibge) as session:
+            antigo = SincronizacaoIbge(id='antigo', status='executando')
+            session.add(antigo)
+            await session.flush()
+            antigo.iniciado_em = datetime.now() - timedelta(
+                seconds=ibge_sync.settings.IBGE_SYNC_TIMEOUT + 60
+            )
+            await session.commit()
+
+            novo = await iniciar_sincronizacao(session)
+            antigo = await session.get(
+                SincronizacaoIbge, 'antigo', populate_existing=True
+            )
+            return novo.id, antigo.status, antigo.erro
+
+    novo, status, erro = asyncio.run(_iniciar())
+
+    assert novo != 'antigo'
+    assert (status, erro) == ('erro', 'interrompido')
+
+
+def test_sincronizar_grava_o_resultado_do_job(tabelas_ibge):
+    async def _sincronizar():
+        async with AsyncSession(tabelas_ibge) as session:
+            session.add(SincronizacaoIbge(id='job', status='executando'))
+            await session.commit()
+
+        await ibge_sync.sincronizar(
+            'job',
+            client=http_client(transport=httpx.MockTransport(_stub_ibge)),
+        )
+
+        async with AsyncSession(tabelas_ibge) as outro_worker:
+            return await outro_worker.get(SincronizacaoIbge, 'job')
+
+    job = asyncio.run(_sincronizar())
+
+    assert job.status == 'concluido'
+    assert job.finalizado_em is not None
+    assert job.resumo['municipio'] == {'recebidos': 2, 'gravados': 2}
+    # o worker que sincronizou ja serve os dados novos
+    assert referencia.snapshot.municipios[1721000]['nome'] == 'Palmas'
+
+
+def test_status_do_job_vem_do_banco(client, session, tabelas_ibge):
+    session.add(SincronizacaoIbge(id='job', status='executando'))
+    session.commit()
+
+    response = client.get('/pessoa/atualizar/job')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['status'] == 'executando'
+    assert client.get('/pessoa/atualizar/outro').status_code == (
+        HTTPStatus.NOT_FOUND
+    )
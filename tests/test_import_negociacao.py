@@ -0,0 +1,83 @@
+import pytest
+from click.testing import CliRunner
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.juridico.models import NegociacaoCredito, table_registry
+from tests.conftest import NegociacaoFactory
+from util.import_negociacao import main
+
+# ids do legado, fora do que a sequence do destino ja entregou
+IDS_LEGADO = [10, 20, 30]
+
+
+@pytest.fixture()
+def banco_legado(engine):
+    """Origem e destino no mesmo banco de teste.
+
+    A tabela do legado e uma copia de negociacao_credito com os ids de
+    IDS_LEGADO; o destino fica vazio, com a sequence ja usada.
+    """
+    table_registry.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(NegociacaoFactory() for _ in IDS_LEGADO)
+        session.commit()
+    with engine.begin() as conexao:
+        conexao.execute(
+            text(
+                'CREATE TABLE juridico_negociacaocredito AS '
+                'SELECT * FROM negociacao_credito'
+            )
+        )
+        conexao.execute(
+            text('UPDATE juridico_negociacaocredito SET id = id * 10')
+        )
+        conexao.execute(text('TRUNCATE negociacao_credito CASCADE'))
+
+    yield engine.url.render_as_string(hide_password=False)
+
+    with engine.begin() as conexao:
+        conexao.execute(text('DROP TABLE juridico_negociacaocredito'))
+    table_registry.metadata.drop_all(engine)
+
+
+def _importar(url):
+    result = CliRunner().invoke(
+        main,
+        [
+            '--tabela',
+            'negociacao',
+            '--batch-size',
+            '2',
+            '--origem-url',
+            url,
+            '--destino-url',
+            url,
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def test_importa_em_lotes_e_reexecuta_sem_duplicar(banco_legado, engine):
+    primeira = _importar(banco_legado)
+    segunda = _importar(banco_legado)
+
+    assert 'negociacao: concluido, 3 lidas / 3 inseridas' in primeira
+    assert 'negociacao: concluido, 3 lidas / 0 inseridas' in segunda
+    with Session(engine) as session:
+        assert (
+            session.scalars(
+                select(NegociacaoCredito.id).order_by(NegociacaoCredito.id)
+            ).all()
+            == IDS_LEGADO
+        )
+
+        # setval: o proximo insert da app nao colide com os ids do legado
+        novo = NegociacaoFactory()
+        session.add(novo)
+        session.commit()
+        assert novo.id == max(IDS_LEGADO) + 1
+        assert session.scalar(select(func.count(NegociacaoCredito.id))) == (
+            len(IDS_LEGADO) + 1
+        )
@@ -0,0 +1,86 @@
+import io
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.app import app
+from app.core.security import Principal, get_current_user
+from app.pessoa.importacao import (
+    ResultadoImportacao,
+    ler_lotes,
+    preparar_lote,
+)
+
+CSV = (
+    'cpf_cnpj;rua;numero;complemento;cep;email\n'
+    '529.982.247-25;Rua 1;10;;77023-432;a@a.com\n'
+    '529.982.247-26;Rua 2;20;;77023-432;\n'
+    '11.222.333/0001-81;Rua 3;30;Sala 2;77000-000;\n'
+    '52998224725;Rua 4;40;;77023-432;\n'
+    '33.000.167/0001-01;;50;;77023-432;\n'
+)
+
+
+def test_ler_lotes_streaming():
+    lotes = list(ler_lotes(io.StringIO(CSV), batch_size=2))
+
+    assert [len(lote) for lote in lotes] == [2, 2, 1]
+    assert lotes[0][0] == (
+        2,
+        {
+            'cpf_cnpj': '529.982.247-25',
+            'rua': 'Rua 1',
+            'numero': '10',
+            'complemento': '',
+            'cep': '77023-432',
+            'email': 'a@a.com',
+        },
+    )
+
+
+def test_ler_lotes_sem_colunas_obrigatorias():
+    with pytest.raises(ValueError, match='cep'):
+        next(ler_lotes(io.StringIO('cpf_cnpj,rua,numero\n'), 10))
+
+
+def test_preparar_lote_valida_e_deduplica():
+    (lote,) = ler_lotes(io.StringIO(CSV), batch_size=100)
+    resultado = ResultadoImportacao()
+
+    linhas = preparar_lote(lote, {'77023432': 7}, set(), resultado)
+
+    assert list(linhas) == ['52998224725']
+    assert linhas['52998224725'][0] == lote[0][0]
+    valores = linhas['52998224725'][1]
+    assert valores['cep_id'] == 7  # noqa: PLR2004
+    assert valores['email'] == 'a@a.com'
+    assert valores['rg'] is None
+    assert [(r.linha, r.motivo) for r in resultado.rejeitados] == [
+        (3, 'cpf invalido'),
+        (4, 'CEP nao cadastrado'),
+        (5, 'cpf_cnpj repetido no arquivo'),
+        (6, 'rua vazio'),
+    ]
+
+
+def test_importar_exige_permissao():
+    sem_permissao = Principal(
+        id=1,
+        username='alice',
+        email='alice@test.com',
+        full_name='Alice',
+        is_active=True,
+        is_staff=True,
+        is_superuser=False,
+        permissions=frozenset({'negociacao.ler'}),
+    )
+    app.dependency_overrides[get_current_user] = lambda: sem_permissao
+    try:
+        response = TestClient(app).post(
+            '/pessoa/import', files={'arquivo': ('pessoas.csv', CSV)}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
@@ -0,0 +1,97 @@
+import asyncio
+import random
+
+import httpx
+import pyotp
+
+from loadtest.cenarios import Coletor, Credenciais, Sessao, abrir_negociacao
+from loadtest.run import Carga, percentis, resumir_degrau, saturacao
+
+
+def _degrau(usuarios, rps, taxa_erro=0.0):
+    return {'usuarios': usuarios, 'rps': rps, 'taxa_erro': taxa_erro}
+
+
+def test_percentis_nearest_rank():
+    duracoes = [i / 1000 for i in range(1, 101)]
+
+    assert percentis(duracoes) == {
+        'p50_ms': 51.0,
+        'p95_ms': 96.0,
+        'p99_ms': 100.0,
+    }
+    assert percentis([])['p95_ms'] is None
+
+
+def test_resumir_degrau_conta_erros_por_endpoint():
+    coletor = Coletor()
+    coletor.registrar('GET /a', 0.010)
+    coletor.registrar('GET /a', 0.020)
+    coletor.registrar('GET /a', 0.5, '500')
+    coletor.registrar('GET /b', 0.030)
+
+    degrau = resumir_degrau(10, coletor, segundos=2.0)
+
+    assert degrau['requisicoes'] == 4  # noqa: PLR2004
+    assert degrau['rps'] == 2  # noqa: PLR2004
+    assert degrau['taxa_erro'] == 0.25  # noqa: PLR2004
+    assert degrau['endpoints']['GET /a']['erros_por_tipo'] == {'500': 1}
+
+
+def test_saturacao_quando_vazao_para_de_crescer():
+    degraus = [_degrau(50, 100), _degrau(100, 190), _degrau(150, 195)]
+
+    assert saturacao(degraus, erro_maximo=0.01) == {
+        'rps_maximo': 195,
+        'usuarios_no_maximo': 150,
+        'saturado_em_usuarios': 150,
+    }
+
+
+def test_saturacao_ignora_degrau_com_erros():
+    degraus = [_degrau(50, 100), _degrau(100, 300, taxa_erro=0.2)]
+
+    resumo = saturacao(degraus, erro_maximo=0.01)
+
+    assert resumo['rps_maximo'] == 100  # noqa: PLR2004
+    assert resumo['saturado_em_usuarios'] == 100  # noqa: PLR2004
+
+
+def test_jornada_segue_padrao_do_frontend():
+    chamadas = []
+    otp_base32 = pyotp.random_base32()
+
+    def responder(request):
+        chamadas.append(f'{request.method} {request.url.path}')
+        if request.url.path == '/auth/token':
+            assert request.headers.get('authorization') is None
+            return httpx.Response(200, json={'access_token': 'x'})
+        assert request.headers['authorization'] == 'Bearer x'
+        if request.url.path == '/juridico/negociacao':
+            rows = [{'id': 7, 'executado': 'FULANO DE TAL'}]
+            return httpx.Response(200, json={'rows': rows})
+        return httpx.Response(200, json={})
+
+    async def jornada():
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(responder), base_url='http://api'
+        ) as client:
+            sessao = Sessao(client, Carga(), 0, random.Random(1))
+            assert await sessao.login(Credenciais('u', 's', otp_base32))
+            sessao.negociacoes_vistas = [{'id': 7, 'executado': 'F'}]
+            await abrir_negociacao(sessao)
+            return sessao.carga.coletor
+
+    coletor = asyncio.run(jornada())
+
+    assert chamadas[:3] == [
+        'POST /auth/token',
+        'GET /auth/verify-token',
+        'GET /auth/modules',
+    ]
+    # cada chamada da api e precedida por um verify-token
+    apis = [c for c in chamadas[1:] if c != 'GET /auth/verify-token']
+    verificacoes = chamadas.count('GET /auth/verify-token')
+    assert verificacoes == len(apis)
+    assert 'GET /juridico/negociacao/7' in chamadas
+    assert coletor.estatisticas['GET /juridico/parcelamento'].total >= 2  # noqa: PLR2004
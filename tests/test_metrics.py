@@ -0,0 +1,168 @@
+import os
+import socket
+import subprocess
+import sys
+from http import HTTPStatus
+from time import sleep
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from app.core import sql_events
+from app.core.metrics import MetricsMiddleware, instrument_queries
+from app.core.sql_trace import SqlTraceMiddleware, SqlTracer
+
+
+@pytest.fixture()
+def app_instrumentado():
+    instrument_queries()
+    engine = create_engine('sqlite://')
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get('/itens/{item_id}')
+    def item(item_id: int):
+        with engine.connect() as conexao:
+            for _ in range(item_id):
+                conexao.execute(text('SELECT 1'))
+        return {'id': item_id}
+
+    @app.get('/metrics')
+    def metrics():
+        return {}
+
+    with TestClient(app) as client:
+        yield client
+    engine.dispose()
+
+
+def _amostra(nome, **labels):
+    return REGISTRY.get_sample_value(nome, labels) or 0
+
+
+def test_metricas_por_template_de_rota(app_instrumentado):
+    labels = {'method': 'GET', 'route': '/itens/{item_id}'}
+    antes = _amostra('http_requests_total', status='200', **labels)
+    consultas = _amostra('http_request_db_queries_sum', **labels)
+    duracoes = _amostra('http_request_duration_seconds_count', **labels)
+
+    app_instrumentado.get('/itens/3')
+    app_instrumentado.get('/itens/4')
+
+    assert _amostra('http_requests_total', status='200', **labels) == antes + 2
+    assert _amostra('http_request_db_queries_sum', **labels) == consultas + 7
+    assert (
+        _amostra('http_request_duration_seconds_count', **labels)
+        == duracoes + 2
+    )
+    assert _amostra('http_requests_in_progress', method='GET') == 0
+
+
+def test_rota_inexistente_usa_rotulo_unico(app_instrumentado):
+    labels = {'method': 'GET', 'route': '<desconhecida>', 'status': '404'}
+    antes = _amostra('http_requests_total', **labels)
+
+    response = app_instrumentado.get('/nao/existe/123')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert _amostra('http_requests_total', **labels) == antes + 1
+
+
+def test_metricas_e_trace_compartilham_o_hook_de_consultas():
+    instrument_queries()
+    tracer = SqlTracer(limiar_ms=0)
+    tracer.instrumentar()
+    engine = create_engine('sqlite://')
+    app = FastAPI()
+    app.add_middleware(SqlTraceMiddleware, tracer=tracer)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get('/consultas')
+    def consultas():
+        with engine.connect() as conexao:
+            conexao.execute(text('SELECT 1'))
+            conexao.execute(text('SELECT 2'))
+        return {}
+
+    labels = {'method': 'GET', 'route': '/consultas'}
+    antes = _amostra('http_request_db_queries_sum', **labels)
+    try:
+        with TestClient(app) as client:
+            client.get('/consultas')
+    finally:
+        tracer.desinstrumentar()
+        engine.dispose()
+
+    # um unico listener de cursor (o da classe Engine) para os dois
+    assert len(engine.dispatch.before_cursor_execute) == 1
+    assert event.contains(
+        Engine, 'before_cursor_execute', sql_events._antes_da_consulta
+    )
+    assert _amostra('http_request_db_queries_sum', **labels) == antes + 2
+    (trace,) = tracer.ultimos(1)
+    assert trace.total_consultas == 2  # noqa: PLR2004
+
+
+def test_metrics_nao_e_instrumentado(app_instrumentado):
+    app_instrumentado.get('/metrics')
+
+    assert (
+        _amostra(
+            'http_request_duration_seconds_count',
+            method='GET',
+            route='/metrics',
+        )
+        == 0
+    )
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _esperar(url: str, segundos: float = 30) -> httpx.Response:
+    for _ in range(int(segundos * 10)):
+        try:
+            return httpx.get(url)
+        except httpx.TransportError:
+            sleep(0.1)
+    pytest.fail(f'{url} nao respondeu')
+
+
+def test_gunicorn_agrega_metricas_dos_workers():
+    # como no entrypoint.sh: a variavel nao vem exportada do ambiente
+    env = {**os.environ, 'WEB_WORKERS': '2', 'WEB_HOST': '127.0.0.1'}
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    env['WEB_PORT'] = str(porta := _porta_livre())
+    servidor = subprocess.Popen(
+        [
+            sys.executable,
+            '-m',
+            'gunicorn',
+            '-c',
+            'gunicorn.conf.py',
+            'app.app:app',
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f'http://127.0.0.1:{porta}'
+        _esperar(f'{url}/docs')
+        for _ in range(10):
+            httpx.get(f'{url}/docs')
+
+        metricas = httpx.get(f'{url}/metrics').text
+    finally:
+        servidor.terminate()
+        servidor.wait(timeout=30)
+
+    assert 'http_requests_total{method="GET",route="/docs"' in metricas
@@ -0,0 +1,204 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.juridico.models import (
+    NegociacaoCredito,
+    NegociacaoResumo,
+    ParcelamentoNegociacao,
+    gerar_parcelas,
+    table_registry,
+)
+from app.juridico.resumo import (
+    carregar_resumos,
+    recalcular,
+    recalcular_desatualizados,
+)
+
+PARCELA_MENSAL, PARCELA_ENTRADA = 1, 2
+
+
+def _negociacao(**kwargs):
+    dados = {
+        'processo': '0001',
+        'executado': 'Fulano',
+        'contrato': 'C-1',
+        'val_devido': Decimal('1200.00'),
+        'val_desconto': Decimal('0'),
+        'val_neg': Decimal('1200.00'),
+        'data_pri_parc': date(2024, 1, 31),
+        'data_ult_parc': date(2024, 12, 31),
+        'val_entrada': Decimal('300.00'),
+        'qtd_parc_ent': 3,
+        'data_pri_parc_entr': date(2023, 12, 10),
+        'data_ult_parc_entr': date(2024, 2, 10),
+        'obs_val_neg': None,
+        'qtd': 12,
+        'taxa_mes': Decimal('0'),
+        'val_parc': Decimal('100.00'),
+        'is_cal_parc_mensal': True,
+        'is_cal_parc_entrada': True,
+    }
+    dados.update(kwargs)
+    return NegociacaoCredito(**dados)
+
+
+def test_gerar_parcelas_mensais_e_entrada():
+    negociacao = _negociacao()
+    parcelas = gerar_parcelas(negociacao)
+
+    mensais = [p for p in parcelas if p['type'] == PARCELA_MENSAL]
+    entrada = [p for p in parcelas if p['type'] == PARCELA_ENTRADA]
+    assert [p['numero_parcela'] for p in mensais] == list(range(1, 13))
+    assert mensais[0]['data'] == date(2024, 2, 1)
+    assert mensais[1]['data'] == date(2024, 3, 1)
+    assert len(entrada) == negociacao.qtd_parc_ent
+    assert all(p['val_parcela'] == Decimal('100') for p in entrada)
+
+
+def test_gerar_parcelas_sem_flags_nao_gera_nada():
+    negociacao = _negociacao(
+        is_cal_parc_mensal=False, is_cal_parc_entrada=False
+    )
+
+    assert gerar_parcelas(negociacao) == []
+
+
+def test_parcela_mensal_sem_juros():
+    negociacao = _negociacao(qtd=12, taxa_mes=Decimal('0'))
+
+    assert negociacao._gerarParcelasMensal() == Decimal('100.00')
+
+
+class _Conexao:
+    def __init__(self):
+        self.sql = []
+
+    def execute(self, stmt):
+        self.sql.append(str(stmt.compile(dialect=postgresql.dialect())))
+
+
+def test_recalcular_resumo_so_das_negociacoes_marcadas():
+    conexao = _Conexao()
+
+    recalcular(conexao, [7], hoje=date(2024, 6, 1))
+
+    inserir, apagar = conexao.sql
+    assert inserir.startswith('INSERT INTO negociacao_resumo')
+    assert 'FILTER (WHERE parcelamento_negociacao.data_pgto IS NULL' in (
+        inserir
+    )
+    assert 'GROUP BY' in inserir
+    # upsert: recalculos simultaneos nao violam a chave primaria
+    assert 'ON CONFLICT (negociacao_id, type) DO UPDATE' in inserir
+    assert apagar.startswith('DELETE FROM negociacao_resumo')
+    assert 'negociacao_id IN' in apagar
+    assert 'NOT (EXISTS' in apagar
+
+
+def test_recalcular_resumo_sem_ids_nao_faz_nada():
+    conexao = _Conexao()
+
+    recalcular(conexao, [])
+
+    assert conexao.sql == []
+
+
+def test_resumo_a_vencer():
+    resumo = NegociacaoResumo(
+        negociacao_id=1,
+        type=1,
+        qtd_abertas=5,
+        val_aberto=Decimal('500'),
+        qtd_vencidas=2,
+        val_vencido=Decimal('200'),
+    )
+
+    assert resumo.qtd_a_vencer == 3  # noqa: PLR2004
+    assert resumo.val_a_vencer == Decimal('300')
+
+
+@pytest.fixture()
+def juridico_session(engine):
+    table_registry.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    table_registry.metadata.drop_all(engine)
+
+
+def _resumos_gravados(session, negociacao_id):
+    session.expire_all()
+    return {
+        resumo.type: resumo
+        for resumo in session.scalars(
+            select(NegociacaoResumo).where(
+                NegociacaoResumo.negociacao_id == negociacao_id
+            )
+        )
+    }
+
+
+def test_resumo_apos_inserir_e_pagar_parcelas(juridico_session):
+    session = juridico_session
+    negociacao = _negociacao()
+    session.add(negociacao)
+    session.commit()
+
+    resumos = _resumos_gravados(session, negociacao.id)
+    mensal, entrada = resumos[PARCELA_MENSAL], resumos[PARCELA_ENTRADA]
+    # todas as parcelas sao de 2024: em aberto e ja vencidas
+    assert (mensal.qtd_abertas, mensal.val_aberto) == (12, Decimal('1200'))
+    assert (mensal.qtd_vencidas, mensal.qtd_pagas) == (12, 0)
+    assert (entrada.qtd_abertas, entrada.val_aberto) == (3, Decimal('300'))
+
+    parcela = session.scalar(
+        select(ParcelamentoNegociacao).where(
+            ParcelamentoNegociacao.negociacao_id == negociacao.id,
+            ParcelamentoNegociacao.type == PARCELA_MENSAL,
+            ParcelamentoNegociacao.numero_parcela == 1,
+        )
+    )
+    parcela.data_pgto = date(2024, 2, 1)
+    parcela.val_pago = Decimal('120.00')
+    session.commit()
+
+    mensal = _resumos_gravados(session, negociacao.id)[PARCELA_MENSAL]
+    assert (mensal.qtd_pagas, mensal.val_pago) == (1, Decimal('120'))
+    assert (mensal.qtd_abertas, mensal.val_aberto) == (11, Decimal('1100'))
+    assert mensal.qtd_vencidas == 11  # noqa: PLR2004
+
+
+VENCIDAS_ONTEM = 99
+
+
+def test_resumo_desatualizado_so_e_regravado_pelo_job(juridico_session):
+    session = juridico_session
+    hoje = date.today()
+    negociacao = _negociacao(
+        data_pri_parc=hoje, qtd=3, is_cal_parc_entrada=False
+    )
+    session.add(negociacao)
+    session.commit()
+    # como se o resumo fosse de ontem, com um vencimento ja passado
+    session.execute(
+        update(NegociacaoResumo).values(
+            proximo_vencimento=date(2000, 1, 1), qtd_vencidas=VENCIDAS_ONTEM
+        )
+    )
+    session.commit()
+
+    (resumo,) = carregar_resumos(session, [negociacao.id])[negociacao.id]
+
+    assert resumo.qtd_vencidas == 0
+    assert resumo.proximo_vencimento > hoje
+    # a leitura nao grava
+    gravado = _resumos_gravados(session, negociacao.id)[PARCELA_MENSAL]
+    assert gravado.qtd_vencidas == VENCIDAS_ONTEM
+
+    assert recalcular_desatualizados(session) == 1
+    gravado = _resumos_gravados(session, negociacao.id)[PARCELA_MENSAL]
+    assert gravado.qtd_vencidas == 0
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.pagination import decode_cursor, encode_cursor
+from tests.conftest import NegociacaoFactory
+
+
+def test_cursor_ida_e_volta():
+    token = encode_cursor(12, 3405)
+
+    assert decode_cursor(token, 2) == (12, 3405)
+
+
+@pytest.mark.parametrize('token', ['nao-e-base64!', encode_cursor(1)])
+def test_cursor_invalido(token):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(token, 2)
+
+    assert exc.value.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.fixture()
+def paginacao_client(juridico_client, engine):
+    with Session(engine) as session:
+        session.add_all(NegociacaoFactory() for _ in range(4))
+        # a ultima tem 5 parcelas mensais
+        negociacao = NegociacaoFactory(is_cal_parc_mensal=True, qtd=5)
+        session.add(negociacao)
+        session.commit()
+        juridico_client.negociacao_id = negociacao.id
+    return juridico_client
+
+
+def _percorrer(client, url, **params):
+    """Segue next_cursor a partir de after='' e devolve as paginas."""
+    paginas = []
+    after = ''
+    while after is not None:
+        response = client.get(url, params={**params, 'after': after})
+        assert response.status_code == HTTPStatus.OK
+        pagina = response.json()
+        paginas.append(pagina)
+        after = pagina['next_cursor']
+    return paginas
+
+
+def test_read_negociacao_por_cursor(paginacao_client):
+    paginas = _percorrer(
+        paginacao_client, '/juridico/negociacao', page_size=2
+    )
+
+    ids = [[row['id'] for row in pagina['rows']] for pagina in paginas]
+    todos = sorted((i for pagina in ids for i in pagina), reverse=True)
+    # id decrescente, sem repetir nem pular; a ultima pagina e parcial
+    assert [i for pagina in ids for i in pagina] == todos
+    assert [len(pagina) for pagina in ids] == [2, 2, 1]
+    assert paginas[-1]['next_cursor'] is None
+    assert {pagina['total_records'] for pagina in paginas} == {len(todos)}
+
+
+def test_read_parcelamento_por_cursor(paginacao_client):
+    paginas = _percorrer(
+        paginacao_client,
+        '/juridico/parcelamento',
+        negociacao_id=paginacao_client.negociacao_id,
+        type=1,
+        page_size=2,
+    )
+
+    numeros = [
+        [row['numero_parcela'] for row in pagina['rows']]
+        for pagina in paginas
+    ]
+    assert numeros == [[1, 2], [3, 4], [5]]
+    assert paginas[-1]['next_cursor'] is None
+
+
+@pytest.mark.parametrize(
+    ('url', 'params'),
+    [
+        ('/juridico/negociacao', {}),
+        ('/juridico/parcelamento', {'type': 1}),
+    ],
+)
+def test_include_total_false_omite_a_contagem(paginacao_client, url, params):
+    params.setdefault('negociacao_id', paginacao_client.negociacao_id)
+
+    response = paginacao_client.get(
+        url, params={**params, 'page_size': 2, 'include_total': False}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json().get('total_records') is None
+    assert response.json()['next_cursor'] is not None
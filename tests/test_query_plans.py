@@ -0,0 +1,183 @@
+"""Regressao de plano dos acessos quentes a parcelamento_negociacao e
+da busca de negociacoes.
+
+Com enable_seqscan=off o planner so escolhe Seq Scan quando nenhum indice
+serve para o filtro/ordem, entao o teste e estavel mesmo com poucas
+linhas: se um indice das migrations e5a2c9d37f48 (parcelas) ou
+a1f4c7e92d05 (trigram sem acento) sumir ou a consulta mudar de forma que
+ele nao sirva mais, o plano volta a ter Seq Scan.
+"""
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import asc, insert, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.juridico.models import (
+    NegociacaoCredito,
+    ParcelamentoNegociacao,
+    table_registry,
+)
+from app.juridico.relatorio import (
+    consulta_parcelas_em_aberto,
+    consulta_relatorio,
+)
+from app.juridico.router_negociacao import consulta_busca, filtro_contem
+
+HOJE = date(2024, 6, 1)
+# parcelas semeadas: as VENCIDAS primeiras ficam antes de HOJE
+PARCELAS = 200
+VENCIDAS = 100
+
+
+@pytest.fixture()
+def juridico_session(engine):
+    with engine.begin() as conexao:
+        conexao.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+    table_registry.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        negociacao = NegociacaoCredito(
+            processo='0001',
+            executado='Fulano',
+            contrato='C-1',
+            val_devido=100,
+            val_desconto=0,
+            val_neg=100,
+            data_pri_parc=HOJE,
+            data_ult_parc=HOJE,
+            val_entrada=0,
+            qtd_parc_ent=0,
+            data_pri_parc_entr=None,
+            data_ult_parc_entr=None,
+            obs_val_neg=None,
+        )
+        session.add(negociacao)
+        session.flush()
+        session.execute(
+            insert(ParcelamentoNegociacao),
+            [
+                {
+                    'negociacao_id': negociacao.id,
+                    'data': HOJE + timedelta(days=i - VENCIDAS),
+                    'val_parcela': 10,
+                    # como em producao: quase todas as vencidas estao pagas
+                    'data_pgto': HOJE if i < VENCIDAS and i % 10 else None,
+                    'type': 1 + i % 2,
+                    'numero_parcela': i,
+                }
+                for i in range(PARCELAS)
+            ],
+        )
+        session.commit()
+        session.execute(text('ANALYZE parcelamento_negociacao'))
+
+        yield session, negociacao.id
+        session.rollback()
+
+    table_registry.metadata.drop_all(engine)
+
+
+def _nos(plano):
+    yield plano
+    for filho in plano.get('Plans', []):
+        yield from _nos(filho)
+
+
+def _plano(session, query):
+    compilado = query.compile(dialect=session.get_bind().dialect)
+    conexao = session.connection()
+    conexao.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    resultado = conexao.exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {compilado}', compilado.params
+    ).scalar_one()
+    if isinstance(resultado, str):
+        resultado = json.loads(resultado)
+    return list(_nos(resultado[0]['Plan']))
+
+
+def _assert_sem_seq_scan(nos, *indices, tabela='parcelamento_negociacao'):
+    for no in nos:
+        assert not (
+            no['Node Type'] == 'Seq Scan' and no.get('Relation Name') == tabela
+        ), f'Seq Scan em {tabela}: {no}'
+    usados = {no.get('Index Name') for no in nos}
+    for indice in indices:
+        assert indice in usados, f'{indice} nao usado; plano usa {usados}'
+
+
+@pytest.mark.parametrize(
+    ('data_apos', 'data_antes'),
+    [
+        (HOJE, HOJE + timedelta(days=30)),  # ha-venc-30d
+        (None, HOJE),  # negoc-venvidos
+    ],
+)
+def test_relatorio_em_aberto_usa_indice_parcial(
+    juridico_session, data_apos, data_antes
+):
+    session, _ = juridico_session
+
+    nos = _plano(session, consulta_parcelas_em_aberto(data_apos, data_antes))
+
+    _assert_sem_seq_scan(nos, 'ix_parcelamento_negociacao_aberta_data')
+
+
+def test_parcelas_da_negociacao_usa_indice_composto(juridico_session):
+    session, negociacao_id = juridico_session
+    query = (
+        select(ParcelamentoNegociacao)
+        .where(
+            (ParcelamentoNegociacao.negociacao_id == negociacao_id)
+            & (ParcelamentoNegociacao.type == 1)
+        )
+        .order_by(
+            asc(ParcelamentoNegociacao.numero_parcela),
+            asc(ParcelamentoNegociacao.id),
+        )
+        .limit(11)
+    )
+
+    nos = _plano(session, query)
+
+    _assert_sem_seq_scan(
+        nos, 'ix_parcelamento_negociacao_negociacao_type_numero'
+    )
+
+
+def test_relatorio_por_periodo_usa_indices_de_data(juridico_session):
+    session, _ = juridico_session
+    query = consulta_relatorio(2, HOJE - timedelta(days=30), HOJE)
+
+    nos = _plano(session, query)
+
+    _assert_sem_seq_scan(
+        nos,
+        'ix_parcelamento_negociacao_data',
+        'ix_parcelamento_negociacao_data_pgto',
+    )
+
+
+INDICES_TRIGRAM = (
+    'ix_negociacao_credito_processo_trgm',
+    'ix_negociacao_credito_executado_trgm',
+    'ix_negociacao_credito_contrato_trgm',
+)
+
+
+def test_busca_usa_indices_trigram(juridico_session):
+    session, _ = juridico_session
+
+    nos = _plano(session, consulta_busca('joão da silva', 20))
+
+    _assert_sem_seq_scan(nos, *INDICES_TRIGRAM, tabela='negociacao_credito')
+
+
+def test_filtro_search_term_usa_indices_trigram(juridico_session):
+    session, _ = juridico_session
+    query = select(NegociacaoCredito).where(or_(*filtro_contem('fula')))
+
+    nos = _plano(session, query)
+
+    _assert_sem_seq_scan(nos, *INDICES_TRIGRAM, tabela='negociacao_credito')
@@ -0,0 +1,151 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.app import app
+from app.pessoa.models import (
+    Municipio,
+    Regiao,
+    SincronizacaoIbge,
+    Uf,
+    table_registry,
+)
+from app.pessoa.referencia import (
+    ReferenceStore,
+    Snapshot,
+    normalizar_nome,
+    referencia,
+)
+
+REGIOES = [{'id': 1, 'nome': 'Norte', 'sigla': 'N'}]
+UFS = [
+    {'id': 17, 'sigla': 'TO', 'nome': 'Tocantins'},
+    {'id': 11, 'sigla': 'RO', 'nome': 'Rondônia'},
+]
+MUNICIPIOS = [
+    {'id': 1721000, 'nome': 'Palmas', 'uf_id': 17},
+    {'id': 1702109, 'nome': 'Araguaína', 'uf_id': 17},
+    {'id': 1100205, 'nome': 'Porto Velho', 'uf_id': 11},
+]
+
+
+@pytest.fixture()
+def ref_client():
+    with TestClient(app) as client:
+        referencia.trocar(Snapshot.montar(REGIOES, UFS, MUNICIPIOS))
+        yield client
+
+
+def test_normalizar_nome():
+    assert normalizar_nome('  São  João do   Araguaia ') == (
+        'sao joao do araguaia'
+    )
+
+
+def test_snapshot_indices():
+    snapshot = Snapshot.montar(REGIOES, UFS, MUNICIPIOS)
+
+    assert [uf['sigla'] for uf in snapshot.ufs.values()] == ['RO', 'TO']
+    assert [m['nome'] for m in snapshot.municipios_por_uf[17]] == [
+        'Araguaína',
+        'Palmas',
+    ]
+    assert snapshot.municipio_por_nome('to', 'ARAGUAINA') == MUNICIPIOS[1]
+    assert snapshot.municipio_por_nome('XX', 'Palmas') is None
+
+
+def test_snapshot_etag_muda_com_os_dados():
+    antes = Snapshot.montar(REGIOES, UFS, MUNICIPIOS)
+    depois = Snapshot.montar(
+        REGIOES, UFS, [*MUNICIPIOS, {'id': 1, 'nome': 'Nova', 'uf_id': 17}]
+    )
+
+    assert antes.etag == Snapshot.montar(REGIOES, UFS, MUNICIPIOS).etag
+    assert antes.etag != depois.etag
+
+
+def test_read_ufs_etag(ref_client):
+    response = ref_client.get('/pessoa/uf')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['cache-control'].startswith('public')
+    assert [uf['sigla'] for uf in response.json()['rows']] == ['RO', 'TO']
+
+    response = ref_client.get(
+        '/pessoa/uf', headers={'If-None-Match': response.headers['etag']}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_read_cidades_by_uf_memoria(ref_client):
+    response = ref_client.get(
+        '/pessoa/cidades/17', params={'page_size': 1, 'nome': 'pal'}
+    )
+
+    assert response.json() == {
+        'rows': [{'id': 1721000, 'nome': 'Palmas', 'uf_id': 17}],
+        'total_records': 1,
+    }
+    assert ref_client.get('/pessoa/cidades/99').status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+
+
+@pytest.fixture()
+def tabelas_referencia(engine, async_engine):
+    tabelas = [
+        Regiao.__table__,
+        Uf.__table__,
+        Municipio.__table__,
+        SincronizacaoIbge.__table__,
+    ]
+    table_registry.metadata.create_all(engine, tables=tabelas)
+    yield async_engine
+    table_registry.metadata.drop_all(engine, tables=tabelas)
+
+
+def test_workers_seguem_a_sincronizacao_feita_em_outro(tabelas_referencia):
+    # dois workers, cada um com o seu snapshot
+    worker_1 = ReferenceStore(intervalo=0)
+    worker_2 = ReferenceStore(intervalo=3600)
+
+    async def _cenario():
+        async with AsyncSession(tabelas_referencia) as session:
+            await session.execute(insert(Regiao).values(REGIOES))
+            await session.execute(insert(Uf).values(UFS))
+            await session.execute(insert(Municipio).values(MUNICIPIOS))
+            await session.commit()
+
+            antes = await worker_1.carregar(session)
+            await worker_2.carregar(session)
+
+            # sincronizacao concluida pelo worker 2
+            await session.execute(
+                insert(Municipio).values(id=1, nome='Nova', uf_id=17)
+            )
+            await session.execute(
+                insert(SincronizacaoIbge).values(
+                    id='job',
+                    status='concluido',
+                    resumo={},
+                    finalizado_em=func.now(),
+                )
+            )
+            await session.commit()
+            depois = await worker_2.carregar(session)
+
+            atual = await worker_1.obter(session)
+            # sem sincronizacao nova, o snapshot em memoria e mantido
+            assert await worker_1.obter(session) is atual
+            # dentro do intervalo o worker 2 nem consulta o banco
+            assert await worker_2.obter(session) is depois
+            return antes.etag, depois.etag, atual.etag
+
+    antes, depois, atual = asyncio.run(_cenario())
+
+    assert antes != depois
+    assert atual == depois
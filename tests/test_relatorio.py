@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy.orm import Session
+
+from tests.conftest import NegociacaoFactory
+
+EXECUTADOS = ('Carla', 'Ana', 'Bruno')
+PERIODO = {'tipo': 1, 'data_inicial': '2024-01-01', 'data_final': '2024-12-31'}
+
+
+@pytest.fixture()
+def relatorio_client(juridico_client, engine):
+    with Session(engine) as session:
+        session.add_all(
+            NegociacaoFactory(executado=executado) for executado in EXECUTADOS
+        )
+        # fora do periodo
+        session.add(
+            NegociacaoFactory(executado='Zeca', data_pri_parc=date(2025, 1, 1))
+        )
+        session.commit()
+    return juridico_client
+
+
+def _relatorio(client, formato):
+    response = client.get(
+        '/juridico/negociacao/relatorio/',
+        params={**PERIODO, 'formato': formato},
+    )
+    assert response.status_code == HTTPStatus.OK
+    return response
+
+
+def _linhas(formato, response) -> list[dict]:
+    if formato == 'json':
+        return response.json()
+    if formato == 'ndjson':
+        return [json.loads(linha) for linha in response.text.splitlines()]
+    if formato == 'csv':
+        texto = response.content.decode('utf-8-sig')
+        return list(csv.DictReader(io.StringIO(texto)))
+    planilha = load_workbook(io.BytesIO(response.content)).active
+    colunas, *linhas = planilha.iter_rows(values_only=True)
+    return [dict(zip(colunas, linha)) for linha in linhas]
+
+
+@pytest.mark.parametrize('formato', ['json', 'ndjson', 'csv', 'xlsx'])
+def test_relatorio_por_formato(relatorio_client, formato):
+    response = _relatorio(relatorio_client, formato)
+
+    linhas = _linhas(formato, response)
+
+    # ordenado por executado e so o periodo pedido
+    assert [linha['executado'] for linha in linhas] == sorted(EXECUTADOS)
+    assert {Decimal(str(linha['val_neg'])) for linha in linhas} == {
+        NegociacaoFactory.val_neg
+    }
+
+
+@pytest.mark.parametrize(
+    ('formato', 'media_type'),
+    [
+        ('ndjson', 'application/x-ndjson'),
+        ('csv', 'text/csv; charset=utf-8'),
+    ],
+)
+def test_relatorio_em_streaming_e_anexo(relatorio_client, formato, media_type):
+    response = _relatorio(relatorio_client, formato)
+
+    assert response.headers['content-type'] == media_type
+    assert response.headers['content-disposition'] == (
+        f'attachment; filename="relatorio_tipo1.{formato}"'
+    )
+
+
+def test_relatorio_csv_cabecalho_com_bom(relatorio_client):
+    response = _relatorio(relatorio_client, 'csv')
+
+    cabecalho = response.content.splitlines()[0]
+    assert cabecalho.startswith('﻿id,processo,executado'.encode())
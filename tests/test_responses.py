@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import orjson
+
+from app.core.responses import fast_json
+from app.juridico.negociacao_schema import (
+    NegociacaoVenciNaSemanaResponse,
+    ParcelamentoListSchema,
+)
+
+
+def _parcela(**kwargs):
+    valores = {
+        'id': 1,
+        'negociacao_id': 7,
+        'data': date(2024, 1, 10),
+        'val_parcela': Decimal('150.50'),
+        'val_pago': None,
+        'obs_val_pago': None,
+        'data_pgto': None,
+        'type': 1,
+        'numero_parcela': 1,
+        'is_pg': False,
+        'is_val_juros': False,
+        'negociacao': 'nao serializado',
+    }
+    return SimpleNamespace(**{**valores, **kwargs})
+
+
+def test_fast_json_igual_ao_pydantic():
+    conteudo = {
+        'rows': [
+            _parcela(),
+            _parcela(id=2, val_pago=Decimal('10.00'), data_pgto=date.today()),
+        ],
+        'total_records': 2,
+        'next_cursor': None,
+    }
+
+    response = fast_json(ParcelamentoListSchema, conteudo)
+
+    esperado = ParcelamentoListSchema.model_validate(
+        conteudo, from_attributes=True
+    ).model_dump_json()
+    assert response.media_type == 'application/json'
+    assert orjson.loads(response.body) == orjson.loads(esperado)
+
+
+def test_fast_json_converte_campos_float():
+    conteudo = {
+        'rows': [
+            {
+                'id': 1,
+                'processo': '0001',
+                'executado': 'Fulano',
+                'type': 1,
+                'data': date(2024, 1, 10),
+                'val_parcela': Decimal('150.50'),
+                'val_pago': None,
+                'data_pgto': None,
+                'juros': False,
+            }
+        ],
+        'total_records': 1,
+        'total_val_parcela': Decimal('150.50'),
+    }
+
+    body = orjson.loads(
+        fast_json(NegociacaoVenciNaSemanaResponse, conteudo).body
+    )
+
+    assert body['rows'][0]['val_parcela'] == 150.5  # noqa: PLR2004
+    assert body['total_val_parcela'] == 150.5  # noqa: PLR2004
+    assert body == orjson.loads(
+        NegociacaoVenciNaSemanaResponse.model_validate(
+            conteudo
+        ).model_dump_json()
+    )
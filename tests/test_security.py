@@ -1,8 +1,23 @@
+import asyncio
 from http import HTTPStatus
 
+import pytest
+from fastapi import HTTPException
 from jwt import decode
+from sqlalchemy import event
 
-from app.core.security import create_access_token, settings
+from app.core import cache
+from app.core.permissions import PermissionResolver
+from app.core.security import (
+    Principal,
+    create_access_token,
+    get_password_hash,
+    invalidate_principal,
+    principal_cache,
+    settings,
+    verify_user_with_roles_and_permissions,
+)
+from app.models.models import User
 
 
 def test_jwt():
@@ -24,3 +39,196 @@ def test_jwt_invalid_token(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_invalidate_principal_remove_apenas_o_usuario_alterado():
+    alice = Principal(
+        id=1,
+        username='alice',
+        email='alice@test.com',
+        full_name='Alice',
+        is_active=True,
+        is_staff=True,
+        is_superuser=False,
+    )
+    bob = Principal(
+        id=2,
+        username='bob',
+        email='bob@test.com',
+        full_name='Bob',
+        is_active=True,
+        is_staff=True,
+        is_superuser=False,
+    )
+    principal_cache.set(('alice', 'token-a'), alice)
+    principal_cache.set(('bob', 'token-b'), bob)
+
+    invalidate_principal(alice.id)
+
+    assert principal_cache.get(('alice', 'token-a')) is None
+    assert principal_cache.get(('bob', 'token-b')) == bob
+    principal_cache.clear()
+
+
+def _principal(is_superuser=False, roles=(), permissions=()):
+    return Principal(
+        id=1,
+        username='alice',
+        email='alice@test.com',
+        full_name='Alice',
+        is_active=True,
+        is_staff=True,
+        is_superuser=is_superuser,
+        roles=frozenset(roles),
+        permissions=frozenset(permissions),
+    )
+
+
+def test_verify_permissions_por_conjunto():
+    principal = _principal(
+        roles={'juridico'},
+        permissions={'negociacao.ler', 'negociacao.editar'},
+    )
+
+    assert verify_user_with_roles_and_permissions(
+        principal, roles=['juridico'], permissions=['negociacao.ler']
+    )
+    with pytest.raises(HTTPException) as exc:
+        verify_user_with_roles_and_permissions(
+            principal, permissions=['usuarios.editar']
+        )
+    assert exc.value.status_code == HTTPStatus.FORBIDDEN
+
+
+@pytest.mark.parametrize(
+    ('roles', 'permissions'),
+    [
+        ([], ['is_superuser']),
+        (['admin'], []),
+        ([], ['usuarios.editar']),
+        ([], []),
+    ],
+)
+def test_superusuario_passa_em_qualquer_exigencia(roles, permissions):
+    principal = _principal(is_superuser=True)
+
+    assert (
+        verify_user_with_roles_and_permissions(
+            principal, roles=roles, permissions=permissions
+        )
+        is principal
+    )
+
+
+def test_verify_role_basta_uma_das_exigidas():
+    principal = _principal(roles={'juridico'})
+
+    assert verify_user_with_roles_and_permissions(
+        principal, roles=['admin', 'juridico']
+    )
+    with pytest.raises(HTTPException) as exc:
+        verify_user_with_roles_and_permissions(principal, roles=['admin'])
+    assert exc.value.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_verify_falta_uma_das_permissoes():
+    principal = _principal(permissions={'negociacao.ler'})
+
+    with pytest.raises(HTTPException) as exc:
+        verify_user_with_roles_and_permissions(
+            principal, permissions=['negociacao.ler', 'negociacao.editar']
+        )
+    assert exc.value.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_verify_is_superuser_exige_superusuario():
+    # mesmo com todas as roles e permissoes, nao e administrador
+    principal = _principal(
+        roles={'admin'}, permissions={'is_superuser', 'usuarios.editar'}
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        verify_user_with_roles_and_permissions(
+            principal, permissions=['is_superuser']
+        )
+    assert exc.value.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_verify_sem_exigencias_so_superusuario():
+    principal = _principal(roles={'juridico'}, permissions={'pessoa.ler'})
+
+    with pytest.raises(HTTPException) as exc:
+        verify_user_with_roles_and_permissions(principal)
+    assert exc.value.status_code == HTTPStatus.FORBIDDEN
+
+
+class SessaoContaConsultas:
+    """AsyncSession falsa: devolve sempre a mesma role e conta consultas."""
+
+    def __init__(self):
+        self.consultas = 0
+
+    async def execute(self, stmt):
+        self.consultas += 1
+        return [('juridico', 'negociacao.ler')]
+
+
+def test_permission_resolver_expira_e_limita_o_cache(monkeypatch):
+    resolver = PermissionResolver(maxsize=2, ttl=60)
+    session = SessaoContaConsultas()
+    agora = [1000.0]
+    monkeypatch.setattr(cache, 'monotonic', lambda: agora[0])
+
+    async def _resolver(*user_ids, fresh=False):
+        for user_id in user_ids:
+            await resolver.resolve(session, user_id, fresh=fresh)
+        return session.consultas
+
+    assert asyncio.run(_resolver(1, 1)) == 1
+    # fresh ignora o cache (principal novo)
+    assert asyncio.run(_resolver(1, fresh=True)) == 2  # noqa: PLR2004
+    # revogacao feita em outro worker: vale no maximo ate o TTL
+    agora[0] += 61
+    assert asyncio.run(_resolver(1)) == 3  # noqa: PLR2004
+    # maxsize=2: o usuario 1 e o mais antigo e sai do cache
+    assert asyncio.run(_resolver(2, 3, 1)) == 6  # noqa: PLR2004
+
+
+def test_requisicao_repetida_usa_o_principal_em_cache(
+    client, session, async_engine
+):
+    user = User(
+        username='cacheado',
+        password=get_password_hash('testtest'),
+        email='cacheado@test.com',
+        full_name='Usuario Cacheado',
+        otp_auth_url=None,
+        otp_base32=None,
+    )
+    session.add(user)
+    session.commit()
+    token = create_access_token(data={'sub': user.username})
+    headers = {'Authorization': f'Bearer {token}'}
+    consultas = []
+
+    def _registrar(conn, cursor, statement, *args):
+        consultas.append(statement)
+
+    # so a autenticacao usa a sessao async; /todos usa a sync
+    event.listen(async_engine.sync_engine, 'before_cursor_execute', _registrar)
+    try:
+        assert client.get('/todos/', headers=headers).status_code == (
+            HTTPStatus.OK
+        )
+        assert any('FROM users' in sql for sql in consultas)
+        consultas.clear()
+
+        assert client.get('/todos/', headers=headers).status_code == (
+            HTTPStatus.OK
+        )
+    finally:
+        event.remove(
+            async_engine.sync_engine, 'before_cursor_execute', _registrar
+        )
+
+    assert consultas == []
@@ -0,0 +1,118 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.security import create_access_token, get_password_hash
+from app.core.sql_trace import SqlTraceMiddleware, SqlTracer, fingerprint
+from app.models.models import User
+
+
+@pytest.fixture()
+def instrumentados():
+    # o hook de consultas e global: tira os tracers do teste ao final
+    tracers = []
+    yield tracers
+    for tracer in tracers:
+        tracer.desinstrumentar()
+
+
+def _app(tracer, instrumentados):
+    engine = create_engine('sqlite://')
+    tracer.instrumentar()
+    instrumentados.append(tracer)
+    app = FastAPI()
+    app.add_middleware(SqlTraceMiddleware, tracer=tracer)
+
+    @app.get('/consultas/{quantidade}')
+    def consultas(quantidade: int):
+        with engine.connect() as conexao:
+            for i in range(quantidade):
+                conexao.execute(text('SELECT :cpf'), {'cpf': f'0000000{i}'})
+        return {}
+
+    return TestClient(app)
+
+
+def test_guarda_requisicao_com_consulta_lenta(instrumentados):
+    tracer = SqlTracer(limiar_ms=0, max_consultas=2)
+    client = _app(tracer, instrumentados)
+
+    client.get('/consultas/3')
+
+    (trace,) = tracer.ultimos(10)
+    assert trace.metodo == 'GET'
+    assert trace.caminho == '/consultas/3'
+    assert trace.total_consultas == 3  # noqa: PLR2004
+    assert trace.omitidas == 1
+    assert trace.consultas[0].sql == 'SELECT ?'
+    # so o hash dos parametros, nunca os valores
+    assert '00000000' not in trace.consultas[0].parametros
+    assert trace.consultas[0].parametros != trace.consultas[1].parametros
+
+
+def test_ignora_requisicao_sem_consulta_lenta(instrumentados):
+    tracer = SqlTracer(limiar_ms=60_000)
+    client = _app(tracer, instrumentados)
+
+    client.get('/consultas/3')
+
+    assert tracer.ultimos(10) == []
+
+
+def test_ultimos_mais_recente_primeiro_e_buffer_limitado(instrumentados):
+    tracer = SqlTracer(limiar_ms=0, tamanho_buffer=2)
+    client = _app(tracer, instrumentados)
+
+    for quantidade in (1, 2, 3):
+        client.get(f'/consultas/{quantidade}')
+
+    assert [t.caminho for t in tracer.ultimos(10)] == [
+        '/consultas/3',
+        '/consultas/2',
+    ]
+
+
+def test_fingerprint_estavel():
+    assert fingerprint({'cpf': '1'}) == fingerprint({'cpf': '1'})
+    assert fingerprint({'cpf': '1'}) != fingerprint({'cpf': '2'})
+    assert not fingerprint(())
+
+
+def _token_de(session, is_superuser):
+    user = User(
+        username='diagnostico',
+        password=get_password_hash('testtest'),
+        email='diagnostico@test.com',
+        full_name='Usuario Diagnostico',
+        otp_auth_url=None,
+        otp_base32=None,
+        is_superuser=is_superuser,
+    )
+    session.add(user)
+    session.commit()
+    return create_access_token(data={'sub': user.username})
+
+
+def test_sql_traces_exige_superusuario(client, session):
+    token = _token_de(session, is_superuser=False)
+
+    response = client.get(
+        '/admin/sql-traces', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_sql_traces_superusuario(client, session):
+    token = _token_de(session, is_superuser=True)
+
+    response = client.get(
+        '/admin/sql-traces', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['ativo'] is False
+    assert response.json()['traces'] == []
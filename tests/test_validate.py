@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+from fastapi.testclient import TestClient
+
+from app.app import app
+from app.routers.validate import (
+    validate_cnpj,
+    validate_cnpj_batch,
+    validate_cpf,
+    validate_cpf_batch,
+    validate_documentos_batch,
+)
+
+
+def test_validate_cpf_e_cnpj_escalares():
+    assert validate_cpf('529.982.247-25')
+    assert not validate_cpf('529.982.247-26')
+    assert not validate_cpf('111.111.111-11')
+    assert validate_cnpj('11.222.333/0001-81')
+    assert not validate_cnpj('11.222.333/0001-80')
+    assert not validate_cnpj('00000000000000')
+
+
+def test_validate_batch_vetorizado():
+    cpfs = ['52998224725', '529.982.247-25', '5299822472', '', None, 'abc']
+
+    assert validate_cpf_batch(cpfs).tolist() == [
+        True, True, False, False, False, False,
+    ]
+    cnpjs = ['33.000.167/0001-01', '33000167000102']
+    assert validate_cnpj_batch(cnpjs).tolist() == [True, False]
+    assert validate_cpf_batch([]).tolist() == []
+
+
+def test_validate_documentos_batch_detecta_tipo():
+    tipos, validos = validate_documentos_batch(
+        ['529.982.247-25', '11.222.333/0001-81', '123']
+    )
+
+    assert tipos.tolist() == ['cpf', 'cnpj', None]
+    assert validos.tolist() == [True, True, False]
+
+
+def test_validate_batch_endpoint():
+    client = TestClient(app)
+
+    response = client.post(
+        '/pessoa/validate/batch',
+        json={'documentos': ['529.982.247-25', '52998224726']},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'rows': [
+            {'documento': '529.982.247-25', 'tipo': 'cpf', 'valido': True},
+            {'documento': '52998224726', 'tipo': 'cpf', 'valido': False},
+        ],
+        'total_validos': 1,
+        'total_invalidos': 1,
+    }
@@ -0,0 +1,60 @@
+"""Carga de pessoas a partir de um CSV (ver app/pessoa/importacao.py).
+
+    python -m util.import_pessoas pessoas.csv --rejeitados rejeitados.csv
+"""
+import csv
+from dataclasses import asdict, fields
+from time import perf_counter
+
+import click
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.settings import Settings
+from app.pessoa.importacao import Rejeitado, importar
+
+
+@click.command()
+@click.argument('arquivo', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--batch-size', default=5000, show_default=True)
+@click.option(
+    '--rejeitados',
+    type=click.File('w', encoding='utf-8'),
+    help='CSV com as linhas recusadas e o motivo.',
+)
+@click.option('--database-url', default=None, help='Padrao: DATABASE_URL.')
+def main(arquivo, batch_size: int, rejeitados, database_url: str | None):
+    """Importa pessoas de um CSV."""
+    engine = create_engine(database_url or Settings().DATABASE_URL)
+    inicio = perf_counter()
+
+    def eco(resultado):
+        decorrido = perf_counter() - inicio
+        click.echo(
+            f'{resultado.lidas} lidas, {resultado.inseridas} inseridas, '
+            f'{len(resultado.rejeitados)} rejeitadas '
+            f'({resultado.lidas / decorrido:.0f} linhas/s)'
+        )
+
+    with Session(engine) as session:
+        try:
+            resultado = importar(session, arquivo, batch_size, eco=eco)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    if rejeitados is not None:
+        writer = csv.DictWriter(
+            rejeitados, fieldnames=[f.name for f in fields(Rejeitado)]
+        )
+        writer.writeheader()
+        writer.writerows(asdict(r) for r in resultado.rejeitados)
+
+    click.echo(
+        f'concluido: {resultado.inseridas} inseridas, '
+        f'{len(resultado.rejeitados)} rejeitadas em '
+        f'{perf_counter() - inicio:.1f}s'
+    )
+
+
+if __name__ == '__main__':
+    main()